@@ -0,0 +1,103 @@
+import time
+from utils.utils import *
+from utils.audio import AUDIO
+from led.registry import animation, RGB, SPEED
+
+class AudioAnimation(Animation):
+    """
+    Base of the audio-reactive animations: renders a frame from the latest features of the audio analysis
+    at the frame rate of the audio config. The analysis runs in the background while the animation is running.
+    """
+    def __init__(self, strip):
+        super().__init__(self._run_audio)
+        self.strip = strip
+
+    def render(self, features):
+        """Sets the pixels of one frame from the AudioFeatures, show() is called afterwards."""
+        raise NotImplementedError
+
+    def _run_audio(self):
+        # Reported as started right away, importing NumPy and opening the source take a moment
+        self.animationStarted = True
+        if not AUDIO.acquire():
+            self.animationStarted = False
+            return False
+        try:
+            interval = 1 / AUDIO.frame_rate
+            while not self.stopAnimation:
+                cpu_start = time.thread_time()
+                self.render(AUDIO.features)
+                self.strip.show()
+                AUDIO.record_render(time.thread_time() - cpu_start)
+                self.sleep(interval)
+        except Exception as e:
+            print(f"Something went wrong: {e}")
+            return False
+        finally:
+            AUDIO.release()
+
+@animation('spectrum_bars', 'audio', 'Spectrum Bars', 'Splits the LED strip into one bar per frequency band, lit up to the level of the band.')
+class SpectrumBars(AudioAnimation):
+    """One segment per frequency band from bass to treble, each filled to its level in a rainbow color."""
+    def render(self, features):
+        num_pixels = self.strip.numPixels()
+        levels = features.levels
+        if not levels:
+            for i in range(num_pixels):
+                self.strip.setPixelColor(i, 0)
+            return
+        bands = len(levels)
+        for band, level in enumerate(levels):
+            start = band * num_pixels // bands
+            end = (band + 1) * num_pixels // bands
+            lit = start + round(level * (end - start))
+            color = wheel(band * 255 // bands)
+            for i in range(start, lit):
+                self.strip.setPixelColor(i, color)
+            for i in range(lit, end):
+                self.strip.setPixelColor(i, 0)
+
+@animation('beat_pulse', 'audio', 'Beat Pulse', 'Flashes the LED strip in a color on every beat and lets it fade out until the next one.',
+           {**RGB, 'decay': {'type': 'float', 'min': 0.5, 'max': 0.99, 'default': 0.85}})
+class BeatPulse(AudioAnimation):
+    """Sets the full brightness on every detected beat, which decays by a factor per frame."""
+    def __init__(self, strip, red, green, blue, decay=0.85):
+        super().__init__(strip)
+        self.red = red
+        self.green = green
+        self.blue = blue
+        self.decay = float(decay)
+        self.level = 0.0
+        self.beat_count = 0
+
+    def render(self, features):
+        if features.beat_count != self.beat_count:
+            self.beat_count = features.beat_count
+            self.level = 1.0
+        else:
+            self.level *= self.decay
+        color = Color(int(self.red * self.level), int(self.green * self.level), int(self.blue * self.level))
+        for i in range(self.strip.numPixels()):
+            self.strip.setPixelColor(i, color)
+
+@animation('energy_rainbow', 'audio', 'Energy Rainbow', 'A rainbow cycling across the LED strip, the louder the music the faster it moves.',
+           {'min_speed': {**SPEED, 'default': 10}, 'max_speed': {**SPEED, 'default': 200}})
+class EnergyRainbow(AudioAnimation):
+    """Rainbow cycle whose speed in steps per second is mapped from min_speed to max_speed by the loudness."""
+    def __init__(self, strip, min_speed=10, max_speed=200):
+        super().__init__(strip)
+        self.min_speed = int(min_speed)
+        self.max_speed = max(int(max_speed), self.min_speed)
+        self.position = 0.0
+        self.last_frame = None
+
+    def render(self, features):
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            speed = self.min_speed + (self.max_speed - self.min_speed) * features.energy
+            self.position = (self.position + speed * (now - self.last_frame)) % 256
+        self.last_frame = now
+        num_pixels = self.strip.numPixels()
+        offset = int(self.position)
+        for i in range(num_pixels):
+            self.strip.setPixelColor(i, wheel((i * 256 // num_pixels + offset) & 255))
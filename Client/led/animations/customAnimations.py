@@ -1,7 +1,9 @@
 import random
-import time
 from utils.utils import *
+from led.registry import animation, COLOR, RGB
 
+@animation('color_wipe', 'custom', 'Color Wipe', 'Wipes the LED strip with a single color, creating a visually striking effect.',
+           {**RGB})
 class Color_Wipe(Animation):
     """Wipe color across display a pixel at a time."""
     def __init__(self, strip, red, green, blue):
@@ -13,28 +15,29 @@ class Color_Wipe(Animation):
 
     def _color_wipe(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
-                color = Color(self.red, self.green, self.blue)
+            if self.valid_rgb(self.red, self.green, self.blue):
                 self.animationStarted = True
                 while not self.stopAnimation:
                     for i in range(self.strip.numPixels()):
                         if self.stopAnimation:
                             break
-                        self.strip.setPixelColor(i, color)  # Set pixel color to the specified color
+                        self.strip.setPixelColor(i, Color(self.red, self.green, self.blue))  # Set pixel color to the specified color
                         self.strip.show()  # Update the LED strip with the new color
-                        time.sleep(0.05)  # Pause for a short duration
+                        self.sleep(0.05)  # Pause for a short duration
                     for i in range(self.strip.numPixels()):
                         if self.stopAnimation:
                             break
                         self.strip.setPixelColor(i, 0)  # Set pixel color to black (turn off the pixel)
                         self.strip.show()  # Update the LED strip
-                        time.sleep(0.05)  # Pause for a short duration
+                        self.sleep(0.05)  # Pause for a short duration
             else:
                 return False
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
 
+@animation('theater_chase', 'custom', 'Theater Chase', 'Creates a theater chase effect with custom colors.',
+           {**RGB})
 class Theater_Chase(Animation):
     """Movie theater light style chaser animation."""
     def __init__(self, strip, red, green, blue):
@@ -46,8 +49,7 @@ class Theater_Chase(Animation):
 
     def _theater_chase(self): 
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
-                color = Color(self.red, self.green, self.blue)
+            if self.valid_rgb(self.red, self.green, self.blue):
                 self.animationStarted = True
                 while not self.stopAnimation:
                     for j in range(10):
@@ -56,12 +58,13 @@ class Theater_Chase(Animation):
                         for q in range(3):
                             if self.stopAnimation:
                                 break
+                            color = Color(self.red, self.green, self.blue)  # The parameters may change between frames
                             for i in range(0, self.strip.numPixels(), 3):
                                 if self.stopAnimation:
                                     break
                                 self.strip.setPixelColor(i + q, color)  # Set color to the pixel
                             self.strip.show()  # Update the LED strip
-                            time.sleep(0.05)  # Pause for a short duration
+                            self.sleep(0.05)  # Pause for a short duration
                             if self.stopAnimation:
                                 break
                             for i in range(0, self.strip.numPixels(), 3):
@@ -74,6 +77,8 @@ class Theater_Chase(Animation):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('strobe', 'custom', 'Strobe', 'Produces a strobe effect using custom colors.',
+           {**RGB})
 class Strobe(Animation):
     """Create a strobe effect by rapidly turning the LEDs on and off."""
     def __init__(self, strip, red, green, blue):
@@ -85,26 +90,26 @@ class Strobe(Animation):
 
     def _strobe(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
-                color = Color(self.red, self.green, self.blue)
+            if self.valid_rgb(self.red, self.green, self.blue):
                 num_pixels = self.strip.numPixels()
                 self.animationStarted = True
                 while not self.stopAnimation:
                     for i in range(num_pixels):
                         if self.stopAnimation:
                             break
-                        self.strip.setPixelColor(i, color)  # Set all pixels to the specified color
+                        self.strip.setPixelColor(i, Color(self.red, self.green, self.blue))  # Set all pixels to the specified color
                         self.strip.show()  # Update the LED strip
-                        time.sleep(.5)  # Pause for a short duration
+                        self.sleep(.5)  # Pause for a short duration
                         for _ in range(5):
                             if self.stopAnimation:
                                 break
+                            color = Color(self.red, self.green, self.blue)  # The parameters may change between frames
                             for i in range(num_pixels):
                                 if self.stopAnimation:
                                     break
                                 self.strip.setPixelColor(i, 0)  # Turn off all pixels
                             self.strip.show()  # Update the LED strip
-                            time.sleep(.5)  # Pause for a short duration
+                            self.sleep(.5)  # Pause for a short duration
                             if self.stopAnimation:
                                 break
                             for i in range(num_pixels):
@@ -112,7 +117,7 @@ class Strobe(Animation):
                                     break
                                 self.strip.setPixelColor(i, color)  # Turn on all pixels
                             self.strip.show()  # Update the LED strip
-                            time.sleep(.5)  # Pause for a short duration
+                            self.sleep(.5)  # Pause for a short duration
                             if self.stopAnimation:
                                 break
             else:
@@ -121,6 +126,8 @@ class Strobe(Animation):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('color_chase', 'custom', 'Color Chase', 'Generates a chasing effect with custom colors.',
+           {**RGB})
 class Color_Chase(Animation):
     """Create a animation that chases down the strip."""
     def __init__(self, strip, red, green, blue):
@@ -134,8 +141,7 @@ class Color_Chase(Animation):
 
     def _color_chase(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
-                color = Color(self.red, self.green, self.blue)
+            if self.valid_rgb(self.red, self.green, self.blue):
                 num_pixels = self.strip.numPixels()
                 tail_length = int((num_pixels * 5) / 100) 
                 self.animationStarted = True
@@ -154,6 +160,7 @@ class Color_Chase(Animation):
                     for i in range(num_pixels):
                         if self.stopAnimation:
                             break
+                        color = Color(self.red, self.green, self.blue)  # The parameters may change between frames
                         # Shift the pixel list
                         for j in range(num_pixels - 1, 0, -1):
                             if self.stopAnimation:
@@ -179,7 +186,7 @@ class Color_Chase(Animation):
                             self.strip.setPixelColor(i - tail_length , 0)
                             self.strip.show()
 
-                        time.sleep(self.wait_ms / 1000.0)
+                        self.sleep(self.wait_ms / 1000.0)
                         if self.stopAnimation:
                             break
                     # Turn off the remaining tail
@@ -195,6 +202,8 @@ class Color_Chase(Animation):
             print(f"Something went wrong: {e}")
             return False
         
+@animation('custom_rainbow_cycle', 'custom', 'Custom Rainbow Cycle', 'Draw rainbow that uniformly distributes itself across all pixels.',
+           {'colors': {'type': 'list', 'items': COLOR, 'min_length': 2, 'max_length': 256}})
 class Custom_Rainbow_Cycle(Animation):
     """Draw custom color cycle that uniformly distributes itself across all pixels."""
     def __init__(self, strip, colors):
@@ -215,7 +224,7 @@ class Custom_Rainbow_Cycle(Animation):
                             break
                         self.strip.setPixelColor(i, custom_wheel((int(i * 256 / self.strip.numPixels()) + j) & 255, self.colors))
                     self.strip.show()
-                    time.sleep(0.02)
+                    self.sleep(0.02)
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
\ No newline at end of file
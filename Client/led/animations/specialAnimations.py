@@ -1,12 +1,14 @@
-import time
 import random
 from utils.utils import *
+from led.dither import FRAME_RATE, attach_high_bit_frame, detach_high_bit_frame
+from led.registry import animation, FROM_RGB, RGB, SPEED, TO_RGB
 
 def fill_color(strip, red, green, blue):
     """Fills all pixels in a specific color"""
     try:
         if validate_rgb_values(red, green, blue):
-            if is_within_range(red, 225, 255) and is_within_range(green, 225, 255) and is_within_range(blue, 225, 255):
+            # Without a power budget (led/power.py) full white is capped at half brightness
+            if strip.power_limiter is None and is_within_range(red, 225, 255) and is_within_range(green, 225, 255) and is_within_range(blue, 225, 255):
                 strip.setBrightness(127)
                 strip.show()
             color = Color(red, green, blue)
@@ -20,6 +22,8 @@ def fill_color(strip, red, green, blue):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('blink', 'special', 'Blink', 'Repeatedly blinks the LED strip with a specified color combination.',
+           {**RGB, 'blinking_speed': SPEED})
 class Blink(Animation):
     """Blink all LEDs on and off."""
     def __init__(self, strip, red, green, blue, blinking_speed):
@@ -32,15 +36,15 @@ class Blink(Animation):
 
     def _blink(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
+            if self.valid_rgb(self.red, self.green, self.blue):
                 self.animationStarted = True
                 while not self.stopAnimation:
                     if self.stopAnimation:
                         break
                     fill_color(self.strip, self.red, self.green, self.blue)
-                    time.sleep(1 / self.blinking_speed)
+                    self.sleep(1 / self.blinking_speed)
                     fill_color(self.strip, 0, 0, 0)
-                    time.sleep(1 / self.blinking_speed)
+                    self.sleep(1 / self.blinking_speed)
                     if self.stopAnimation:
                         break
             else:
@@ -50,8 +54,10 @@ class Blink(Animation):
             return False
 
 
+@animation('fade', 'special', 'Fade', 'Gradually fades the LED strip from one color to another.',
+           {**FROM_RGB, **TO_RGB, 'steps': {'type': 'int', 'min': 1, 'max': 1000}, 'fading_speed': SPEED})
 class Fade(Animation):
-    """Fade the LEDs from one color to another."""
+    """Fade the LEDs from one color to another, rendered with 16 bits per channel and dithered so slow fades don't step."""
     def __init__(self, strip, from_red, from_green, from_blue, to_red, to_green, to_blue, steps, fading_speed):
         super().__init__(self._fade)
         self.strip = strip
@@ -67,31 +73,35 @@ class Fade(Animation):
 
     def _fade(self):
         try:
-            if validate_rgb_values(self.from_red, self.from_green, self.from_blue) and validate_rgb_values(
+            if self.valid_rgb(self.from_red, self.from_green, self.from_blue) and self.valid_rgb(
                     self.to_red, self.to_green, self.to_blue):
+                frame = attach_high_bit_frame(self.strip)
                 self.animationStarted = True
                 while not self.stopAnimation:
-                    for step in range(self.steps):
-                        if self.stopAnimation:
-                            break
-                        red = int(self.from_red + (self.to_red - self.from_red) * (step / self.steps))
-                        green = int(self.from_green + (self.to_green - self.from_green) * (step / self.steps))
-                        blue = int(self.from_blue + (self.to_blue - self.from_blue) * (step / self.steps))
-                        fill_color(self.strip, red, green, blue)
-                        time.sleep(0.08)
+                    # Every step lasts 0.08 seconds, rendered as frames at the frame rate in between
+                    frames = max(1, round(self.steps * 0.08 * FRAME_RATE))
+                    for i in range(frames + 1):
                         if self.stopAnimation:
                             break
+                        # The colors are read every frame, backwards the fade runs from the to color to the from color
+                        progress = i / frames if self.direction == 1 else 1 - i / frames
+                        frame.fill(self.from_red + (self.to_red - self.from_red) * progress,
+                                   self.from_green + (self.to_green - self.from_green) * progress,
+                                   self.from_blue + (self.to_blue - self.from_blue) * progress)
+                        self.strip.show()
+                        # The color it faded to is held before the direction reverses
+                        self.sleep(1 / FRAME_RATE if i < frames else 1 / self.fading_speed)
                     self.direction *= -1  # Reverse the direction
-                    self.from_red, self.to_red = self.to_red, self.from_red
-                    self.from_green, self.to_green = self.to_green, self.from_green
-                    self.from_blue, self.to_blue = self.to_blue, self.from_blue
-                    time.sleep(1 / self.fading_speed)
             else:
                 return False
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
+        finally:
+            detach_high_bit_frame(self.strip)
 
+@animation('sparkle', 'special', 'Sparkle', 'Adds sparkling effects to the LED strip by randomly illuminating individual LEDs.',
+           {**RGB, 'sparkle_count': {'type': 'int', 'min': 0, 'max': 10000}})
 class Sparkle(Animation):
     """Create a sparkling effect on the LEDs."""
     def __init__(self, strip, red, green, blue, sparkle_count):
@@ -104,7 +114,7 @@ class Sparkle(Animation):
 
     def _sparkle(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
+            if self.valid_rgb(self.red, self.green, self.blue):
                 num_pixels = self.strip.numPixels()
                 self.animationStarted = True
                 while not self.stopAnimation:
@@ -121,13 +131,15 @@ class Sparkle(Animation):
                         darkened_color = Color(int(self.red * brightness), int(self.green * brightness), int(self.blue * brightness))
                         self.strip.setPixelColor(pixel_index, darkened_color)
                     self.strip.show()
-                    time.sleep(.8)
+                    self.sleep(.8)
             else:
                 return False
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
 
+@animation('scanner_effect', 'special', 'Scanner Effect', 'Creates a scanning effect by moving a single colored pixel back and forth.',
+           {**RGB, 'scan_speed': SPEED, 'tail_length': {'type': 'int', 'min': 1, 'max': 1000}})
 class ScannerEffect(Animation):
     """Create a scanner animation with a tail."""
     def __init__(self, strip, red, green, blue, scan_speed, tail_length):
@@ -141,7 +153,7 @@ class ScannerEffect(Animation):
 
     def _scanner_effect(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
+            if self.valid_rgb(self.red, self.green, self.blue):
                 num_pixels = self.strip.numPixels()
                 self.animationStarted = True
 
@@ -168,7 +180,7 @@ class ScannerEffect(Animation):
                             ))
 
                         self.strip.show()
-                        time.sleep(1 / self.scan_speed)
+                        self.sleep(1 / self.scan_speed)
 
                     for i in range(num_pixels - 2, 0, -1):
                         if self.stopAnimation:
@@ -192,7 +204,7 @@ class ScannerEffect(Animation):
                             ))
 
                         self.strip.show()
-                        time.sleep(1 / self.scan_speed)
+                        self.sleep(1 / self.scan_speed)
             else:
                 print("Couldn't validate colors")
                 return False
@@ -200,6 +212,8 @@ class ScannerEffect(Animation):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('yoyo_theater', 'special', 'Yoyo Theater', 'Creates a yoyo-like effect and lets the string colors bounce around',
+           {**RGB, 'yoyo_speed': SPEED})
 class YoyoTheater(Animation):
     """Create a animation that goes down the strip with a yoyo and theater style"""
     def __init__(self, strip, red, green, blue, yoyo_speed):
@@ -213,7 +227,7 @@ class YoyoTheater(Animation):
 
     def _yoyo_theater(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
+            if self.valid_rgb(self.red, self.green, self.blue):
                 num_pixels = self.strip.numPixels()
                 scan_range = num_pixels * 2 - 2
                 self.animationStarted = True
@@ -250,7 +264,7 @@ class YoyoTheater(Animation):
                         self.strip.setPixelColor(pixel_index, color)
                         self.strip.show()
 
-                        time.sleep(self.yoyo_speed / (scan_range * num_pixels))
+                        self.sleep(self.yoyo_speed / (scan_range * num_pixels))
 
                     self.strip.setPixelColor(num_pixels - 1, 0)
                     self.strip.show()
@@ -262,6 +276,8 @@ class YoyoTheater(Animation):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('breathing_effect', 'special', 'Breathing Effect', 'Create a breathing effect by gradually changing the brightness of the color.',
+           {**RGB, 'breathing_duration': {'type': 'int', 'min': 1, 'max': 3600}})
 class Breathing_Effect(Animation):
     def __init__(self, strip, red, green, blue, breathing_duration):
         super().__init__(self._breathing_effect)
@@ -272,58 +288,46 @@ class Breathing_Effect(Animation):
         self.breathing_duration = int(breathing_duration)
 
     def _breathing_effect(self):
-        """Create a breathing effect by gradually changing the brightness of the color."""
+        """
+        Create a breathing effect by gradually changing the brightness of the color.
+
+        The color is scaled in a 16 bit frame every frame instead of stepping the brightness of the strip,
+        which stays as it is; dithering keeps the lowest levels from stepping.
+        """
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
-                color = Color(self.red, self.green, self.blue)
-                brightness_steps = 50
-                brightness_increment = 255 / brightness_steps
+            if self.valid_rgb(self.red, self.green, self.blue):
+                frame = attach_high_bit_frame(self.strip)
                 self.animationStarted = True
                 while not self.stopAnimation:
-                    # Increase brightness
-                    for i in range(brightness_steps):
-                        if self.stopAnimation:
-                            break
-                        if i>1:
-                            brightness = int(brightness_increment * i)
-                        else:
-                            brightness = int(brightness_increment * (i + 1))
-                        self.strip.setBrightness(brightness)
-                        self.strip.show()
-                        time.sleep(self.breathing_duration / brightness_steps)
-                        for j in range(self.strip.numPixels()):
-                            if self.stopAnimation:
-                                break
-                            self.strip.setPixelColor(j, color)
-                    # Decrease brightness
-                    for i in range(brightness_steps, -1, -1):
+                    # Rising and falling take breathing_duration seconds each
+                    frames = max(1, round(self.breathing_duration * FRAME_RATE))
+                    for i in range(2 * frames):
                         if self.stopAnimation:
                             break
-                        brightness = int(brightness_increment * i)
-                        self.strip.setBrightness(brightness)
+                        level = 1 - abs(i - frames) / frames
+                        frame.fill(self.red * level, self.green * level, self.blue * level)
                         self.strip.show()
-                        time.sleep(self.breathing_duration / brightness_steps)
-                        for j in range(self.strip.numPixels()):
-                            if self.stopAnimation:
-                                break
-                            self.strip.setPixelColor(j, color)
-
-                    if self.stopAnimation:
-                        break
+                        self.sleep(1 / FRAME_RATE)
             else:
                 print("Couldn't Validate Colors")
                 return False
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
+        finally:
+            detach_high_bit_frame(self.strip)
 
+@animation('color_ripple', 'special', 'Color Ripple', 'Create a ripple effect with a changing color.',
+           {**RGB, 'ripple_speed': SPEED})
 class Color_Ripple(Animation):
     """Create a ripple effect with a changing color."""
     def __init__(self, strip, red, green, blue, ripple_speed):
         super().__init__(self._color_ripple)
         self.strip = strip
+        self.red = red
+        self.green = green
+        self.blue = blue
         self.ripple_speed = int(ripple_speed)
-        self.start_color = Color(red, green, blue)
 
     def _color_ripple(self):
         try:
@@ -334,20 +338,21 @@ class Color_Ripple(Animation):
                 for center in range(num_pixels):
                     if self.stopAnimation:
                         break
+                    start_color = Color(self.red, self.green, self.blue)
                     for i in range(num_pixels):
                         if self.stopAnimation:
                             break
                         distance = abs(center - i)
                         brightness = int(255 * (1 - distance / num_pixels))
                         color = Color(
-                            int(self.start_color.r * (1 - brightness / 255)),
-                            int(self.start_color.g * (1 - brightness / 255)),
-                            int(self.start_color.b * (1 - brightness / 255))
+                            int(start_color.r * (1 - brightness / 255)),
+                            int(start_color.g * (1 - brightness / 255)),
+                            int(start_color.b * (1 - brightness / 255))
                         )
                         self.strip.setPixelColor(i, color)
 
                     self.strip.show()
-                    time.sleep(1 / self.ripple_speed)
+                    self.sleep(1 / self.ripple_speed)
 
                 for i in range(num_pixels):
                     if self.stopAnimation:
@@ -355,7 +360,7 @@ class Color_Ripple(Animation):
                     self.strip.setPixelColor(i, Color(0, 0, 0, 0))
 
                 self.strip.show()
-                time.sleep(1 / self.ripple_speed)
+                self.sleep(1 / self.ripple_speed)
 
             for i in range(num_pixels):
                 if self.stopAnimation:
@@ -1,7 +1,8 @@
 import random
-import time
 from utils.utils import *
+from led.registry import animation
 
+@animation('rainbow_cycle', 'standard', 'Rainbow Cycle', 'Smoothly transitions colors in a cyclical pattern resembling a rainbow.')
 class Rainbow_Cycle(Animation):
     """Draw rainbow that uniformly distributes itself across all pixels."""
     def __init__(self, strip):
@@ -20,11 +21,12 @@ class Rainbow_Cycle(Animation):
                             break
                         self.strip.setPixelColor(i, wheel((int(i * 256 / self.strip.numPixels()) + j) & 255))
                     self.strip.show()
-                    time.sleep(0.02)
+                    self.sleep(0.02)
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
 
+@animation('rainbow_comet', 'standard', 'Rainbow Comet', 'Simulates a comet-like trail of rainbow colors.')
 class Rainbow_Comet(Animation):
     """Create a comet effect with a rainbow tail that moves along the LED strip."""
     def __init__(self, strip):
@@ -47,7 +49,7 @@ class Rainbow_Comet(Animation):
                         color = wheel((i + j) & 255)  # Get rainbow color based on pixel position
                         self.strip.setPixelColor(i - j, color)  # Set pixel color for the tail
                     self.strip.show()
-                    time.sleep(comet_speed)
+                    self.sleep(comet_speed)
                     for j in range(tail_length + 1):
                         if self.stopAnimation:
                             break
@@ -56,6 +58,7 @@ class Rainbow_Comet(Animation):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('theater_chase_rainbow', 'standard', 'Theater Chase Rainbow', 'Produces a theater chase effect with a rainbow of colors.')
 class Theater_Chase_Rainbow(Animation):
     """Rainbow movie theater light style chaser animation."""
     def __init__(self, strip):
@@ -77,7 +80,7 @@ class Theater_Chase_Rainbow(Animation):
                                 break
                             self.strip.setPixelColor(i + q, wheel((i + j) % 255))
                         self.strip.show()
-                        time.sleep(0.05)
+                        self.sleep(0.05)
                         for i in range(0, self.strip.numPixels(), 3):
                             if self.stopAnimation:
                                 break
@@ -86,6 +89,7 @@ class Theater_Chase_Rainbow(Animation):
             print(f"Something went wrong: {e}")
             return False
         
+@animation('rainbow_bounce', 'standard', 'Rainbow Bounce', 'Bounce a rainbow color back and forth across the LED strip.')
 class Rainbow_Bounce(Animation):
     """Bounce a rainbow color back and forth across the LED strip."""
     def __init__(self, strip):
@@ -106,7 +110,7 @@ class Rainbow_Bounce(Animation):
                     self.strip.setPixelColor(i, fade_wheel((i + self.position) & 255))
 
                 self.strip.show()
-                time.sleep(0.05)
+                self.sleep(0.05)
 
                 self.position += self.direction
 
@@ -124,6 +128,7 @@ class Rainbow_Bounce(Animation):
             print(f"Something went wrong: {e}")
             return False
 
+@animation('random_bounce', 'standard', 'Random Bounce', 'Bounce a random color back and forth across the LED strip.')
 class Random_Bounce(Animation):
     """Bounce a random color back and forth across the LED strip."""
     def __init__(self, strip):
@@ -155,7 +160,7 @@ class Random_Bounce(Animation):
                 # Set the current position with the full color
                 self.strip.setPixelColor(self.position, self.color)
                 self.strip.show()
-                time.sleep(0.05)
+                self.sleep(0.05)
 
                 # Fade in the next position
                 next_position = (self.position + self.direction) % num_pixels
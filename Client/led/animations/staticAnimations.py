@@ -1,7 +1,9 @@
 from utils.utils import *
+from led.registry import animation, RGB
 
+@animation('white', 'static', 'White', 'Sets the complete LED-Strip to white')
 class SetWhite(Animation):
-    """Set all pixels to white and halfs the brightness."""
+    """Set all pixels to white and halfs the brightness, unless the power limiter keeps the current within the budget."""
     def __init__(self, strip):
         super().__init__(self._set_white)
         self.strip = strip
@@ -12,12 +14,15 @@ class SetWhite(Animation):
             self.animationStarted = True
             for i in range(self.strip.numPixels()):
                 self.strip.setPixelColor(i, white)
-            self.strip.setBrightness(127)
+            if self.strip.power_limiter is None:
+                self.strip.setBrightness(127)
             self.strip.show()
         except Exception as e:
             print(f"Something went wrong: {e}")
             return False
 
+@animation('custom_color', 'static', 'Custom Color', 'Sets the color of the complete LED Strip',
+           {**RGB})
 class FillColor(Animation):
     """Fills all pixels in a specific color"""
     def __init__(self, strip, red, green, blue):
@@ -29,9 +34,9 @@ class FillColor(Animation):
 
     def _fill_color(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
-                
-                if is_within_range(self.red, 225, 255) and is_within_range(self.green, 225, 255) and is_within_range(self.blue, 225, 255) and self.strip.getBrightness() > 127:
+            if self.valid_rgb(self.red, self.green, self.blue):
+                # Without a power budget (led/power.py) full white is capped at half brightness
+                if self.strip.power_limiter is None and is_within_range(self.red, 225, 255) and is_within_range(self.green, 225, 255) and is_within_range(self.blue, 225, 255) and self.strip.getBrightness() > 127:
                     self.strip.setBrightness(127)
                     self.strip.show()
                 color = Color(self.red, self.green, self.blue)
@@ -45,6 +50,8 @@ class FillColor(Animation):
                 print(f"Something went wrong: {e}")
                 return False
 
+@animation('custom_fill', 'static', 'Custom Fill', 'Fills a certain amount of the pixels with a given color',
+           {**RGB, 'percentage': {'type': 'int', 'min': 0, 'max': 100}})
 class CustomFill(Animation):
     """Fills a certain amount of the pixels with a given color"""
     def __init__(self, strip, red, green, blue, percentage):
@@ -57,7 +64,7 @@ class CustomFill(Animation):
 
     def _custom_fill(self):
         try:
-            if validate_rgb_values(self.red, self.green, self.blue):
+            if self.valid_rgb(self.red, self.green, self.blue):
                 color = Color(self.red, self.green, self.blue)
                 # Calculate the number of pixels to fill based on the percentage
                 num_pixels = int(self.strip.numPixels() * (int(self.percentage) / 100.0))
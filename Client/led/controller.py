@@ -1,37 +1,67 @@
 import threading
 import time
-from rpi_ws281x import *
-from led.animations.staticAnimations import *
-from led.animations.standardAnimations import *
-from led.animations.customAnimations import *
-from led.animations.specialAnimations import *
 
+from led.output import create_strip
+from led.registry import REGISTRY
 from utils.logger import LOGGER
-from utils.sunset_provider import SunsetProvider
+from utils.profiling import PROFILE
+from utils.utils import Animation, Color
+from utils.telemetry import TELEMETRY
+from utils.clock import CLOCK
+from utils.recorder import RECORDER, DEFAULT_DIRECTORY, DEFAULT_MAX_SECONDS
 
 OFFLINE_ERROR = "The LED-Strip is turned OFF!"
 CACHE_FILE = "last_animation_cache.json"
 
 class LEDController():
-    def __init__(self, strip_config, sunset_config):
+    def __init__(self, strip_config, sunset_config, output_config=None, realtime_config=None, audio_config=None, recorder_config=None, power_config=None):
         self.strip_config = strip_config
+        self.recorder_config = recorder_config or {}
 
-        self.strip = Adafruit_NeoPixel(strip_config["LED_COUNT"], strip_config["LED_PIN"], strip_config["LED_FREQ_HZ"], strip_config["LED_DMA"], strip_config["LED_INVERT"], strip_config["LED_BRIGHTNESS"], strip_config["LED_CHANNEL"])
+        # A locally attached ws281x strip, or a pixel node on the network (see led/output.py)
+        self.strip = create_strip(strip_config, output_config, power_config)
         self.strip.begin()
         self.isOnline = False
 
         self.current_animation = None
         self.paused_animation = None
         self.animation_event = threading.Event()
+        self.animation_lock = threading.RLock()
+        self.realtime_source = None  # Protocol of the realtime frames currently shown, see led/realtime.py
+        self.realtime_paused_animation = None
+        self.animation_info = None
+        self.state_listeners = []
+        self.next_start_at = None
+        self.next_normalized = False
 
         # Start with a startup animation and then clearing the strip
         self.run_startup_animation(self.strip_config["LED_BRIGHTNESS"])
         
-        # Start the sunset activation loop in a separate thread
-        sunset_provider = SunsetProvider(sunset_config, self.set_online_state)
-        self.sunset_activation_thread = threading.Thread(target=sunset_provider.auto_activate_and_deactivate)
-        self.sunset_activation_thread.start()
+        # Start the sunset activation loop in a separate thread, it looks up the location and sunset time online
+        self.sunset_activation_thread = None
+        if not sunset_config.get('disable_provider', False):
+            self.sunset_activation_thread = threading.Thread(target=self._run_sunset_provider, args=(sunset_config,))
+            self.sunset_activation_thread.start()
+
+        # Listen for frames of sequencers like xLights, which take priority over the animations
+        self.realtime_receiver = None
+        if realtime_config and realtime_config.get('enabled', False):
+            from led.realtime import RealtimeReceiver
+            self.realtime_receiver = RealtimeReceiver.from_config(self, realtime_config)
+            self.realtime_receiver.start()
+
+        # Source and analysis settings of the audio animations, the analysis only runs while one of them does
+        self.audio_analyzer = None
+        if audio_config:
+            from utils.audio import AUDIO
+            AUDIO.configure(audio_config)
+            self.audio_analyzer = AUDIO
         LOGGER.info("Started LED-Controller")
+
+    def _run_sunset_provider(self, sunset_config):
+        # Imported here, so pytz and requests are only loaded when the provider is enabled
+        from utils.sunset_provider import SunsetProvider
+        SunsetProvider(sunset_config, self.set_online_state).auto_activate_and_deactivate()
         
     def run_startup_animation(self, brightness):
         self.clear_strip()
@@ -48,6 +78,7 @@ class LEDController():
             for i in range(self.strip.numPixels()):
                 self.strip.setPixelColor(i, Color(int(color[0] * brightness), int(color[1] * brightness), int(color[2] * brightness)))
             self.strip.show()
+            PROFILE.mark('first_frame')
             time.sleep(fade_interval)
 
         self.clear_strip()
@@ -61,6 +92,79 @@ class LEDController():
     def get_online_state(self):
         return self.isOnline
 
+    def get_metrics(self):
+        """
+        Returns percentiles of the render loop and command handling timings, the realtime input counters,
+        the audio analysis timings and the estimated current of the power limiter.
+        """
+        metrics = TELEMETRY.get_metrics()
+        if self.realtime_receiver is not None:
+            metrics['realtime'] = self.realtime_receiver.get_stats()
+        if self.audio_analyzer is not None:
+            metrics['audio'] = self.audio_analyzer.get_metrics()
+        if self.strip.power_limiter is not None:
+            metrics['power'] = self.strip.power_limiter.get_metrics()
+        return metrics
+
+    def get_clock(self):
+        """Returns the offset to the shared clock and how late synchronized frames were shown."""
+        return {**CLOCK.get_status(), 'frame_lateness_ms': TELEMETRY.get_lateness()}
+
+    def start_recording(self, max_seconds=None):
+        """
+        Starts recording every frame pushed to the strip, see utils/recorder.py.
+
+        Args:
+            max_seconds (float): Seconds after which the recording stops, defaults to "max_seconds" of the recorder config.
+
+        Returns:
+            dict: Path, frames, dropped frames and bytes of the recording.
+        """
+        return RECORDER.start(
+            self.strip,
+            self.recorder_config.get('directory', DEFAULT_DIRECTORY),
+            max_seconds or self.recorder_config.get('max_seconds', DEFAULT_MAX_SECONDS),
+            {'animation': self.animation_info, 'realtime': self.realtime_source},
+        )
+
+    def stop_recording(self):
+        """Stops the recording and returns its path, frames, dropped frames and bytes."""
+        return RECORDER.stop()
+
+    def set_start_time(self, at):
+        """Schedules the next animation to start at the given time on the shared clock."""
+        self.next_start_at = at
+
+    def set_args_normalized(self, normalized):
+        """Marks the arguments of the next animation as validated and normalized by the server."""
+        self.next_normalized = normalized
+
+    def get_state(self):
+        """Returns the current state of the strip (online state, brightness and animation)."""
+        return {
+            'online': self.isOnline,
+            'brightness': self.strip.getBrightness(),
+            'animation': self.animation_info,
+            'realtime': self.realtime_source,
+        }
+
+    def add_state_listener(self, listener):
+        """Registers a callable that receives the new state whenever it changes."""
+        self.state_listeners.append(listener)
+
+    def _notify_state_change(self):
+        state = self.get_state()
+        for listener in self.state_listeners:
+            try:
+                listener(state)
+            except Exception as e:
+                LOGGER.error(f"Error notifying state listener: {e}")
+
+    def set_animation_info(self, animation_type, animation_name, args=None):
+        """Stores which animation is running, so it can be reported with the state."""
+        self.animation_info = {'type': animation_type, 'animation_name': animation_name, 'args': args or {}}
+        self._notify_state_change()
+
     def set_online_state(self, value: bool):
         """Sets whether or not this device should be considered online by other devices."""
         try:
@@ -70,6 +174,7 @@ class LEDController():
                     self._resume_animation()
                 elif not value and self.paused_animation is None:
                     self._pause_animation()
+                self._notify_state_change()
                 return True
         except Exception as e:
             LOGGER.error("Error setting Online State:", str(e))
@@ -78,6 +183,9 @@ class LEDController():
     def _pause_animation(self):
         self.paused_animation = self.current_animation
         self._stop_current_animation()
+        if self.realtime_source is not None:
+            # The receiver ignores frames while the strip is turned off, the last one is cleared
+            self.clear_strip()
 
     def _resume_animation(self):
         if self.paused_animation is not None:
@@ -93,12 +201,45 @@ class LEDController():
 
     def _start_animation(self, animation: Animation):
         """Starts a new animation after stopping the current animation."""
-        self._stop_current_animation()
-        self.animation_event.wait()  # Wait for animation to stop
-        self.animation_event.clear()  # Reset the event for the next animation
-        self.current_animation = animation
-        animation_thread = threading.Thread(target=self.current_animation.start)
-        animation_thread.start()
+        with self.animation_lock:
+            self._stop_current_animation()
+            self.animation_event.wait()  # Wait for animation to stop
+            self.animation_event.clear()  # Reset the event for the next animation
+            self.current_animation = animation
+            animation_thread = threading.Thread(target=self.current_animation.start)
+            animation_thread.start()
+
+    def start_realtime(self, source):
+        """
+        Pauses the running animation while a realtime source sends frames.
+
+        Args:
+            source (str): Protocol of the frames, reported with the state.
+
+        Returns:
+            bool: False if the strip is turned off, the frames aren't shown then.
+        """
+        with self.animation_lock:
+            if not self.isOnline:
+                return False
+            self.realtime_source = source
+            self.realtime_paused_animation = self.current_animation
+            self._stop_current_animation()
+        self._notify_state_change()
+        return True
+
+    def stop_realtime(self):
+        """Resumes the animation paused for the realtime frames, or the one started while they were shown."""
+        with self.animation_lock:
+            animation, self.realtime_paused_animation = self.realtime_paused_animation, None
+            self.realtime_source = None
+            self.clear_strip()
+            if animation is not None:
+                if self.isOnline:
+                    self._start_animation(animation)
+                else:
+                    self.paused_animation = animation  # Resumed when the strip is turned on
+        self._notify_state_change()
 
     def _is_animation_started(self):
         """Returns True if an animation is currently running."""
@@ -118,6 +259,7 @@ class LEDController():
                 if 0 <= new_brightness <= 255:
                     self.strip.setBrightness(new_brightness)
                     self.strip.show()
+                    self._notify_state_change()
                     return True
                 else:
                     LOGGER.warn("Value not between allowed range")
@@ -129,73 +271,64 @@ class LEDController():
             return False
 
     def _handle_animation(self, animation: Animation):
+        animation.start_at, self.next_start_at = self.next_start_at, None
+        animation.normalized, self.next_normalized = self.next_normalized, False
         if self.isOnline:
-            self._start_animation(animation)
+            with self.animation_lock:
+                if self.realtime_source is not None:
+                    # Started once the realtime frames stop
+                    self.realtime_paused_animation = animation
+                    return True
+                self._start_animation(animation)
             return self._is_animation_started()
         else:
             return OFFLINE_ERROR
 
-    # Static Animations
-    def set_white(self):
-        return self._handle_animation(SetWhite(self.strip))
-
-    def fill_color(self, red, green, blue):
-        return self._handle_animation(FillColor(self.strip, red, green, blue))
-
-    def custom_fill(self, red, green, blue, percentage):
-        return self._handle_animation(CustomFill(self.strip, red, green, blue, percentage))
-
-    # Special Animations
-    def blink(self, red, green, blue, blinking_speed):
-        return self._handle_animation(Blink(self.strip, red, green, blue, blinking_speed))
-
-    def fade(self, from_red, from_green, from_blue, to_red, to_green, to_blue, steps, fading_speed):
-        return self._handle_animation(
-            Fade(self.strip, from_red, from_green, from_blue, to_red, to_green, to_blue, steps, fading_speed))
-
-    def sparkle(self, red, green, blue, sparkle_count):
-        return self._handle_animation(Sparkle(self.strip, red, green, blue, sparkle_count))
-
-    def scanner_effect(self, red, green, blue, scan_speed, tail_length):
-        return self._handle_animation(ScannerEffect(self.strip, red, green, blue, scan_speed, tail_length))
-
-    def yoyo_theater(self, red, green, blue, yoyo_speed):
-        return self._handle_animation(YoyoTheater(self.strip, red, green, blue, yoyo_speed))
-
-    def breathing_effect(self, red, green, blue, breathing_duration):
-        return self._handle_animation(Breathing_Effect(self.strip, red, green, blue, breathing_duration))
-
-    def color_ripple(self, red, green, blue, ripple_speed):
-        return self._handle_animation(Color_Ripple(self.strip, red, green, blue, ripple_speed))
-    
-    # Custom Animations
-    def color_wipe(self, red, green, blue):
-        return self._handle_animation(Color_Wipe(self.strip, red, green, blue))
-
-    def theater_chase(self, red, green, blue):
-        return self._handle_animation(Theater_Chase(self.strip, red, green, blue))
-
-    def strobe(self, red, green, blue):
-        return self._handle_animation(Strobe(self.strip, red, green, blue))
-
-    def color_chase(self, red, green, blue):
-        return self._handle_animation(Color_Chase(self.strip, red, green, blue))
-
-    def custom_rainbow_cycle(self, colors):
-        return self._handle_animation(Custom_Rainbow_Cycle(self.strip, colors))
-    
-    #Standard Animations
-    def rainbow_cycle(self):
-        return self._handle_animation(Rainbow_Cycle(self.strip))
-
-    def rainbow_comet(self):
-        return self._handle_animation(Rainbow_Comet(self.strip))
-
-    def theater_chase_rainbow(self):
-        return self._handle_animation(Theater_Chase_Rainbow(self.strip))
-
-    def rainbow_bounce(self):
-        return self._handle_animation(Rainbow_Bounce(self.strip))
-
-    def random_bounce(self):
-        return self._handle_animation(Random_Bounce(self.strip))
\ No newline at end of file
+    def start_animation(self, category, animation_name, **args):
+        """
+        Starts an animation of the registry, importing its category's module on first use.
+
+        Args:
+            category (str): Category of the animation ('static', 'standard', 'custom', 'special' or 'audio').
+            animation_name (str): Name the animation is registered with.
+            **args: Arguments of the animation.
+
+        Returns:
+            bool or str: Whether the animation started, or OFFLINE_ERROR if the strip is turned off.
+        """
+        entry = REGISTRY.get(category, animation_name)
+        return self._handle_animation(entry.cls(self.strip, **args))
+
+    def update_animation_params(self, params: dict, duration: float = 0):
+        """
+        Changes arguments of the running animation in place, without restarting it (see Animation.update_params()).
+        An animation paused for the realtime input gets them when it resumes.
+
+        Args:
+            params (dict): Arguments of the animation mapped to their new values.
+            duration (float): Seconds to ease numbers to their new values, 0 to change them at the next frame.
+
+        Returns:
+            bool or str: False if no animation runs or it has no such argument, OFFLINE_ERROR if the strip is turned off.
+        """
+        if not self.isOnline:
+            return OFFLINE_ERROR
+        with self.animation_lock:
+            animation = self.current_animation or self.realtime_paused_animation
+            if animation is None or self.animation_info is None:
+                LOGGER.warning("No animation to update")
+                return False
+            entry = REGISTRY.get(self.animation_info['type'], self.animation_info['animation_name'])
+            unknown = [name for name in params if entry is None or name not in entry.schema]
+            if unknown:
+                LOGGER.warning(f"Can't update {', '.join(unknown)} of {self.animation_info['animation_name']}")
+                return False
+            animation.update_params(params, max(0.0, float(duration or 0)))
+        return True
+
+    def get_capabilities(self):
+        """Returns the animations this controller can run and the size of its strip, advertised to the server."""
+        return {
+            'strip': {'led_count': self.strip.numPixels()},
+            'animations': REGISTRY.catalog(),
+        }
@@ -0,0 +1,76 @@
+FRAME_RATE = 60  # Frames per second of the animations rendering into a HighBitFrame, dithering needs the frames repeated
+MAX_VALUE = 0xff00  # 255.0 in 8.8 fixed point
+
+class HighBitFrame:
+    """
+    Frame buffer with 16 bits per color channel (8.8 fixed point), quantized to 8 bits with temporal dithering.
+
+    Animations write channel values between 0 and 255 with fractions, the outputs call quantize() in show().
+    The fraction a channel loses when it is truncated to 8 bits is carried over to the same channel of the next
+    frame, so over a few frames the average matches the 16 bit value and slow fades at low levels don't step.
+
+    Every channel is kept in a 32 bit lane of a bytearray, so quantize() works on all channels at once with
+    the arithmetic of one big integer instead of a loop over the pixels: a lane holds at most 0xff00 * 256
+    while the brightness is applied, so no carry reaches the next lane.
+    """
+
+    def __init__(self, pixels: int):
+        """
+        Initializes a HighBitFrame.
+
+        Args:
+            pixels (int): Number of pixels, 3 channels (RGB) each.
+        """
+        self.count = pixels
+        self.lanes = bytearray(pixels * 3 * 4)  # Little endian lanes: low byte, high byte, 0, 0
+        self._error = 0  # Low bytes of the previous frame's lanes, carried over to the next frame
+        self._lane_mask = int.from_bytes(b'\xff\xff\xff\x00' * (pixels * 3), 'little')
+        self._error_mask = int.from_bytes(b'\xff\x00\x00\x00' * (pixels * 3), 'little')
+
+    def set_pixel(self, n: int, red: float, green: float, blue: float):
+        """Sets a pixel, the channels are between 0 and 255 and may have fractions."""
+        if 0 <= n < self.count:
+            lanes, i = self.lanes, n * 12
+            for value in (red, green, blue):
+                value = min(MAX_VALUE, max(0, int(value * 256 + 0.5)))
+                lanes[i] = value & 0xff
+                lanes[i + 1] = value >> 8
+                i += 4
+
+    def fill(self, red: float, green: float, blue: float):
+        """Sets all pixels to one color."""
+        lane = bytearray(12)
+        for i, value in enumerate((red, green, blue)):
+            value = min(MAX_VALUE, max(0, int(value * 256 + 0.5)))
+            lane[i * 4] = value & 0xff
+            lane[i * 4 + 1] = value >> 8
+        self.lanes[:] = lane * self.count
+
+    def preview(self) -> bytes:
+        """Returns the frame truncated to 8 bits without dithering, 3 bytes (RGB) per pixel, e.g. for the power limiter."""
+        return bytes(self.lanes[1::4])
+
+    def quantize(self, brightness: int = 255) -> bytes:
+        """
+        Returns the next frame, 3 bytes (RGB) per pixel, and carries the truncated fractions over to the frame after it.
+
+        Args:
+            brightness (int): Brightness between 0 and 255, applied to the 16 bit values like the ws281x library
+                applies it to 8 bit values, so the fractions it produces are dithered too.
+        """
+        values = int.from_bytes(self.lanes, 'little')
+        if brightness < 255:
+            # The low byte of the lane above that the shift brings in is masked out
+            values = ((values * (brightness + 1)) >> 8) & self._lane_mask
+        values += self._error
+        self._error = values & self._error_mask
+        return values.to_bytes(len(self.lanes), 'little')[1::4]
+
+def attach_high_bit_frame(strip) -> HighBitFrame:
+    """Returns a HighBitFrame the strip shows instead of its pixels until detach_high_bit_frame() is called."""
+    strip.high_bit_frame = HighBitFrame(strip.numPixels())
+    return strip.high_bit_frame
+
+def detach_high_bit_frame(strip):
+    """Lets the strip show its own pixels again."""
+    strip.high_bit_frame = None
@@ -0,0 +1,39 @@
+import importlib
+
+from led.power import PowerLimiter
+from utils.logger import LOGGER
+
+# Strip classes by output type, as (module, class). The module is only imported for the configured output,
+# so a controller driving a network pixel node doesn't need the rpi_ws281x library.
+OUTPUT_TYPES = {
+    'ws281x': ('led.outputs.ws281xOutput', 'TimedNeoPixel'),
+    'ddp': ('led.outputs.networkOutputs', 'DDPStrip'),
+    'e131': ('led.outputs.networkOutputs', 'E131Strip'),
+    'artnet': ('led.outputs.networkOutputs', 'ArtNetStrip'),
+}
+DEFAULT_OUTPUT_TYPE = 'ws281x'
+
+def create_strip(strip_config: dict, output_config: dict = None, power_config: dict = None):
+    """
+    Creates the strip the animations are rendered to, with the interface of rpi_ws281x.Adafruit_NeoPixel.
+
+    Args:
+        strip_config (dict): The "strip" section of the config (LED_COUNT, LED_BRIGHTNESS, ...).
+        output_config (dict): The "output" section of the config, with the output type and its options.
+        power_config (dict): The "power" section of the config, the budget of the power supply.
+
+    Returns:
+        The strip, not yet started with begin().
+    """
+    output_config = output_config or {}
+    output_type = output_config.get('type', DEFAULT_OUTPUT_TYPE)
+    if output_type not in OUTPUT_TYPES:
+        raise ValueError(f"Unknown output type '{output_type}', expected one of: {', '.join(OUTPUT_TYPES)}")
+    module_name, class_name = OUTPUT_TYPES[output_type]
+    strip_class = getattr(importlib.import_module(module_name), class_name)
+    LOGGER.info(f"Using the {output_type} output")
+    strip = strip_class.from_config(strip_config, output_config)
+    strip.power_limiter = PowerLimiter.from_config(power_config, strip.frame_format, strip.numPixels())
+    if strip.power_limiter is not None:
+        LOGGER.info(f"Limiting the LEDs to {strip.power_limiter.max_current_ma} mA")
+    return strip
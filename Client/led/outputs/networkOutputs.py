@@ -0,0 +1,267 @@
+import functools
+import socket
+import struct
+import time
+import uuid
+
+from utils.logger import LOGGER
+from utils.telemetry import TELEMETRY
+from utils.recorder import RECORDER
+
+PIXEL_SIZE = 3  # RGB bytes per pixel
+
+DDP_PORT = 4048
+DDP_MAX_DATA = 1440  # 480 RGB pixels, keeps packets below the Ethernet MTU
+DDP_VERSION = 0x40
+DDP_PUSH = 0x01
+DDP_TYPE_RGB8 = 0x0B
+DDP_DESTINATION_DISPLAY = 0x01
+
+E131_PORT = 5568
+E131_HEADER_SIZE = 126
+E131_SEQUENCE_OFFSET = 111
+E131_DEFAULT_PRIORITY = 100
+
+ARTNET_PORT = 6454
+ARTNET_HEADER_SIZE = 18
+ARTNET_SEQUENCE_OFFSET = 12
+ARTNET_OPCODE_DMX = 0x5000
+ARTNET_PROTOCOL_VERSION = 14
+
+DMX_PIXELS_PER_UNIVERSE = 170  # 510 of the 512 channels, so no pixel is split across two universes
+DEFAULT_SOURCE_NAME = "LED-Controller"
+
+@functools.lru_cache(maxsize=256)
+def brightness_table(brightness: int) -> bytes:
+    """Translation table scaling a channel value like the ws281x library does: (value * (brightness + 1)) >> 8."""
+    return bytes((value * (brightness + 1)) >> 8 for value in range(256))
+
+class NetworkPixelStrip:
+    """
+    Strip on a network pixel node, with the interface of rpi_ws281x.Adafruit_NeoPixel.
+
+    Pixels are kept in a bytearray frame buffer, 3 bytes (RGB) per pixel. The packets are built once in
+    begin(): each is a list of buffers, a prebuilt header and a view into the frame, which the kernel
+    gathers into one datagram. show() only updates the sequence numbers in the headers, applies the
+    brightness if it isn't full and sends one sendmsg per packet, without copying the frame.
+    """
+    default_port = None
+    sequence_offset = None  # Offset of the sequence number in the header
+    max_sequence = 255
+    even_length = False  # Pad packets with an odd number of channels
+    requires_host = True
+    config_options = ()  # Protocol specific keys of the output config, passed to the constructor
+    frame_format = 'rgb'  # Pixel format of get_frame(), see utils/recorder.py
+    power_limiter = None  # led/power.py, set by create_strip() if a power budget is configured
+    high_bit_frame = None  # led/dither.py, shown instead of the frame buffer while an animation renders into it
+
+    def __init__(self, num: int, host: str, port: int = None, brightness: int = 255):
+        """
+        Initializes a NetworkPixelStrip.
+
+        Args:
+            num (int): Number of pixels.
+            host (str): Address of the pixel node.
+            port (int): UDP port of the pixel node, defaults to the protocol's port.
+            brightness (int): Brightness between 0 and 255, applied when a frame is sent.
+        """
+        if host is None and self.requires_host:
+            raise ValueError(f"The {type(self).__name__} output needs the host of the pixel node")
+        self.count = num
+        self.host = host
+        self.port = port or self.default_port
+        self.frame = bytearray(num * PIXEL_SIZE)
+        self._scaled = bytearray(len(self.frame))  # frame with the brightness applied
+        self._packets = []  # (buffers with the frame, buffers with the scaled frame, address)
+        self._headers = []
+        self.sequence = 0
+        self.socket = None
+        self.send_errors = 0
+        self._failing = False
+        self.setBrightness(brightness)
+
+    @classmethod
+    def from_config(cls, strip_config, output_config):
+        options = {key: output_config[key] for key in cls.config_options if key in output_config}
+        return cls(strip_config["LED_COUNT"], output_config.get("host"), output_config.get("port"), strip_config["LED_BRIGHTNESS"], **options)
+
+    def _layout(self):
+        """Returns the packets of a frame as (header, start, end, address), start and end are offsets into the frame."""
+        raise NotImplementedError
+
+    def begin(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)  # The host may be a broadcast address
+        self._packets, self._headers = [], []
+        for header, start, end, address in self._layout():
+            # The padding byte of an odd channel count is sent as a buffer of its own
+            padding = (b'\x00',) if self.even_length and (end - start) % 2 else ()
+            self._packets.append((
+                [header, memoryview(self.frame)[start:end], *padding],
+                [header, memoryview(self._scaled)[start:end], *padding],
+                address,
+            ))
+            self._headers.append(header)
+        LOGGER.info(f"Sending {self.count} pixels to {self.host}:{self.port} in {len(self._packets)} packets per frame")
+
+    def numPixels(self):
+        return self.count
+
+    def setPixelColor(self, n, color):
+        if 0 <= n < self.count:
+            frame, i = self.frame, n * PIXEL_SIZE
+            frame[i] = (color >> 16) & 0xff
+            frame[i + 1] = (color >> 8) & 0xff
+            frame[i + 2] = color & 0xff
+
+    def getPixelColor(self, n):
+        i = n * PIXEL_SIZE
+        return (self.frame[i] << 16) | (self.frame[i + 1] << 8) | self.frame[i + 2]
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def get_frame(self) -> bytes:
+        """Returns a copy of the frame buffer, 3 bytes (RGB) per pixel without the brightness applied."""
+        return bytes(self.frame)
+
+    def show(self):
+        start = time.perf_counter()
+        brightness = self.brightness
+        if self.high_bit_frame is not None:
+            if self.power_limiter is not None:
+                brightness = self.power_limiter.limit(self.high_bit_frame.preview(), brightness)
+            # Dithered with the brightness applied, sent as it is
+            self.frame[:] = self.high_bit_frame.quantize(brightness)
+            brightness = 255
+        elif self.power_limiter is not None:
+            brightness = self.power_limiter.limit(self.frame, brightness)
+        if RECORDER.active:
+            RECORDER.capture(self, brightness)
+        if brightness == 255:
+            buffers = 0
+        else:
+            self._scaled[:] = self.frame.translate(brightness_table(brightness))
+            buffers = 1
+        self.sequence = self.sequence % self.max_sequence + 1
+        for header in self._headers:
+            header[self.sequence_offset] = self.sequence
+        send = self.socket.sendmsg
+        try:
+            for packet in self._packets:
+                send(packet[buffers], (), 0, packet[2])
+            if self._failing:
+                self._failing = False
+                LOGGER.info(f"Sending frames to {self.host}:{self.port} works again")
+        except OSError as e:
+            # Logged once per outage, a missing node would otherwise log every frame
+            self.send_errors += 1
+            if not self._failing:
+                self._failing = True
+                LOGGER.warning(f"Could not send frame to {self.host}:{self.port}: {e}")
+        TELEMETRY.record_show(time.perf_counter() - start)
+
+class DDPStrip(NetworkPixelStrip):
+    """
+    Distributed Display Protocol output. The frame is sent as consecutive chunks of up to 480 pixels
+    with their offset in the frame; the last packet has the push flag, so the node shows the whole frame at once.
+    """
+    default_port = DDP_PORT
+    sequence_offset = 1
+    max_sequence = 15  # DDP sequence numbers are 4 bits, 0 means unused
+
+    def _layout(self):
+        address = (self.host, self.port)
+        size = len(self.frame)
+        packets = []
+        for start in range(0, size, DDP_MAX_DATA):
+            end = min(start + DDP_MAX_DATA, size)
+            flags = DDP_VERSION | (DDP_PUSH if end == size else 0)
+            header = bytearray(struct.pack('!BBBBIH', flags, 0, DDP_TYPE_RGB8, DDP_DESTINATION_DISPLAY, start, end - start))
+            packets.append((header, start, end, address))
+        return packets
+
+class _DMXStrip(NetworkPixelStrip):
+    """Base of the DMX protocols, which split the frame into universes of up to 170 pixels."""
+    config_options = ('universe', 'pixels_per_universe')
+    first_universe = 1
+
+    def __init__(self, num: int, host: str, port: int = None, brightness: int = 255, universe: int = None, pixels_per_universe: int = DMX_PIXELS_PER_UNIVERSE):
+        """
+        Args:
+            universe (int): Universe of the first pixel, the following universes are numbered consecutively.
+            pixels_per_universe (int): Pixels per universe, at most 170.
+        """
+        super().__init__(num, host, port, brightness)
+        if not 1 <= pixels_per_universe <= DMX_PIXELS_PER_UNIVERSE:
+            raise ValueError(f"pixels_per_universe must be between 1 and {DMX_PIXELS_PER_UNIVERSE}")
+        self.universe = self.first_universe if universe is None else universe
+        self.pixels_per_universe = pixels_per_universe
+
+    def _universe_address(self, universe):
+        return (self.host, self.port)
+
+    def _header(self, universe, length):
+        raise NotImplementedError
+
+    def _layout(self):
+        size = len(self.frame)
+        step = self.pixels_per_universe * PIXEL_SIZE
+        packets = []
+        for index, start in enumerate(range(0, size, step)):
+            end = min(start + step, size)
+            universe = self.universe + index
+            packets.append((self._header(universe, end - start), start, end, self._universe_address(universe)))
+        return packets
+
+class E131Strip(_DMXStrip):
+    """
+    E1.31 (streaming ACN) output. Without a host every universe is sent to its multicast group 239.255.<universe>.
+    """
+    default_port = E131_PORT
+    sequence_offset = E131_SEQUENCE_OFFSET
+    requires_host = False
+    config_options = _DMXStrip.config_options + ('priority', 'source_name')
+
+    def __init__(self, num: int, host: str = None, port: int = None, brightness: int = 255, priority: int = E131_DEFAULT_PRIORITY, source_name: str = DEFAULT_SOURCE_NAME, **options):
+        """
+        Args:
+            priority (int): Priority of this source between 0 and 200, receivers show the source with the highest one.
+            source_name (str): Name of this source shown by receivers.
+        """
+        super().__init__(num, host, port, brightness, **options)
+        self.priority = priority
+        self.source_name = source_name.encode('utf-8')[:63]
+        self.cid = uuid.uuid4().bytes  # Identifies this source to the receivers
+
+    def _universe_address(self, universe):
+        if self.host:
+            return (self.host, self.port)
+        return (f"239.255.{(universe >> 8) & 0xff}.{universe & 0xff}", self.port)
+
+    def _header(self, universe, length):
+        header = bytearray(E131_HEADER_SIZE)
+        # Root layer
+        struct.pack_into('!HH12sHI16s', header, 0, 0x0010, 0, b'ASC-E1.17\x00\x00\x00', 0x7000 | (E131_HEADER_SIZE - 16 + length), 0x00000004, self.cid)
+        # Framing layer: vector, source name, priority, sync address, sequence, options, universe
+        struct.pack_into('!HI64sBHBBH', header, 38, 0x7000 | (E131_HEADER_SIZE - 38 + length), 0x00000002, self.source_name, self.priority, 0, 0, 0, universe)
+        # DMP layer: vector, address and data type, first address, increment, value count (start code + channels), start code
+        struct.pack_into('!HBBHHHB', header, 115, 0x7000 | (E131_HEADER_SIZE - 115 + length), 0x02, 0xa1, 0x0000, 0x0001, length + 1, 0x00)
+        return header
+
+class ArtNetStrip(_DMXStrip):
+    """Art-Net output (ArtDmx packets). Universes are 15 bit port addresses: net, sub-net and universe."""
+    default_port = ARTNET_PORT
+    sequence_offset = ARTNET_SEQUENCE_OFFSET
+    even_length = True  # ArtDmx requires an even number of channels
+    first_universe = 0
+
+    def _header(self, universe, length):
+        header = bytearray(ARTNET_HEADER_SIZE)
+        struct.pack_into('<8sH', header, 0, b'Art-Net\x00', ARTNET_OPCODE_DMX)
+        # Protocol version, sequence, physical port, SubUni, Net and the even channel count
+        struct.pack_into('!HBBBBH', header, 10, ARTNET_PROTOCOL_VERSION, 0, 0, universe & 0xff, (universe >> 8) & 0x7f, length + length % 2)
+        return header
@@ -0,0 +1,71 @@
+import sys
+import time
+from array import array
+from rpi_ws281x import Adafruit_NeoPixel
+
+from utils.telemetry import TELEMETRY
+from utils.recorder import RECORDER
+
+# Byte of a native 32 bit 0x00RRGGBB color that holds red, green and blue
+COLOR_BYTES = (2, 1, 0) if sys.byteorder == 'little' else (1, 2, 3)
+
+class TimedNeoPixel(Adafruit_NeoPixel):
+    """NeoPixel strip that records how long pushing each frame to the LEDs takes."""
+    frame_format = 'wrgb'  # Pixel format of get_frame(), see utils/recorder.py
+    power_limiter = None  # led/power.py, set by create_strip() if a power budget is configured
+    high_bit_frame = None  # led/dither.py, shown instead of the pixels while an animation renders into it
+
+    def __init__(self, num, pin, freq_hz, dma, invert, brightness, channel):
+        super().__init__(num, pin, freq_hz, dma, invert, brightness, channel)
+        self.brightness = brightness  # Requested brightness, the power limiter may show a frame darker
+        self._colors = bytearray(num * 4)  # Colors of a dithered frame, filled from RGB with slice copies
+
+    @classmethod
+    def from_config(cls, strip_config, output_config):
+        return cls(strip_config["LED_COUNT"], strip_config["LED_PIN"], strip_config["LED_FREQ_HZ"], strip_config["LED_DMA"], strip_config["LED_INVERT"], strip_config["LED_BRIGHTNESS"], strip_config["LED_CHANNEL"])
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+        super().setBrightness(brightness)
+
+    def getBrightness(self):
+        return self.brightness
+
+    def get_frame(self) -> bytes:
+        """Returns the 32 bit colors of all pixels without the brightness applied."""
+        return array('I', self.getPixels()[:]).tobytes()
+
+    def _to_colors(self, rgb) -> array:
+        """Converts a frame of 3 bytes (RGB) per pixel to 32 bit colors."""
+        colors = self._colors
+        red, green, blue = COLOR_BYTES
+        colors[red::4] = rgb[0::3]
+        colors[green::4] = rgb[1::3]
+        colors[blue::4] = rgb[2::3]
+        return array('I', colors)
+
+    def _set_high_bit_frame(self, brightness):
+        """Sets the pixels to the dithered high bit frame with the brightness applied, returns the frame."""
+        if self.power_limiter is not None:
+            brightness = self.power_limiter.limit(self._to_colors(self.high_bit_frame.preview()).tobytes(), brightness)
+        colors = self._to_colors(self.high_bit_frame.quantize(brightness))
+        set_pixel = super().setPixelColor
+        for i, color in enumerate(colors):
+            set_pixel(i, color)
+        return colors.tobytes()
+
+    def show(self):
+        start = time.perf_counter()
+        brightness, frame = self.brightness, None
+        if self.high_bit_frame is not None:
+            frame = self._set_high_bit_frame(brightness)
+            brightness = 255  # Already applied to the dithered frame
+        elif self.power_limiter is not None:
+            frame = self.get_frame()
+            brightness = self.power_limiter.limit(frame, self.brightness)
+        # The library applies the brightness while rendering, getBrightness() still returns the requested one
+        super().setBrightness(brightness)
+        if RECORDER.active:
+            RECORDER.capture(self, brightness, frame)
+        super().show()
+        TELEMETRY.record_show(time.perf_counter() - start)
@@ -0,0 +1,115 @@
+import time
+
+from utils.telemetry import RingBuffer, summarize, DEFAULT_WINDOW_SECONDS
+
+DEFAULT_CHANNEL_CURRENT_MA = 20  # Per color channel of a WS2812 LED at full value
+DEFAULT_IDLE_CURRENT_MA = 1  # Per LED while it is dark
+DEFAULT_RELEASE_SECONDS = 0.5  # Time constant of the brightness recovering after a limited frame
+
+# Frame formats of the outputs (see get_frame()) as (bytes per pixel, offsets of the red, green, blue and white bytes)
+CHANNEL_LAYOUTS = {
+    'rgb': (3, (0, 1, 2)),
+    'wrgb': (4, (2, 1, 0, 3)),  # 32 bit colors, little endian
+}
+
+class PowerLimiter:
+    """
+    Keeps the estimated current of every frame within the budget of the power supply by lowering the brightness it is shown with.
+
+    The current is estimated from the sum of every color channel over the frame, times the current of that
+    channel at full value, scaled by the brightness like the ws281x library does, plus the idle current of
+    every LED. A frame over the budget is shown with the highest brightness that fits right away; afterwards
+    the brightness recovers with a time constant, so frames alternating around the budget don't flicker.
+    The requested brightness of the strip is never changed.
+    """
+
+    def __init__(self, frame_format: str, pixels: int, max_current_ma: float, channel_current_ma=DEFAULT_CHANNEL_CURRENT_MA,
+                 idle_current_ma: float = DEFAULT_IDLE_CURRENT_MA, release_seconds: float = DEFAULT_RELEASE_SECONDS):
+        """
+        Initializes a PowerLimiter.
+
+        Args:
+            frame_format (str): Format of the frames of the strip, 'rgb' or 'wrgb'.
+            pixels (int): Number of LEDs.
+            max_current_ma (float): Current the power supply can deliver to the LEDs, in mA.
+            channel_current_ma (float or list): Current of a channel at full value, one value for all or one per channel (red, green, blue[, white]).
+            idle_current_ma (float): Current of a dark LED.
+            release_seconds (float): Time constant of the brightness recovering after a limited frame.
+        """
+        self.stride, offsets = CHANNEL_LAYOUTS[frame_format]
+        if isinstance(channel_current_ma, (int, float)):
+            channel_current_ma = [channel_current_ma] * len(offsets)
+        # (offset, mA per unit of channel value at full brightness)
+        self.channels = [(offset, current / 255) for offset, current in zip(offsets, channel_current_ma)]
+        # With the same current for every channel, the sum of the whole frame is enough
+        self.uniform_current = self.channels[0][1] if len({current for _, current in self.channels}) == 1 else None
+        self.max_current_ma = max_current_ma
+        self.idle_current_ma = idle_current_ma * pixels
+        self.release_seconds = release_seconds
+        self.allowed_brightness = 255.0  # Smoothed brightness limit
+        self.last_frame = None
+        self.frames = 0
+        self.limited_frames = 0
+        self.requested_current = RingBuffer()  # mA of the frames at the requested brightness
+        self.shown_current = RingBuffer()  # mA of the frames as shown
+
+    @classmethod
+    def from_config(cls, power_config: dict, frame_format: str, pixels: int):
+        """Creates the limiter of the "power" section of the config, or returns None if it sets no max_current_ma."""
+        if not power_config or not power_config.get('max_current_ma'):
+            return None
+        return cls(
+            frame_format, pixels, power_config['max_current_ma'],
+            power_config.get('channel_current_ma', DEFAULT_CHANNEL_CURRENT_MA),
+            power_config.get('idle_current_ma', DEFAULT_IDLE_CURRENT_MA),
+            power_config.get('release_seconds', DEFAULT_RELEASE_SECONDS),
+        )
+
+    def limit(self, frame, brightness: int) -> int:
+        """
+        Returns the brightness to show a frame with.
+
+        Args:
+            frame (bytes): The frame without the brightness applied, in the frame format of the strip.
+            brightness (int): The requested brightness of the strip.
+        """
+        # Summing bytes runs in C, a few microseconds for a few hundred pixels
+        if self.uniform_current is not None:
+            full_current = sum(frame) * self.uniform_current
+        else:
+            stride = self.stride
+            full_current = sum(sum(frame[offset::stride]) * current for offset, current in self.channels)
+        now = time.perf_counter()
+
+        # Highest brightness within the budget; the ws281x library scales values by (brightness + 1) / 256
+        available = self.max_current_ma - self.idle_current_ma
+        if full_current <= 0:
+            fitting = 255.0
+        else:
+            fitting = min(255.0, max(0.0, available * 256 / full_current - 1))
+        if fitting < self.allowed_brightness or self.last_frame is None:
+            self.allowed_brightness = fitting
+        else:
+            # Recovers exponentially towards what fits this frame
+            step = min(1.0, (now - self.last_frame) / self.release_seconds)
+            self.allowed_brightness += (fitting - self.allowed_brightness) * step
+        self.last_frame = now
+
+        shown = min(brightness, int(self.allowed_brightness))
+        self.frames += 1
+        if shown < brightness and full_current > 0:
+            self.limited_frames += 1
+        self.requested_current.record(self.idle_current_ma + full_current * (brightness + 1) / 256, now)
+        self.shown_current.record(self.idle_current_ma + full_current * (shown + 1) / 256, now)
+        return shown
+
+    def get_metrics(self, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> dict:
+        """Returns the budget, percentiles of the estimated current in mA as requested and as shown, and how many frames were limited."""
+        start = time.perf_counter() - window_seconds
+        return {
+            'max_current_ma': self.max_current_ma,
+            'estimated_current_ma': summarize(self.shown_current.since(start), scale=1),
+            'requested_current_ma': summarize(self.requested_current.since(start), scale=1),
+            'frames': self.frames,
+            'limited_frames': self.limited_frames,
+        }
@@ -0,0 +1,288 @@
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from utils.logger import LOGGER
+from utils.telemetry import RingBuffer, summarize, DEFAULT_WINDOW_SECONDS
+
+PIXEL_SIZE = 3  # RGB bytes per pixel
+MAX_PACKET_SIZE = 1500
+
+DDP_PORT = 4048
+DDP_HEADER_SIZE = 10
+DDP_TIMECODE_SIZE = 4
+DDP_FLAG_TIMECODE = 0x10
+DDP_FLAG_QUERY = 0x02
+DDP_FLAG_PUSH = 0x01
+DDP_DESTINATION_DISPLAY = 0x01
+DDP_DESTINATION_ALL = 0xff
+
+E131_PORT = 5568
+E131_HEADER_SIZE = 126
+E131_OPTION_PREVIEW = 0x80
+E131_OPTION_TERMINATED = 0x40
+E131_VECTOR_ROOT_DATA = 0x00000004
+E131_VECTOR_DATA = 0x00000002
+DMX_PIXELS_PER_UNIVERSE = 170
+
+DEFAULT_TIMEOUT = 2.5  # Seconds without packets until the animation resumes
+
+# Byte of a native 32 bit 0x00RRGGBB color that holds red, green and blue
+COLOR_BYTES = (2, 1, 0) if sys.byteorder == 'little' else (1, 2, 3)
+
+class RealtimeReceiver:
+    """
+    Receives frames sent by sequencers such as xLights or Vixen over DDP or E1.31 and shows them on the strip.
+
+    While packets arrive the frames take priority over the running animation, which the controller pauses;
+    when no packet arrived for the timeout (or an E1.31 source terminates its stream) the animation resumes.
+
+    Packets are received into one preallocated buffer and their payload is copied from a view of it straight
+    into the strip's frame buffer (network outputs), or converted to colors with slice copies for the ws281x strip.
+    A frame is shown on the DDP push flag, or when the last universe of the strip arrived with E1.31.
+    """
+
+    def __init__(self, led_controller, protocol: str = 'ddp', port: int = None, universe: int = 1,
+                 pixels_per_universe: int = DMX_PIXELS_PER_UNIVERSE, timeout: float = DEFAULT_TIMEOUT, multicast: bool = True):
+        """
+        Initializes a RealtimeReceiver.
+
+        Args:
+            led_controller (LEDController): Controller whose strip shows the frames.
+            protocol (str): 'ddp' or 'e131'.
+            port (int): UDP port to listen on, defaults to the protocol's port.
+            universe (int): E1.31 universe of the first pixel.
+            pixels_per_universe (int): Pixels per E1.31 universe, at most 170.
+            timeout (float): Seconds without packets after which the animation resumes.
+            multicast (bool): Join the E1.31 multicast groups of the strip's universes.
+        """
+        if protocol not in ('ddp', 'e131'):
+            raise ValueError(f"Unknown realtime protocol '{protocol}', expected 'ddp' or 'e131'")
+        if not 1 <= pixels_per_universe <= DMX_PIXELS_PER_UNIVERSE:
+            raise ValueError(f"pixels_per_universe must be between 1 and {DMX_PIXELS_PER_UNIVERSE}")
+        self.led_controller = led_controller
+        self.strip = led_controller.strip
+        self.protocol = protocol
+        self.port = port or (DDP_PORT if protocol == 'ddp' else E131_PORT)
+        self.universe = universe
+        self.pixels_per_universe = pixels_per_universe
+        self.timeout = timeout
+        self.multicast = multicast
+
+        self.frame_size = self.strip.numPixels() * PIXEL_SIZE
+        self.universe_count = -(-self.strip.numPixels() // pixels_per_universe)
+        self.last_universe = universe + self.universe_count - 1
+        self._packet = bytearray(MAX_PACKET_SIZE)
+        self._view = memoryview(self._packet)
+        # Network strips expose their frame buffer, which the payloads are copied into directly
+        self._frame = getattr(self.strip, 'frame', None)
+        if self._frame is None:
+            # 0x00RRGGBB colors as native 32 bit integers, filled from the RGB payload with slice copies
+            self._colors = bytearray(self.strip.numPixels() * 4)
+        self._sequences = {}  # E1.31 universe -> last sequence number
+        self._expected_offset = 0  # where the next packet of the current frame should start
+        self._ddp_packet_size = 1  # largest DDP payload seen, to estimate how many packets a gap lost
+        self._frame_started = None  # perf_counter of the first packet of the current frame
+        self._last_received = 0.0  # perf_counter of the last packet that was shown or buffered
+
+        self.active = False
+        self.socket = None
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        self.packets = 0
+        self.frames = 0
+        self.lost_packets = 0
+        self.out_of_order = 0
+        self.ignored_packets = 0
+        self.frame_latency = RingBuffer()  # first packet of a frame until it was shown
+        self.frame_interval = RingBuffer()
+        self._last_frame = None
+
+    @classmethod
+    def from_config(cls, led_controller, realtime_config: dict):
+        options = {key: realtime_config[key] for key in ('protocol', 'port', 'universe', 'pixels_per_universe', 'timeout', 'multicast') if key in realtime_config}
+        return cls(led_controller, **options)
+
+    def start(self):
+        """Binds the UDP port and starts receiving in a daemon thread."""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        self.socket.bind(('0.0.0.0', self.port))
+        if self.protocol == 'e131' and self.multicast:
+            self._join_multicast_groups()
+        self.socket.settimeout(self.timeout)
+        self.thread = threading.Thread(target=self._run, name="realtime-receiver", daemon=True)
+        self.thread.start()
+        LOGGER.info(f"Listening for {self.protocol.upper()} frames on UDP port {self.port}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self.socket is not None:
+            self.socket.close()
+        if self.thread is not None:
+            self.thread.join()
+        self._leave()
+
+    def _join_multicast_groups(self):
+        for universe in range(self.universe, self.last_universe + 1):
+            group = socket.inet_aton(f"239.255.{(universe >> 8) & 0xff}.{universe & 0xff}")
+            try:
+                self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, group + socket.inet_aton('0.0.0.0'))
+            except OSError as e:
+                LOGGER.warning(f"Could not join the multicast group of universe {universe}, only unicast E1.31 is received: {e}")
+                return
+
+    def _run(self):
+        handle = self._handle_ddp if self.protocol == 'ddp' else self._handle_e131
+        receive = self.socket.recv_into
+        while not self._stop_event.is_set():
+            try:
+                size = receive(self._packet)
+            except socket.timeout:
+                self._leave()
+                continue
+            except OSError:
+                break  # closed by stop()
+            self.packets += 1
+            try:
+                handle(size)
+            except Exception as e:
+                self.ignored_packets += 1
+                LOGGER.error(f"Error handling realtime packet: {e}")
+            if self.active and time.perf_counter() - self._last_received > self.timeout:
+                self._leave()  # Only packets for other universes or devices kept arriving
+
+    def _enter(self):
+        """Pauses the animation when the first packet arrives. Returns False if the strip is turned off."""
+        if not self.active:
+            if not self.led_controller.start_realtime(self.protocol):
+                return False
+            self.active = True
+            LOGGER.info(f"Receiving {self.protocol.upper()} frames, pausing the animation")
+            return True
+        return self.led_controller.isOnline
+
+    def _leave(self):
+        if self.active:
+            self.active = False
+            self._frame_started = None
+            self._sequences.clear()
+            self._expected_offset = 0
+            self.led_controller.stop_realtime()
+            LOGGER.info(f"{self.protocol.upper()} frames stopped, resuming the animation")
+
+    def _handle_ddp(self, size):
+        packet = self._packet
+        if size < DDP_HEADER_SIZE:
+            self.ignored_packets += 1
+            return
+        flags, sequence, _, destination, offset, length = struct.unpack_from('!BBBBIH', packet)
+        if flags & DDP_FLAG_QUERY or destination not in (DDP_DESTINATION_DISPLAY, DDP_DESTINATION_ALL):
+            self.ignored_packets += 1  # Status and config queries aren't answered
+            return
+        start = DDP_HEADER_SIZE + (DDP_TIMECODE_SIZE if flags & DDP_FLAG_TIMECODE else 0)
+        length = min(length, size - start)
+        # Senders number either packets or frames, so losses are detected from gaps in the offsets instead
+        expected = self._expected_offset
+        self._ddp_packet_size = max(self._ddp_packet_size, length)
+        if offset > expected:
+            self.lost_packets += -(-(offset - expected) // self._ddp_packet_size)
+        elif offset < expected:
+            self.lost_packets += 1  # A new frame began, the push packet of the last one was lost
+        self._receive(offset, start, length, flags & DDP_FLAG_PUSH)
+
+    def _handle_e131(self, size):
+        packet = self._packet
+        if size < E131_HEADER_SIZE or packet[4:16] != b'ASC-E1.17\x00\x00\x00' or struct.unpack_from('!I', packet, 18)[0] != E131_VECTOR_ROOT_DATA \
+                or struct.unpack_from('!I', packet, 40)[0] != E131_VECTOR_DATA:
+            self.ignored_packets += 1  # Also skips universe discovery and synchronization packets
+            return
+        sequence, options, universe = struct.unpack_from('!BBH', packet, 111)
+        if options & E131_OPTION_TERMINATED:
+            self._leave()
+            return
+        if options & E131_OPTION_PREVIEW or packet[125] != 0 or not self.universe <= universe <= self.last_universe:
+            self.ignored_packets += 1  # Preview data, other start codes (e.g. per channel priorities) or other universes
+            return
+        last = self._sequences.get(universe)
+        if last is not None:
+            difference = (sequence - last) & 0xff
+            if difference == 0 or difference > 236:
+                # E1.31 receivers discard packets up to 20 sequence numbers behind the last one
+                self.out_of_order += 1
+                return
+            self.lost_packets += difference - 1
+        self._sequences[universe] = sequence
+        count = struct.unpack_from('!H', packet, 123)[0] - 1
+        offset = (universe - self.universe) * self.pixels_per_universe * PIXEL_SIZE
+        self._receive(offset, E131_HEADER_SIZE, min(count, size - E131_HEADER_SIZE, self.pixels_per_universe * PIXEL_SIZE), universe == self.last_universe)
+
+    def _receive(self, offset, start, length, push):
+        """Copies the payload packet[start:start + length] to the pixels at byte offset, and shows the frame on push."""
+        # The animation is stopped before the first payload is copied, stopping it clears the strip
+        if not self._enter():
+            self.ignored_packets += 1
+            return
+        self._last_received = time.perf_counter()
+        if offset < self._expected_offset:
+            self._frame_started = None  # The last frame wasn't complete, this packet starts a new one
+        self._expected_offset = 0 if push else offset + length
+        if self._frame_started is None:
+            self._frame_started = self._last_received
+        length = min(length, self.frame_size - offset)
+        if length > 0:
+            if self._frame is not None:
+                self._frame[offset:offset + length] = self._view[start:start + length]
+            elif offset % PIXEL_SIZE == 0:
+                self._set_colors(offset // PIXEL_SIZE, self._view[start:start + length - length % PIXEL_SIZE])
+            else:
+                self.ignored_packets += 1  # Not aligned to a pixel
+        if push:
+            self._show()
+
+    def _set_colors(self, first_pixel, data):
+        """Sets the pixels of an RGB payload on a strip without a frame buffer."""
+        pixels = len(data) // PIXEL_SIZE
+        colors = self._colors
+        end = (first_pixel + pixels) * 4
+        start = first_pixel * 4
+        red, green, blue = COLOR_BYTES
+        colors[start + red:end:4] = data[0::3]
+        colors[start + green:end:4] = data[1::3]
+        colors[start + blue:end:4] = data[2::3]
+        set_pixel = self.strip.setPixelColor
+        for i, color in enumerate(array('I', colors[start:end]), first_pixel):
+            set_pixel(i, color)
+
+    def _show(self):
+        self.strip.show()
+        now = time.perf_counter()
+        self.frame_latency.record(now - self._frame_started, now)
+        if self._last_frame is not None:
+            self.frame_interval.record(now - self._last_frame, now)
+        self._last_frame = now
+        self._frame_started = None
+        self.frames += 1
+
+    def get_stats(self, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> dict:
+        """Returns the packet counters and the frame latency and interval percentiles of the last window_seconds."""
+        start = time.perf_counter() - window_seconds
+        intervals = self.frame_interval.since(start)
+        return {
+            'protocol': self.protocol,
+            'port': self.port,
+            'active': self.active,
+            'packets': self.packets,
+            'frames': self.frames,
+            'lost_packets': self.lost_packets,
+            'out_of_order_packets': self.out_of_order,
+            'ignored_packets': self.ignored_packets,
+            'fps': round(len(intervals) / sum(intervals), 1) if intervals else 0,
+            'frame_latency_ms': summarize(self.frame_latency.since(start)),
+            'frame_interval_ms': summarize(intervals),
+        }
@@ -0,0 +1,105 @@
+import importlib
+import threading
+
+from utils.logger import LOGGER
+
+# Modules of the animation categories. A module is imported the first time one of its animations is needed,
+# its animations register themselves with the @animation decorator.
+CATEGORY_MODULES = {
+    'static': 'led.animations.staticAnimations',
+    'standard': 'led.animations.standardAnimations',
+    'custom': 'led.animations.customAnimations',
+    'special': 'led.animations.specialAnimations',
+    'audio': 'led.animations.audioAnimations',
+}
+
+# Argument schemas, in the format of the server's utils/schema.py. These and the schemas of the animations are the
+# definitions the server validates with; its api/config.py only keeps a copy for clients that advertise no catalog.
+CHANNEL = {'type': 'int', 'min': 0, 'max': 255}
+COLOR = {'type': 'list', 'items': CHANNEL, 'min_length': 3, 'max_length': 3}
+RGB = {'red': CHANNEL, 'green': CHANNEL, 'blue': CHANNEL}
+FROM_RGB = {'from_red': CHANNEL, 'from_green': CHANNEL, 'from_blue': CHANNEL}
+TO_RGB = {'to_red': CHANNEL, 'to_green': CHANNEL, 'to_blue': CHANNEL}
+# Speeds are steps per second, animations wait 1 / speed seconds between steps
+SPEED = {'type': 'int', 'min': 1, 'max': 1000}
+
+class AnimationEntry:
+    """An animation class with the metadata the server shows in its catalog."""
+    __slots__ = ('cls', 'animation_name', 'category', 'name', 'description', 'schema')
+
+    def __init__(self, cls, animation_name, category, name, description, schema):
+        self.cls = cls
+        self.animation_name = animation_name
+        self.category = category
+        self.name = name
+        self.description = description
+        self.schema = schema
+
+    def describe(self) -> dict:
+        """Returns the catalog entry advertised to the server."""
+        return {
+            'name': self.name,
+            'animation_name': self.animation_name,
+            'description': self.description,
+            'args': list(self.schema),
+            'schema': self.schema,
+        }
+
+class AnimationRegistry:
+    """
+    Animations by category and name, registered with the @animation decorator of their module.
+    """
+
+    def __init__(self, category_modules: dict):
+        self.category_modules = category_modules
+        self.animations = {category: {} for category in category_modules}
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+    def register(self, entry: AnimationEntry):
+        if entry.category not in self.animations:
+            raise ValueError(f"Unknown animation category: {entry.category}")
+        self.animations[entry.category][entry.animation_name] = entry
+
+    def _load(self, category: str):
+        """Imports the module of a category, unless it already was."""
+        if category in self._loaded:
+            return
+        with self._lock:
+            if category not in self._loaded:
+                importlib.import_module(self.category_modules[category])
+                self._loaded.add(category)
+                LOGGER.info(f"Loaded {len(self.animations[category])} {category} animations")
+
+    def get(self, category: str, animation_name: str) -> AnimationEntry:
+        """Returns the entry of an animation, or None if there is no such animation."""
+        if category not in self.category_modules:
+            return None
+        self._load(category)
+        return self.animations[category].get(animation_name)
+
+    def catalog(self) -> dict:
+        """Returns the catalog entries of all animations by category, which loads every category."""
+        catalog = {}
+        for category in self.category_modules:
+            self._load(category)
+            catalog[category] = {name: entry.describe() for name, entry in self.animations[category].items()}
+        return catalog
+
+REGISTRY = AnimationRegistry(CATEGORY_MODULES)
+
+def animation(animation_name: str, category: str, name: str, description: str, schema: dict = None):
+    """
+    Class decorator registering an animation.
+
+    Args:
+        animation_name (str): Name the server starts the animation with.
+        category (str): One of the keys of CATEGORY_MODULES.
+        name (str): Display name.
+        description (str): Description shown in the GUI.
+        schema (dict): Argument names mapped to their types and ranges, in the order of the constructor.
+    """
+    def register(cls):
+        REGISTRY.register(AnimationEntry(cls, animation_name, category, name, description, schema or {}))
+        return cls
+    return register
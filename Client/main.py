@@ -1,12 +1,19 @@
 import os
+import sys
 import json
 import asyncio
 import argparse
-from led.controller import LEDController
-from websocket.websocket_handler import WebSocketHandlerClient
+from utils.profiling import PROFILE
+
+if '--profile-startup' in sys.argv:
+    # Enabled before importing the rest of the client, so its imports show up in the profile
+    PROFILE.enable()
 
+from led.controller import LEDController
 from utils.logger import LOGGER
 
+DEFAULT_PROFILE_SECONDS = 60
+
 def load_config():
     """
     Load configuration from the 'config.json' file located in the same directory as this script.
@@ -17,17 +24,25 @@ def load_config():
     with open(config_path, 'r') as file:
         return json.load(file)
 
-async def main(name=None):
+async def main(name=None, profile_seconds=DEFAULT_PROFILE_SECONDS):
     """
     Main function to initialize and run the LED controller and WebSocket handler.
     """
     try:
+        PROFILE.mark('imports_done')
+        if PROFILE.enabled:
+            # The profile is taken once the client has connected and settled
+            asyncio.get_running_loop().call_later(profile_seconds, PROFILE.write_report)
+
         config = load_config()
 
         strip_config = config["strip"]
         sunset_config = config["sunset_provider"]
-        led_controller = LEDController(strip_config, sunset_config)
-        
+        led_controller = LEDController(strip_config, sunset_config, config.get("output"), config.get("realtime"), config.get("audio"), config.get("recorder"), config.get("power"))
+        PROFILE.mark('controller_ready')
+
+        # Imported after the startup animation, the strip shouldn't wait for the websocket library
+        from websocket.websocket_handler import WebSocketHandlerClient
         wbs_config = config["websocket"]
         wbs_handler = WebSocketHandlerClient(name, wbs_config["server_address"], wbs_config["server_port"], led_controller)
         await wbs_handler.connect()
@@ -38,8 +53,10 @@ async def main(name=None):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="LED Controller with WebSocket Handler")
     parser.add_argument("--name", help="Specify a name for the WebSocket handler")
+    parser.add_argument("--profile-startup", action="store_true", help="Write a startup profile (import times, milestones, memory) to logs/startup_profile.json")
+    parser.add_argument("--profile-seconds", type=float, default=DEFAULT_PROFILE_SECONDS, help="Seconds after start at which the profile is taken")
 
     args = parser.parse_args()
 
     # Create an event loop and run the main coroutine, passing the 'name' argument
-    asyncio.run(main(name=args.name))
+    asyncio.run(main(name=args.name, profile_seconds=args.profile_seconds))
@@ -0,0 +1,145 @@
+"""
+Replays a frame recording (see utils/recorder.py) and prints its frame time statistics as JSON.
+
+The statistics are computed from the recorded timestamps: frames, frame rate, intervals between frames,
+stalls (intervals longer than twice the median, like the dropped frames of the render telemetry), repeated
+frames that changed no pixel, pixels changed per frame and the compressed bytes per frame.
+
+The frames are played onto a virtual strip by default, which only keeps the pixels. With --output they are
+shown on the strip of the client's config.json ('config'), or on a pixel node ('ddp', 'e131' or 'artnet'
+with --host), at the recorded pace or faster with --speed; --no-wait skips the pacing altogether.
+
+Usage (from the Client directory):
+    python replay.py recordings/20240101-200000.ledrec
+    python replay.py recordings/20240101-200000.ledrec --output ddp --host 192.168.2.50 --speed 0.5
+"""
+import argparse
+import json
+import statistics
+import time
+from array import array
+
+from led.output import create_strip
+from utils.recorder import Recording
+from utils.telemetry import summarize
+from main import load_config
+
+class VirtualStrip:
+    """Strip that keeps the pixels in memory, show() does nothing."""
+    frame_format = 'wrgb'
+
+    def __init__(self, num):
+        self.pixels = [0] * num
+        self.brightness = 255
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def show(self):
+        pass
+
+def decode_colors(frame, pixel_format):
+    """Returns the 32 bit colors of a recorded frame."""
+    if pixel_format == 'wrgb':
+        return array('I', frame).tolist()
+    return [(frame[i] << 16) | (frame[i + 1] << 8) | frame[i + 2] for i in range(0, len(frame), 3)]
+
+def open_strip(args, pixels):
+    if args.output == 'virtual':
+        return VirtualStrip(pixels)
+    if args.output == 'config':
+        config = load_config()
+        strip = create_strip(config['strip'], config.get('output'))
+    else:
+        strip_config = {'LED_COUNT': pixels, 'LED_BRIGHTNESS': 255}
+        strip = create_strip(strip_config, {'type': args.output, 'host': args.host, 'port': args.port})
+    strip.begin()
+    return strip
+
+def replay(recording, strip, speed, wait):
+    """Shows the frames on the strip, returns how late each frame was shown in seconds."""
+    pixel_format = recording.header['pixel_format']
+    # A network strip with the recorded pixel format takes the frame as it is
+    copy_frame = getattr(strip, 'frame_format', None) == pixel_format and hasattr(strip, 'frame')
+    pixels = min(strip.numPixels(), recording.header['pixels'])
+    brightness = None
+    lateness = []
+    start = time.perf_counter()
+    for offset, frame_brightness, frame in recording:
+        if frame_brightness != brightness:
+            brightness = frame_brightness
+            strip.setBrightness(brightness)
+        if copy_frame:
+            length = min(len(strip.frame), len(frame))
+            strip.frame[:length] = frame[:length]
+        else:
+            colors = decode_colors(frame, pixel_format)
+            for i in range(pixels):
+                strip.setPixelColor(i, colors[i])
+        if wait:
+            due = start + offset / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lateness.append(time.perf_counter() - due)
+        strip.show()
+    return lateness
+
+def analyze(recording):
+    """Returns the frame time statistics of a recording."""
+    times, changed = [], []
+    repeated = 0
+    previous = None
+    pixel_size = 4 if recording.header['pixel_format'] == 'wrgb' else 3
+    for offset, _, frame in recording:
+        times.append(offset)
+        if previous is not None:
+            count = sum(frame[i:i + pixel_size] != previous[i:i + pixel_size] for i in range(0, len(frame), pixel_size))
+            changed.append(count)
+            repeated += count == 0
+        previous = frame
+    intervals = [b - a for a, b in zip(times, times[1:])]
+    median = statistics.median(intervals) if intervals else 0
+    duration = times[-1] - times[0] if len(times) > 1 else 0
+    return {
+        'path': recording.path,
+        'pixels': recording.header['pixels'],
+        'pixel_format': recording.header['pixel_format'],
+        'metadata': recording.header['metadata'],
+        'frames': len(times),
+        'duration_s': round(duration, 3),
+        'fps': round((len(times) - 1) / duration, 1) if duration else None,
+        'interval_ms': summarize(intervals),
+        'jitter_ms': round(statistics.pstdev(intervals) * 1000, 3) if intervals else None,
+        'stalls': sum(interval > 2 * median for interval in intervals),
+        'repeated_frames': repeated,
+        'changed_pixels_per_frame': round(sum(changed) / len(changed), 1) if changed else None,
+        'bytes_per_frame': round(recording.size / len(times), 1) if times else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a frame recording and print its frame time statistics")
+    parser.add_argument("path", help="Recording file")
+    parser.add_argument("--output", default='virtual', choices=['virtual', 'config', 'ddp', 'e131', 'artnet'], help="Strip to play the frames on")
+    parser.add_argument("--host", help="Pixel node of the ddp, e131 and artnet outputs")
+    parser.add_argument("--port", type=int, help="UDP port of the pixel node, defaults to the protocol's port")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed, 2 plays twice as fast")
+    parser.add_argument("--no-wait", action='store_true', help="Play the frames as fast as possible")
+    args = parser.parse_args()
+
+    recording = Recording(args.path)
+    result = analyze(recording)
+    strip = open_strip(args, recording.header['pixels'])
+    lateness = replay(recording, strip, args.speed, not args.no_wait)
+    if lateness:
+        result['replay_lateness_ms'] = summarize(lateness)
+    print(json.dumps(result, indent=4))
@@ -0,0 +1,119 @@
+"""
+Benchmark of the audio analysis (utils/audio.py) and the audio animations on a generated WAV file.
+
+The WAV file holds a kick drum at --bpm over a chord and noise. Every audio animation runs for --duration
+seconds on a strip of --pixels pixels whose show() does nothing, while the analysis plays the file in real time.
+The beats detected are compared with the kicks played, and the analysis latency (from a block being read until
+its features were published), the CPU time per analyzed block and per rendered frame and the achieved frame
+rate are printed as JSON.
+
+Usage (from the Client directory, NumPy has to be installed):
+    python tests/benchmarkAudioAnalysis.py --pixels 300 --duration 10 --bpm 120
+"""
+import argparse
+import json
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.registry import REGISTRY
+from utils.audio import AUDIO
+from utils.telemetry import TELEMETRY
+
+ANIMATIONS = {
+    'spectrum_bars': {},
+    'beat_pulse': {'red': 255, 'green': 0, 'blue': 0},
+    'energy_rainbow': {},
+}
+SAMPLE_RATE = 44100
+
+class PixelStrip:
+    """Strip with the pixel interface of the ws281x strip, show() does nothing."""
+
+    def __init__(self, num):
+        self.pixels = [0] * num
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def show(self):
+        pass
+
+def write_wav(path, duration, bpm, seed):
+    """Writes a mono 16 bit WAV file with a kick on every beat over a quiet chord and noise."""
+    random.seed(seed)
+    beat_samples = int(SAMPLE_RATE * 60 / bpm)
+    frames = bytearray()
+    for n in range(int(duration * SAMPLE_RATE)):
+        t = n / SAMPLE_RATE
+        since_beat = (n % beat_samples) / SAMPLE_RATE
+        kick = math.sin(2 * math.pi * 55 * since_beat) * math.exp(-since_beat * 12)
+        chord = sum(math.sin(2 * math.pi * f * t) for f in (440, 554, 659)) / 3
+        value = 0.6 * kick + 0.1 * chord + 0.02 * random.uniform(-1, 1)
+        frames += struct.pack('<h', int(max(-1, min(1, value)) * 32767))
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        file.writeframes(bytes(frames))
+
+def run(animation_name, path, args):
+    AUDIO.configure({'source': {'type': 'wav', 'path': path}, 'frame_rate': args.fps})
+    strip = PixelStrip(args.pixels)
+    animation = REGISTRY.get('audio', animation_name).cls(strip, **ANIMATIONS[animation_name])
+    AUDIO.acquire()  # Keeps the analysis running after the animation stopped, until its counters were read
+    TELEMETRY.reset_frame()
+    blocks_before = AUDIO.blocks
+    start = time.perf_counter()
+    frames = 0
+    show = strip.show
+
+    def counting_show():
+        nonlocal frames
+        frames += 1
+        show()
+    strip.show = counting_show
+
+    thread = threading.Thread(target=animation.start)
+    thread.start()
+    time.sleep(args.duration)
+    features = AUDIO.features
+    animation.stopAnimation = True
+    thread.join()
+    elapsed = time.perf_counter() - start
+    metrics = AUDIO.get_metrics(window_seconds=args.duration)
+    AUDIO.release()
+    return {
+        'animation': animation_name,
+        'pixels': args.pixels,
+        'fps': round(frames / elapsed, 1),
+        'blocks': AUDIO.blocks - blocks_before,
+        'beats_played': int(args.duration * args.bpm / 60) + 1,
+        'beats_detected': features.beat_count,
+        **{key: metrics[key] for key in ('block_ms', 'analysis_latency_ms', 'analysis_cpu_ms', 'render_cpu_ms')},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the audio analysis and the audio animations")
+    parser.add_argument("--animations", nargs="+", default=list(ANIMATIONS), choices=list(ANIMATIONS), help="Animations to benchmark")
+    parser.add_argument("--pixels", type=int, default=300, help="Pixels of the strip")
+    parser.add_argument("--fps", type=int, default=60, help="Frame rate of the animations")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per animation")
+    parser.add_argument("--bpm", type=float, default=120, help="Beats per minute of the generated kick drum")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the noise")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'beats.wav')
+        write_wav(path, args.duration + 1, args.bpm, args.seed)
+        print(json.dumps([run(name, path, args) for name in args.animations], indent=4))
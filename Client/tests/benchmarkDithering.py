@@ -0,0 +1,114 @@
+"""
+Benchmark of the high bit depth frames with temporal dithering (led/dither.py).
+
+A slow fade from dark to --level over --duration seconds is rendered at --fps on --pixels pixels, once into
+the 8 bit pixels of the strip (truncated like the old Fade did) and once into a HighBitFrame. The time
+show() takes with either is compared with the frame budget of the frame rate, on a DDP strip (sent to a port
+nobody listens on) and, if the rpi_ws281x library can be imported, on a ws281x strip. The time quantize()
+takes on its own is measured at full and at half brightness.
+
+For the quality, the frames of one pixel are averaged over --window frames and compared with the level the
+fade had: truncation is off by up to one step and holds every level for a while, dithering follows the fade.
+The timings in ms, the share of the frame budget and the errors are printed as JSON.
+
+Usage (from the Client directory):
+    python tests/benchmarkDithering.py --pixels 1000 --fps 60 --duration 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.dither import HighBitFrame, attach_high_bit_frame, detach_high_bit_frame
+from led.outputs.networkOutputs import DDPStrip
+from utils.telemetry import summarize
+from utils.utils import Color
+
+COLOR = (1.0, 0.5, 0.25)  # Channels relative to the level
+
+def open_strips(pixels):
+    strips = {'ddp': DDPStrip(pixels, '127.0.0.1', 9)}
+    try:
+        from led.outputs.ws281xOutput import TimedNeoPixel
+        strips['ws281x'] = TimedNeoPixel(pixels, 18, 800000, 10, False, 255, 0)
+    except ImportError:
+        pass
+    for strip in strips.values():
+        strip.begin()
+    return strips
+
+def play(strip, high_bit, args):
+    """Renders the fade at the frame rate, returns the durations of show() and the levels of the first pixel's red channel."""
+    frames = int(args.fps * args.duration)
+    frame = attach_high_bit_frame(strip) if high_bit else None
+    show_times, shown = [], []
+    interval = 1 / args.fps
+    deadline = time.perf_counter()
+    try:
+        for i in range(frames):
+            level = args.level * i / frames
+            red, green, blue = (level * channel for channel in COLOR)
+            if frame is not None:
+                frame.fill(red, green, blue)
+            else:
+                color = Color(int(red), int(green), int(blue))
+                for n in range(strip.numPixels()):
+                    strip.setPixelColor(n, color)
+            start = time.perf_counter()
+            strip.show()
+            show_times.append(time.perf_counter() - start)
+            shown.append(strip.getPixelColor(0) >> 16)
+            deadline += interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        detach_high_bit_frame(strip)
+    return show_times, shown
+
+def window_error(shown, args):
+    """Largest difference between the average of --window frames and the average level of the fade over them."""
+    frames = len(shown)
+    targets = [args.level * COLOR[0] * i / frames for i in range(frames)]
+    window = args.window
+    return round(max(abs(sum(shown[i:i + window]) - sum(targets[i:i + window])) / window for i in range(frames - window)), 3)
+
+def time_quantize(args):
+    frame = HighBitFrame(args.pixels)
+    frame.fill(*(args.level * channel for channel in COLOR))
+    results = {}
+    for brightness in (255, 128):
+        times = []
+        for _ in range(int(args.fps * args.duration)):
+            start = time.perf_counter()
+            frame.quantize(brightness)
+            times.append(time.perf_counter() - start)
+        results[f'quantize_ms_brightness_{brightness}'] = summarize(times)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the high bit depth frames with temporal dithering")
+    parser.add_argument("--pixels", type=int, default=1000, help="Pixels per frame")
+    parser.add_argument("--fps", type=float, default=60, help="Frames per second")
+    parser.add_argument("--duration", type=float, default=3, help="Seconds of the fade")
+    parser.add_argument("--level", type=float, default=8, help="Level of the brightest channel at the end of the fade")
+    parser.add_argument("--window", type=int, default=8, help="Frames averaged for the error")
+    args = parser.parse_args()
+    budget = 1 / args.fps
+    results = {'pixels': args.pixels, 'frame_budget_ms': round(budget * 1000, 3), **time_quantize(args), 'strips': []}
+    for name, strip in open_strips(args.pixels).items():
+        truncated_times, truncated = play(strip, False, args)
+        dithered_times, dithered = play(strip, True, args)
+        truncated_show, dithered_show = summarize(truncated_times), summarize(dithered_times)
+        results['strips'].append({
+            'strip': name,
+            'show_ms': truncated_show,
+            'show_dithered_ms': dithered_show,
+            'extra_budget_share_p99': round((dithered_show['p99'] - truncated_show['p50']) / (budget * 1000), 4),
+            'truncated_window_error': window_error(truncated, args),
+            'dithered_window_error': window_error(dithered, args),
+        })
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,123 @@
+"""
+Benchmark of the frame recorder (utils/recorder.py).
+
+For every pattern, frames of --pixels pixels are rendered at --fps for --duration seconds on a DDP strip
+(RGB frames, sent to a port nobody listens on) and on a strip with the 32 bit colors of the ws281x library.
+Each run is repeated without recording, so the time show() takes with and without capturing the frame can be
+compared. The recording is read back and compared with the frames that were rendered. The overhead per show(),
+the bytes per frame and the compression ratio are printed as JSON.
+
+Patterns: 'static' (one color, like the static animations), 'chase' (a few moving pixels) and 'rainbow'
+(every pixel changes every frame).
+
+Usage (from the Client directory):
+    python tests/benchmarkFrameRecorder.py --pixels 300 --fps 60 --duration 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.outputs.networkOutputs import DDPStrip
+from utils.recorder import RECORDER, Recording
+from utils.telemetry import summarize
+from utils.utils import wheel
+
+PATTERNS = ('static', 'chase', 'rainbow')
+
+class ColorStrip:
+    """Strip keeping 32 bit colors like the ws281x library, show() only captures the frame."""
+    frame_format = 'wrgb'
+
+    def __init__(self, num):
+        self.pixels = [0] * num
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def getBrightness(self):
+        return 255
+
+    def get_frame(self):
+        return array('I', self.pixels[:]).tobytes()
+
+    def show(self):
+        if RECORDER.active:
+            RECORDER.capture(self, 255)
+
+def render(strip, pattern, step):
+    num = strip.numPixels()
+    if pattern == 'static':
+        for i in range(num):
+            strip.setPixelColor(i, 0x2040ff)
+    elif pattern == 'chase':
+        for i in range(num):
+            strip.setPixelColor(i, 0xff0000 if (i + step) % 50 < 3 else 0)
+    else:
+        for i in range(num):
+            strip.setPixelColor(i, wheel((i + step) & 255))
+
+def play(strip, pattern, args, frames=None):
+    """Renders the frames at the frame rate, returns the durations of show()."""
+    show_times = []
+    interval = 1 / args.fps
+    deadline = start = time.perf_counter()
+    step = 0
+    while time.perf_counter() - start < args.duration:
+        render(strip, pattern, step)
+        if frames is not None:
+            frames.append(strip.get_frame())
+        show_start = time.perf_counter()
+        strip.show()
+        show_times.append(time.perf_counter() - show_start)
+        step += 1
+        deadline += interval
+        now = time.perf_counter()
+        if deadline > now:
+            time.sleep(deadline - now)
+    return show_times
+
+def run(strip_kind, pattern, directory, args):
+    strip = DDPStrip(args.pixels, '127.0.0.1', 9) if strip_kind == 'ddp' else ColorStrip(args.pixels)
+    strip.begin()
+    baseline = play(strip, pattern, args)
+    frames = []
+    RECORDER.start(strip, directory, max_seconds=None)
+    recorded = play(strip, pattern, args, frames)
+    status = RECORDER.stop()
+    replayed = [frame for _, _, frame in Recording(status['path'])]
+    raw_size = len(frames) * len(frames[0])
+    return {
+        'strip': strip_kind,
+        'pattern': pattern,
+        'pixels': args.pixels,
+        'show_ms': summarize(baseline),
+        'show_recording_ms': summarize(recorded),
+        'frames': status['frames'],
+        'dropped_frames': status['dropped_frames'],
+        'bytes_per_frame': round(status['bytes'] / status['frames'], 1),
+        'compression_ratio': round(raw_size / status['bytes'], 1),
+        'replay_matches': replayed == frames,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the frame recorder")
+    parser.add_argument("--patterns", nargs="+", default=list(PATTERNS), choices=list(PATTERNS), help="Patterns to record")
+    parser.add_argument("--pixels", type=int, default=300, help="Pixels per frame")
+    parser.add_argument("--fps", type=float, default=60, help="Frames per second")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per run")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        results = [run(strip_kind, pattern, directory, args) for strip_kind in ('ddp', 'ws281x') for pattern in args.patterns]
+    print(json.dumps(results, indent=4))
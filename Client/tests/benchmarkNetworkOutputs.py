@@ -0,0 +1,147 @@
+"""
+Benchmark of the network pixel outputs (DDP, E1.31 and Art-Net) against a loopback UDP receiver.
+
+For every protocol a frame of --pixels pixels is rendered and sent at --fps for --duration seconds.
+A receiver process parses the packets like a pixel node would: it checks the headers, reassembles
+the frames from their chunks or universes and counts complete frames. At the end the last frame it
+reassembled is compared with the last frame that was sent. The time show() takes, the achieved frame
+rate and the packets and frames received are printed as JSON.
+
+Usage (from the Client directory):
+    python tests/benchmarkNetworkOutputs.py --pixels 2040 --fps 60 --duration 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.outputs.networkOutputs import DDPStrip, E131Strip, ArtNetStrip, PIXEL_SIZE, DMX_PIXELS_PER_UNIVERSE
+from utils.telemetry import summarize
+
+PROTOCOLS = {'ddp': DDPStrip, 'e131': E131Strip, 'artnet': ArtNetStrip}
+STOP_PACKET = b'stop'
+
+def parse_packet(protocol, packet):
+    """Returns (sequence, offset into the frame, pixel data, end of frame) of a packet, raises ValueError if it is malformed."""
+    if protocol == 'ddp':
+        flags, sequence, data_type, _, offset, length = struct.unpack_from('!BBBBIH', packet)
+        if flags & 0xc0 != 0x40 or data_type != 0x0B or len(packet) != 10 + length:
+            raise ValueError('bad DDP header')
+        return sequence, offset, packet[10:], bool(flags & 0x01)
+    if protocol == 'e131':
+        if packet[4:16] != b'ASC-E1.17\x00\x00\x00' or packet[125] != 0:
+            raise ValueError('bad E1.31 header')
+        root_length = struct.unpack_from('!H', packet, 16)[0] & 0x0fff
+        count = struct.unpack_from('!H', packet, 123)[0] - 1
+        universe = struct.unpack_from('!H', packet, 113)[0]
+        if root_length != len(packet) - 16 or len(packet) != 126 + count:
+            raise ValueError('bad E1.31 length')
+        return packet[111], (universe - 1) * DMX_PIXELS_PER_UNIVERSE * PIXEL_SIZE, packet[126:], None
+    if packet[:8] != b'Art-Net\x00' or struct.unpack_from('<H', packet, 8)[0] != 0x5000:
+        raise ValueError('bad Art-Net header')
+    length = struct.unpack_from('!H', packet, 16)[0]
+    universe = packet[14] | (packet[15] << 8)
+    if length % 2 or len(packet) != 18 + length:
+        raise ValueError('bad Art-Net length')
+    return packet[12], universe * DMX_PIXELS_PER_UNIVERSE * PIXEL_SIZE, packet[18:], None
+
+def receive(protocol, frame_size, port_queue, result_queue):
+    """Runs in the receiver process until the stop packet arrives."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+    sock.bind(('127.0.0.1', 0))
+    port_queue.put(sock.getsockname()[1])
+
+    frame = bytearray(frame_size)
+    last_frame = None
+    packets = errors = frames = 0
+    received = 0  # bytes of the current frame
+    current_sequence = None
+    while True:
+        packet = sock.recv(65536)
+        if packet == STOP_PACKET:
+            break
+        packets += 1
+        try:
+            sequence, offset, data, end_of_frame = parse_packet(protocol, packet)
+        except (ValueError, struct.error):
+            errors += 1
+            continue
+        if sequence != current_sequence:
+            current_sequence, received = sequence, 0
+        data = data[:frame_size - offset]  # drops the Art-Net padding byte
+        frame[offset:offset + len(data)] = data
+        received += len(data)
+        if end_of_frame or (end_of_frame is None and received == frame_size):
+            if received == frame_size:
+                frames += 1
+                last_frame = bytes(frame)
+            received = 0
+    result_queue.put({'packets': packets, 'errors': errors, 'frames': frames, 'last_frame': last_frame})
+
+def render(strip, step):
+    for i in range(strip.numPixels()):
+        value = (i + step) & 0xff
+        strip.setPixelColor(i, (value << 16) | ((255 - value) << 8) | (value ^ 0x55))
+
+def run_protocol(protocol, args):
+    port_queue, result_queue = multiprocessing.Queue(), multiprocessing.Queue()
+    receiver = multiprocessing.Process(target=receive, args=(protocol, args.pixels * PIXEL_SIZE, port_queue, result_queue))
+    receiver.start()
+    port = port_queue.get(timeout=10)
+
+    strip = PROTOCOLS[protocol](args.pixels, '127.0.0.1', port, 255)
+    strip.begin()
+    interval = 1 / args.fps
+    show_times, render_times = [], []
+    start = time.perf_counter()
+    deadline = start
+    step = 0
+    while time.perf_counter() - start < args.duration:
+        render_start = time.perf_counter()
+        render(strip, step)
+        show_start = time.perf_counter()
+        strip.show()
+        show_end = time.perf_counter()
+        render_times.append(show_start - render_start)
+        show_times.append(show_end - show_start)
+        step += 1
+        deadline += interval
+        if deadline > show_end:
+            time.sleep(deadline - show_end)
+    elapsed = time.perf_counter() - start
+
+    # Lets the receiver drain its buffer before it is told to stop
+    time.sleep(0.2)
+    strip.socket.sendto(STOP_PACKET, ('127.0.0.1', port))
+    result = result_queue.get(timeout=10)
+    receiver.join()
+    return {
+        'protocol': protocol,
+        'pixels': args.pixels,
+        'packets_per_frame': len(strip._packets),
+        'frames_sent': step,
+        'fps': round(step / elapsed, 1),
+        'show_ms': summarize(show_times),
+        'render_ms': summarize(render_times),
+        'packets_received': result['packets'],
+        'packets_lost': step * len(strip._packets) - result['packets'],
+        'malformed_packets': result['errors'],
+        'frames_received': result['frames'],
+        'last_frame_matches': result['last_frame'] == bytes(strip.frame),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the network pixel outputs against a loopback receiver")
+    parser.add_argument("--protocols", nargs="+", default=list(PROTOCOLS), choices=list(PROTOCOLS), help="Protocols to benchmark")
+    parser.add_argument("--pixels", type=int, default=2040, help="Pixels per frame")
+    parser.add_argument("--fps", type=float, default=60, help="Frames per second")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per protocol")
+    args = parser.parse_args()
+    print(json.dumps([run_protocol(protocol, args) for protocol in args.protocols], indent=4))
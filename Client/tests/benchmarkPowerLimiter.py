@@ -0,0 +1,82 @@
+"""
+Benchmark of the power limiter (led/power.py).
+
+For every pattern, frames of --pixels pixels are limited to --max-current-ma for --duration seconds at --fps,
+once as RGB frames (network outputs) and once as 32 bit colors (ws281x). The time limit() takes per frame,
+the estimated current as requested and as shown, the brightness the frames were shown with and how much it
+changed between consecutive frames (flicker) are printed as JSON.
+
+Patterns: 'white' (all pixels full white), 'rainbow' (a scrolling rainbow), 'partial' (10 % of the pixels
+white, which needs no limiting) and 'blink' (full white and dark in turns, the limit must not follow the dark frames).
+
+Usage (from the Client directory):
+    python tests/benchmarkPowerLimiter.py --pixels 300 --max-current-ma 4000 --fps 60 --duration 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.power import PowerLimiter
+from utils.telemetry import summarize
+from utils.utils import wheel
+
+PATTERNS = ('white', 'rainbow', 'partial', 'blink')
+
+def colors(pattern, pixels, step):
+    if pattern == 'white' or (pattern == 'blink' and step % 2 == 0):
+        return [0xffffff] * pixels
+    if pattern == 'blink':
+        return [0] * pixels
+    if pattern == 'partial':
+        return [0xffffff if i < pixels // 10 else 0 for i in range(pixels)]
+    return [int(wheel((i + step) & 255)) for i in range(pixels)]
+
+def encode(frame_format, frame_colors):
+    if frame_format == 'wrgb':
+        return array('I', frame_colors).tobytes()
+    return bytes(channel for color in frame_colors for channel in ((color >> 16) & 0xff, (color >> 8) & 0xff, color & 0xff))
+
+def run(frame_format, pattern, args):
+    limiter = PowerLimiter(frame_format, args.pixels, args.max_current_ma)
+    # Frames are prepared up front, so only limit() is timed
+    frames = [encode(frame_format, colors(pattern, args.pixels, step)) for step in range(int(args.fps * args.duration))]
+    limit_times, shown = [], []
+    interval = 1 / args.fps
+    deadline = time.perf_counter()
+    for frame in frames:
+        start = time.perf_counter()
+        shown.append(limiter.limit(frame, args.brightness))
+        limit_times.append(time.perf_counter() - start)
+        deadline += interval
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    metrics = limiter.get_metrics()
+    lit = shown[::2] if pattern == 'blink' else shown  # The dark frames of blink need no limit
+    return {
+        'frame_format': frame_format,
+        'pattern': pattern,
+        'pixels': args.pixels,
+        'limit_ms': summarize(limit_times),
+        'requested_current_ma': metrics['requested_current_ma'],
+        'estimated_current_ma': metrics['estimated_current_ma'],
+        'limited_frames': metrics['limited_frames'],
+        'shown_brightness': {'min': min(lit), 'max': max(lit)},
+        'max_brightness_change': max((abs(b - a) for a, b in zip(lit, lit[1:])), default=0),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the power limiter")
+    parser.add_argument("--patterns", nargs="+", default=list(PATTERNS), choices=list(PATTERNS), help="Patterns to limit")
+    parser.add_argument("--pixels", type=int, default=300, help="Pixels per frame")
+    parser.add_argument("--max-current-ma", type=float, default=4000, help="Budget of the power supply in mA")
+    parser.add_argument("--brightness", type=int, default=255, help="Requested brightness")
+    parser.add_argument("--fps", type=float, default=60, help="Frames per second")
+    parser.add_argument("--duration", type=float, default=3, help="Seconds per run")
+    args = parser.parse_args()
+    print(json.dumps([run(frame_format, pattern, args) for frame_format in ('rgb', 'wrgb') for pattern in args.patterns], indent=4))
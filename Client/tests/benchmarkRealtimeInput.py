@@ -0,0 +1,120 @@
+"""
+Benchmark of the realtime input (led/realtime.py) against a sender on localhost.
+
+A sender process plays frames of --pixels pixels at --fps over DDP or E1.31, using the network outputs
+of the client, and can drop a share of the packets to check the loss counters. The receiver runs in this
+process with a stand-in controller, once with a network strip (payloads copied into its frame buffer) and
+once with a strip that only has setPixelColor, like the ws281x strip. The receiver's statistics are printed
+as JSON: frames shown, fps, lost packets and the latency from the first packet of a frame until it was shown.
+
+Usage (from the Client directory):
+    python tests/benchmarkRealtimeInput.py --pixels 1000 --fps 40 --duration 5 --drop-rate 0.01
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.outputs.networkOutputs import DDPStrip, E131Strip
+from led.realtime import RealtimeReceiver
+
+SENDERS = {'ddp': DDPStrip, 'e131': E131Strip}
+
+class PixelStrip:
+    """Strip with only the pixel interface of the ws281x strip, show() does nothing."""
+
+    def __init__(self, num):
+        self.pixels = [0] * num
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def show(self):
+        pass
+
+class DiscardingDDPStrip(DDPStrip):
+    """Network strip whose frames go to a port nobody listens on."""
+
+    def __init__(self, num):
+        super().__init__(num, '127.0.0.1', 9)
+
+class BenchmarkController:
+    """Stands in for the LEDController: always online, no animation to pause."""
+
+    def __init__(self, strip):
+        self.strip = strip
+        self.isOnline = True
+
+    def start_realtime(self, source):
+        return True
+
+    def stop_realtime(self):
+        pass
+
+def send(protocol, port, pixels, fps, duration, drop_rate, seed):
+    """Runs in the sender process: plays frames, dropping packets at random."""
+    random.seed(seed)
+    strip = SENDERS[protocol](pixels, '127.0.0.1', port)
+    strip.begin()
+    interval = 1 / fps
+    deadline = start = time.perf_counter()
+    step = 0
+    dropped = 0
+    while time.perf_counter() - start < duration:
+        for i in range(pixels):
+            strip.setPixelColor(i, ((i + step) & 0xff) << 8)
+        strip.sequence = strip.sequence % strip.max_sequence + 1
+        for header in strip._headers:
+            header[strip.sequence_offset] = strip.sequence
+        for buffers, _, address in strip._packets:
+            if random.random() < drop_rate:
+                dropped += 1
+                continue
+            strip.socket.sendmsg(buffers, (), 0, address)
+        step += 1
+        deadline += interval
+        now = time.perf_counter()
+        if deadline > now:
+            time.sleep(deadline - now)
+    return step, dropped
+
+def run(protocol, strip_kind, args):
+    strip = DiscardingDDPStrip(args.pixels) if strip_kind == 'frame_buffer' else PixelStrip(args.pixels)
+    if strip_kind == 'frame_buffer':
+        strip.begin()
+    receiver = RealtimeReceiver(BenchmarkController(strip), protocol, port=args.port, timeout=1, multicast=False)
+    receiver.start()
+    with multiprocessing.Pool(1) as pool:
+        frames_sent, packets_dropped = pool.apply(send, (protocol, receiver.port, args.pixels, args.fps, args.duration, args.drop_rate, args.seed))
+    time.sleep(0.2)
+    stats = receiver.get_stats(window_seconds=args.duration + 1)
+    receiver.stop()
+    return {
+        'protocol': protocol,
+        'strip': strip_kind,
+        'pixels': args.pixels,
+        'frames_sent': frames_sent,
+        'packets_dropped_by_sender': packets_dropped,
+        **stats,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the realtime DDP / E1.31 input")
+    parser.add_argument("--protocols", nargs="+", default=list(SENDERS), choices=list(SENDERS), help="Protocols to benchmark")
+    parser.add_argument("--pixels", type=int, default=1000, help="Pixels per frame")
+    parser.add_argument("--fps", type=float, default=40, help="Frames per second of the sender")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per run")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of the packets the sender drops")
+    parser.add_argument("--port", type=int, default=24048, help="UDP port of the receiver")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the dropped packets")
+    args = parser.parse_args()
+    results = [run(protocol, strip_kind, args) for protocol in args.protocols for strip_kind in ('frame_buffer', 'pixel_strip')]
+    print(json.dumps(results, indent=4))
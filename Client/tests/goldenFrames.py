@@ -0,0 +1,263 @@
+"""
+Golden frames of the animations: renders every animation deterministically and compares the frames
+with the golden files in tests/goldens/<category>/<animation_name>.json.
+
+An animation runs synchronously against an in-memory strip until it has shown FRAMES frames (or returned,
+like the static animations). `random` is seeded before the animation is created and the time functions are
+replaced by a fake clock that only advances when the animation sleeps, so every run renders the same frames
+no matter how fast the machine is. The audio animations get synthetic audio features that change every frame.
+
+The golden files are checked by tests/test_animation_goldens.py (pytest). After an intended visual change,
+regenerate the goldens of the changed animations and review the diff of the files.
+
+Usage (from the Client directory):
+    python tests/goldenFrames.py                          # compares all animations, prints pixel diffs
+    python tests/goldenFrames.py --update                 # rewrites all golden files
+    python tests/goldenFrames.py --update special/fade    # rewrites the golden file of one animation
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from led.registry import REGISTRY
+from utils.audio import AudioFeatures
+
+GOLDEN_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'goldens')
+PIXELS = 32
+FRAMES = 30
+SEED = 1
+START_TIME = 1000.0
+MAX_DIFFERENCES = 10  # Differing pixels listed per animation
+
+# Arguments of the animations with a schema, chosen so every color channel differs
+ARGS = {
+    ('static', 'custom_color'): {'red': 200, 'green': 80, 'blue': 30},
+    ('static', 'custom_fill'): {'red': 200, 'green': 80, 'blue': 30, 'percentage': 40},
+    ('custom', 'color_wipe'): {'red': 200, 'green': 80, 'blue': 30},
+    ('custom', 'theater_chase'): {'red': 200, 'green': 80, 'blue': 30},
+    ('custom', 'strobe'): {'red': 200, 'green': 80, 'blue': 30},
+    ('custom', 'color_chase'): {'red': 200, 'green': 80, 'blue': 30},
+    ('custom', 'custom_rainbow_cycle'): {'colors': [[255, 0, 0], [0, 255, 0], [0, 0, 255]]},
+    ('special', 'blink'): {'red': 200, 'green': 80, 'blue': 30, 'blinking_speed': 10},
+    ('special', 'fade'): {'from_red': 200, 'from_green': 80, 'from_blue': 30, 'to_red': 10, 'to_green': 120, 'to_blue': 250, 'steps': 10, 'fading_speed': 20},
+    ('special', 'sparkle'): {'red': 200, 'green': 80, 'blue': 30, 'sparkle_count': 5},
+    ('special', 'scanner_effect'): {'red': 200, 'green': 80, 'blue': 30, 'scan_speed': 20, 'tail_length': 4},
+    ('special', 'yoyo_theater'): {'red': 200, 'green': 80, 'blue': 30, 'yoyo_speed': 20},
+    ('special', 'breathing_effect'): {'red': 200, 'green': 80, 'blue': 30, 'breathing_duration': 2},
+    ('special', 'color_ripple'): {'red': 200, 'green': 80, 'blue': 30, 'ripple_speed': 20},
+    ('audio', 'beat_pulse'): {'red': 200, 'green': 80, 'blue': 30},
+}
+
+class FramesCaptured(BaseException):
+    """Ends the animation once enough frames were shown, a BaseException so the animations' except Exception doesn't catch it."""
+
+class GoldenStrip:
+    """In-memory strip recording the brightness and pixels of every frame shown."""
+    high_bit_frame = None  # Set by the animations rendering into a led.dither.HighBitFrame
+    power_limiter = None  # No power budget, like a strip without the power config section
+
+    def __init__(self, num, max_frames, on_show=None):
+        self.pixels = [0] * num
+        self.brightness = 255
+        self.frames = []
+        self.max_frames = max_frames
+        self.on_show = on_show  # Called with the number of frames shown so far
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        # Out of range pixels are ignored, like the ws281x library and the network outputs do
+        if 0 <= n < len(self.pixels):
+            self.pixels[n] = int(color)
+
+    def getPixelColor(self, n):
+        return self.pixels[n]
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def show(self):
+        if self.high_bit_frame is not None:
+            # Dithered with the brightness applied, like the outputs show it
+            rgb = self.high_bit_frame.quantize(self.brightness)
+            pixels = [(rgb[i] << 16) | (rgb[i + 1] << 8) | rgb[i + 2] for i in range(0, len(rgb), 3)]
+            self.frames.append({'brightness': 255, 'pixels': pixels})
+        else:
+            self.frames.append({'brightness': self.brightness, 'pixels': list(self.pixels)})
+        if len(self.frames) >= self.max_frames:
+            raise FramesCaptured()
+        if self.on_show is not None:
+            self.on_show(len(self.frames))
+
+class FakeClock:
+    """Replaces the time functions; the time only advances when something sleeps."""
+
+    def __init__(self, now=START_TIME):
+        self.now = now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def time(self):
+        return self.now
+
+    @contextlib.contextmanager
+    def installed(self):
+        names = ('sleep', 'time', 'monotonic', 'perf_counter')
+        originals = {name: getattr(time, name) for name in names}
+        for name in names:
+            setattr(time, name, self.sleep if name == 'sleep' else self.time)
+        try:
+            yield self
+        finally:
+            for name, function in originals.items():
+                setattr(time, name, function)
+
+class FakeAudio:
+    """Stands in for the audio analysis: synthetic band levels, loudness and a beat every 6 frames."""
+    frame_rate = 60
+
+    def __init__(self, strip):
+        self.strip = strip
+
+    def acquire(self):
+        return True
+
+    def release(self):
+        pass
+
+    def record_render(self, cpu_seconds):
+        pass
+
+    @property
+    def features(self):
+        frame = len(self.strip.frames)
+        levels = tuple(((band * 7 + frame * 3) % 16) / 15 for band in range(8))
+        return AudioFeatures(levels, (frame % 10) / 9, frame // 6, None, None)
+
+@contextlib.contextmanager
+def _audio_replaced(strip):
+    module = sys.modules['led.animations.audioAnimations']
+    original = module.AUDIO
+    module.AUDIO = FakeAudio(strip)
+    try:
+        yield
+    finally:
+        module.AUDIO = original
+
+def list_animations():
+    """Returns (category, animation_name) of every registered animation."""
+    return [(category, name) for category, animations in REGISTRY.catalog().items() for name in animations]
+
+def render(category, animation_name, pixels=PIXELS, frames=FRAMES, seed=SEED, updates=None):
+    """
+    Runs an animation deterministically and returns the frames it showed, as dicts of brightness and pixels.
+
+    updates maps a number of shown frames to (params, duration) of Animation.update_params(), called after that frame.
+    """
+    entry = REGISTRY.get(category, animation_name)
+    updates = updates or {}
+
+    def update(shown):
+        if shown in updates:
+            animation.update_params(*updates[shown])
+
+    strip = GoldenStrip(pixels, frames, update)
+    audio = _audio_replaced(strip) if category == 'audio' else contextlib.nullcontext()
+    random.seed(seed)
+    with FakeClock().installed(), audio:
+        animation = entry.cls(strip, **ARGS.get((category, animation_name), {}))
+        try:
+            animation.start()
+        except FramesCaptured:
+            pass
+    return strip.frames
+
+def golden_path(category, animation_name):
+    return os.path.join(GOLDEN_DIRECTORY, category, f"{animation_name}.json")
+
+def load_golden(category, animation_name):
+    """Returns the golden frames of an animation, or None if it has no golden file."""
+    path = golden_path(category, animation_name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        golden = json.load(file)
+    return [{'brightness': frame['brightness'], 'pixels': [int(color, 16) for color in frame['pixels'].split()]} for frame in golden['frames']]
+
+def save_golden(category, animation_name, frames):
+    """Writes the golden file of an animation, one line per frame with the pixels as hex colors."""
+    path = golden_path(category, animation_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    header = {
+        'category': category,
+        'animation_name': animation_name,
+        'args': ARGS.get((category, animation_name), {}),
+        'pixels': PIXELS,
+        'seed': SEED,
+    }
+    lines = [json.dumps({'brightness': frame['brightness'], 'pixels': ' '.join(f"{color:06x}" for color in frame['pixels'])}) for frame in frames]
+    with open(path, 'w') as file:
+        file.write(json.dumps(header)[:-1] + ', "frames": [\n    ' + ',\n    '.join(lines) + '\n]}\n')
+
+def diff_frames(expected, actual):
+    """Returns a list of human readable differences between two frame lists, empty if they are equal."""
+    differences = []
+    if len(expected) != len(actual):
+        differences.append(f"expected {len(expected)} frames, got {len(actual)}")
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        if want['brightness'] != got['brightness']:
+            differences.append(f"frame {index}: brightness expected {want['brightness']}, got {got['brightness']}")
+        if len(want['pixels']) != len(got['pixels']):
+            differences.append(f"frame {index}: expected {len(want['pixels'])} pixels, got {len(got['pixels'])}")
+            continue
+        for pixel, (want_color, got_color) in enumerate(zip(want['pixels'], got['pixels'])):
+            if want_color != got_color:
+                differences.append(f"frame {index} pixel {pixel}: expected #{want_color:06x}, got #{got_color:06x}")
+    return differences
+
+def format_differences(differences):
+    shown = differences[:MAX_DIFFERENCES]
+    if len(differences) > MAX_DIFFERENCES:
+        shown.append(f"... and {len(differences) - MAX_DIFFERENCES} more")
+    return '\n'.join(shown)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the animations with their golden frames, or regenerate them")
+    parser.add_argument("animations", nargs="*", help="Animations as category/animation_name, all if none are given")
+    parser.add_argument("--update", action='store_true', help="Rewrite the golden files instead of comparing")
+    args = parser.parse_args()
+
+    selected = [tuple(name.split('/', 1)) for name in args.animations] or list_animations()
+    failed = 0
+    for category, animation_name in selected:
+        frames = render(category, animation_name)
+        if args.update:
+            save_golden(category, animation_name, frames)
+            print(f"{category}/{animation_name}: wrote {len(frames)} frames")
+            continue
+        golden = load_golden(category, animation_name)
+        if golden is None:
+            failed += 1
+            print(f"{category}/{animation_name}: no golden file")
+            continue
+        differences = diff_frames(golden, frames)
+        if differences:
+            failed += 1
+            print(f"{category}/{animation_name}: {len(differences)} differences\n{format_differences(differences)}")
+        else:
+            print(f"{category}/{animation_name}: ok")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,41 @@
+"""
+Golden-frame regression tests of the animations, see goldenFrames.py for the harness and for regenerating the goldens.
+
+Run from the Client directory:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from goldenFrames import GOLDEN_DIRECTORY, diff_frames, format_differences, list_animations, load_golden, render
+
+ANIMATIONS = list_animations()
+
+@pytest.mark.parametrize('category, animation_name', ANIMATIONS, ids=[f"{category}/{name}" for category, name in ANIMATIONS])
+def test_animation_matches_golden_frames(category, animation_name, capsys):
+    golden = load_golden(category, animation_name)
+    assert golden is not None, f"No golden frames, create them with: python tests/goldenFrames.py --update {category}/{animation_name}"
+
+    frames = render(category, animation_name)
+
+    # The animations print their exceptions instead of raising them
+    assert "Something went wrong" not in capsys.readouterr().out
+    differences = diff_frames(golden, frames)
+    assert not differences, (
+        f"{len(differences)} differences to the golden frames:\n{format_differences(differences)}\n"
+        f"If the change is intended, regenerate them with: python tests/goldenFrames.py --update {category}/{animation_name}"
+    )
+
+def test_rendering_is_deterministic():
+    # random_bounce picks its color with random, sparkle its pixels
+    for category, animation_name in (('standard', 'random_bounce'), ('special', 'sparkle')):
+        assert render(category, animation_name) == render(category, animation_name)
+
+def test_every_golden_file_belongs_to_an_animation():
+    golden_files = {
+        (category, file_name[:-len('.json')])
+        for category in os.listdir(GOLDEN_DIRECTORY)
+        for file_name in os.listdir(os.path.join(GOLDEN_DIRECTORY, category))
+    }
+    assert golden_files - set(ANIMATIONS) == set()
@@ -0,0 +1,37 @@
+"""
+Tests of changing the parameters of a running animation in place (Animation.update_params()), rendered with the
+golden-frame harness of goldenFrames.py.
+
+Run from the Client directory:
+    python -m pytest tests
+"""
+from goldenFrames import render
+
+UPDATE_FRAME = 10
+
+def lit_pixels(frame):
+    return [i for i, color in enumerate(frame['pixels']) if color]
+
+def channels(color):
+    return (color >> 16) & 0xff, (color >> 8) & 0xff, color & 0xff
+
+def test_update_applies_at_next_frame_without_restart():
+    original = render('special', 'scanner_effect')
+    updated = render('special', 'scanner_effect', updates={UPDATE_FRAME: ({'red': 0, 'green': 255}, 0)})
+
+    assert updated[:UPDATE_FRAME] == original[:UPDATE_FRAME]
+    for original_frame, updated_frame in zip(original[UPDATE_FRAME:], updated[UPDATE_FRAME:]):
+        # Same position as without the update, so the animation kept its phase and wasn't blanked
+        assert lit_pixels(updated_frame) == lit_pixels(original_frame)
+        assert all(channels(color)[0] == 0 for color in updated_frame['pixels'])
+
+def test_update_eases_to_new_value():
+    # scanner_effect shows 20 frames per second, the transition takes 10 frames
+    frames = render('special', 'scanner_effect', updates={UPDATE_FRAME: ({'red': 0, 'green': 255}, 0.5)})
+    heads = [channels(max(frame['pixels'], key=lambda color: sum(channels(color)))) for frame in frames[UPDATE_FRAME:]]
+    reds = [red for red, _, _ in heads]
+    greens = [green for _, green, _ in heads]
+
+    assert reds == sorted(reds, reverse=True) and greens == sorted(greens)
+    assert 0 < reds[4] < 200 and 80 < greens[4] < 255
+    assert heads[-1] == (0, 255, 30)
@@ -0,0 +1,294 @@
+import math
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import deque
+
+from utils.logger import LOGGER
+from utils.telemetry import RingBuffer, summarize, DEFAULT_WINDOW_SECONDS
+
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_CHANNELS = 1
+DEFAULT_BLOCK_SIZE = 1024  # Samples per analysis, 23 ms at 44.1 kHz
+DEFAULT_WINDOW_SIZE = 2048  # Samples of the FFT window, overlapping the previous block
+DEFAULT_BANDS = 16
+DEFAULT_FRAME_RATE = 60  # Frames per second of the audio animations
+MIN_FREQUENCY = 40
+MAX_FREQUENCY = 16000
+BASS_FREQUENCY = 250  # Beats are detected in the bands below
+DYNAMIC_RANGE_DB = 60  # Levels are mapped from (peak - range) to peak
+PEAK_DECAY_DB = 0.05  # Per block, lets the gain adapt to quieter music within a few seconds
+LEVEL_RELEASE = 0.85  # Per block, levels rise immediately and fall off smoothly
+BEAT_HISTORY_SECONDS = 1.0
+BEAT_THRESHOLD = 1.5  # Standard deviations of the spectral flux above its mean
+BEAT_MIN_INTERVAL = 0.2  # Seconds, at most 300 beats per minute
+SAMPLE_WIDTH = 2  # Signed 16 bit little endian PCM
+
+class AudioFeatures:
+    """Result of analyzing one block of audio, replaced as a whole so readers never see a partial update."""
+    __slots__ = ('levels', 'energy', 'beat_count', 'beat_time', 'time')
+
+    def __init__(self, levels=(), energy=0.0, beat_count=0, beat_time=None, time=None):
+        self.levels = levels  # Level of every band between 0 and 1, low to high frequencies
+        self.energy = energy  # Loudness between 0 and 1
+        self.beat_count = beat_count  # Beats detected so far, animations compare it to see new beats
+        self.beat_time = beat_time  # perf_counter of the last beat
+        self.time = time  # perf_counter when the block was analyzed
+
+SILENCE = AudioFeatures()
+
+class WavSource:
+    """Plays a WAV file (16 bit PCM) in real time, looping at its end. Meant for testing without a microphone."""
+
+    def __init__(self, path: str, loop: bool = True):
+        self.path = path
+        self.loop = loop
+        self.file = None
+        self.sample_rate = None
+        self.channels = None
+        self._next_read = None
+
+    def open(self):
+        self.file = wave.open(self.path, 'rb')
+        if self.file.getsampwidth() != SAMPLE_WIDTH:
+            raise ValueError(f"{self.path} must contain 16 bit PCM")
+        self.sample_rate = self.file.getframerate()
+        self.channels = self.file.getnchannels()
+        self._next_read = time.perf_counter()
+
+    def read(self, frames: int) -> bytes:
+        data = self.file.readframes(frames)
+        if len(data) < frames * self.channels * SAMPLE_WIDTH and self.loop:
+            self.file.rewind()
+            data += self.file.readframes(frames - len(data) // (self.channels * SAMPLE_WIDTH))
+        # Returns the block once it would have been recorded, like a live source
+        self._next_read += frames / self.sample_rate
+        delay = self._next_read - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return data
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+class PipeSource:
+    """Reads raw 16 bit PCM from a named pipe or file (e.g. the output pipe of a music player), or '-' for stdin."""
+
+    def __init__(self, path: str, sample_rate: int = DEFAULT_SAMPLE_RATE, channels: int = DEFAULT_CHANNELS):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.file = None
+
+    def open(self):
+        self.file = sys.stdin.buffer if self.path == '-' else open(self.path, 'rb')
+
+    def read(self, frames: int) -> bytes:
+        return self.file.read(frames * self.channels * SAMPLE_WIDTH)
+
+    def close(self):
+        if self.file is not None and self.file is not sys.stdin.buffer:
+            self.file.close()
+
+class AlsaSource(PipeSource):
+    """Records from an ALSA capture device through arecord, so no audio library has to be installed."""
+
+    def __init__(self, device: str = 'default', sample_rate: int = DEFAULT_SAMPLE_RATE, channels: int = DEFAULT_CHANNELS):
+        super().__init__(None, sample_rate, channels)
+        self.device = device
+        self.process = None
+
+    def open(self):
+        self.process = subprocess.Popen(
+            ['arecord', '-q', '-D', self.device, '-f', 'S16_LE', '-c', str(self.channels), '-r', str(self.sample_rate), '-t', 'raw'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self.file = self.process.stdout
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process.stdout.close()
+
+def create_source(source_config: dict):
+    """Creates the audio source of the "source" entry of the audio config."""
+    source_type = source_config.get('type', 'alsa')
+    sample_rate = source_config.get('sample_rate', DEFAULT_SAMPLE_RATE)
+    channels = source_config.get('channels', DEFAULT_CHANNELS)
+    if source_type == 'alsa':
+        return AlsaSource(source_config.get('device', 'default'), sample_rate, channels)
+    if source_type == 'pipe':
+        return PipeSource(source_config['path'], sample_rate, channels)
+    if source_type == 'wav':
+        return WavSource(source_config['path'], source_config.get('loop', True))
+    raise ValueError(f"Unknown audio source '{source_type}', expected 'alsa', 'pipe' or 'wav'")
+
+class AudioAnalyzer:
+    """
+    Analyzes audio in a background thread for the audio-reactive animations.
+
+    Every block of samples is appended to a sliding, Hann windowed FFT window. The power spectrum is summed into
+    logarithmically spaced bands, whose levels are mapped to 0..1 with an automatic gain. Beats are onsets of
+    the spectral flux of the bass bands above a threshold adapted to the last second.
+
+    The analysis only runs while an audio animation uses it (acquire/release). NumPy is imported when it starts,
+    so the client runs without it as long as no audio animation is started.
+    """
+
+    def __init__(self):
+        self.config = None
+        self.frame_rate = DEFAULT_FRAME_RATE
+        self.features = SILENCE
+        self.analysis_time = RingBuffer()  # Seconds from reading a block until its features were published
+        self.analysis_cpu = RingBuffer()  # CPU seconds of the analysis thread per block
+        self.render_cpu = RingBuffer()  # CPU seconds of the audio animations per frame
+        self.blocks = 0
+        self.block_seconds = None
+        self._users = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._source = None
+
+    def configure(self, audio_config: dict):
+        """
+        Sets the configuration used the next time the analysis starts.
+
+        Args:
+            audio_config (dict): The "audio" section of the config: source, block_size, window_size, bands and frame_rate.
+        """
+        self.config = audio_config
+        self.frame_rate = audio_config.get('frame_rate', DEFAULT_FRAME_RATE)
+
+    def acquire(self) -> bool:
+        """Starts the analysis for an animation, unless it already runs. Returns False if it can't run."""
+        with self._lock:
+            if self._users == 0 and not self._start():
+                return False
+            self._users += 1
+            return True
+
+    def release(self):
+        """Stops the analysis once no animation uses it anymore."""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self._stop()
+
+    def _start(self) -> bool:
+        if self.config is None:
+            LOGGER.error("Audio animations need the 'audio' section in config.json")
+            return False
+        try:
+            import numpy
+        except ImportError:
+            LOGGER.error("Audio animations need NumPy, install it with 'pip install numpy'")
+            return False
+        try:
+            self._source = create_source(self.config.get('source', {}))
+            self._source.open()
+        except (OSError, ValueError, KeyError) as e:
+            LOGGER.error(f"Could not open the audio source: {e}")
+            return False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(numpy,), name="audio-analyzer", daemon=True)
+        self._thread.start()
+        return True
+
+    def _stop(self):
+        self._running = False
+        # A live source delivers the next block within a block's duration, the thread ends after it
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        self.features = SILENCE
+
+    def _run(self, np):
+        source = self._source
+        block_size = self.config.get('block_size', DEFAULT_BLOCK_SIZE)
+        window_size = max(block_size, self.config.get('window_size', DEFAULT_WINDOW_SIZE))
+        band_count = self.config.get('bands', DEFAULT_BANDS)
+        sample_rate, channels = source.sample_rate, source.channels
+        self.block_seconds = block_size / sample_rate
+
+        window = np.zeros(window_size, dtype=np.float32)
+        hann = np.hanning(window_size).astype(np.float32)
+        # Band edges as FFT bins, logarithmically spaced; bands narrower than a bin are merged
+        frequencies = np.geomspace(MIN_FREQUENCY, min(MAX_FREQUENCY, sample_rate / 2), band_count + 1)
+        edges = np.unique(np.clip(np.round(frequencies * window_size / sample_rate).astype(int), 1, window_size // 2))
+        band_widths = np.diff(edges).astype(np.float32)
+        bass_bands = min(len(band_widths), max(1, int(np.searchsorted(frequencies, BASS_FREQUENCY))))
+        levels = np.zeros(len(band_widths), dtype=np.float32)
+        previous_db = None
+        peak_db = -np.inf
+        peak_energy = 1e-4
+        flux_history = deque(maxlen=max(2, int(BEAT_HISTORY_SECONDS / self.block_seconds)))
+        beat_count, beat_time = 0, None
+
+        while self._running:
+            try:
+                data = source.read(block_size)
+            except (OSError, ValueError) as e:
+                LOGGER.error(f"Error reading the audio source: {e}")
+                break
+            if not self._running:
+                break
+            if len(data) < block_size * channels * SAMPLE_WIDTH:
+                LOGGER.warning("Audio source ended")
+                break
+            read_at = time.perf_counter()
+            cpu_start = time.thread_time()
+
+            samples = np.frombuffer(data, dtype='<i2').reshape(-1, channels).mean(axis=1, dtype=np.float32) / 32768
+            window[:-block_size] = window[block_size:]
+            window[-block_size:] = samples
+
+            power = np.abs(np.fft.rfft(window * hann)) ** 2
+            bands_db = 10 * np.log10(np.add.reduceat(power[:edges[-1]], edges[:-1]) / band_widths + 1e-12)
+            peak_db = max(float(bands_db.max()), peak_db - PEAK_DECAY_DB)
+            levels = np.maximum(np.clip((bands_db - (peak_db - DYNAMIC_RANGE_DB)) / DYNAMIC_RANGE_DB, 0, 1), levels * LEVEL_RELEASE)
+
+            rms = float(np.sqrt(np.mean(samples * samples)))
+            peak_energy = max(rms, peak_energy * 0.999)
+
+            if previous_db is not None:
+                flux = float(np.maximum(bands_db[:bass_bands] - previous_db[:bass_bands], 0).sum())
+                if len(flux_history) >= flux_history.maxlen // 2:  # Detects beats after half of the history
+                    mean = sum(flux_history) / len(flux_history)
+                    deviation = math.sqrt(sum((value - mean) ** 2 for value in flux_history) / len(flux_history))
+                    if flux > mean + BEAT_THRESHOLD * deviation and flux > 1 and (beat_time is None or read_at - beat_time >= BEAT_MIN_INTERVAL):
+                        beat_count, beat_time = beat_count + 1, read_at
+                flux_history.append(flux)
+            previous_db = bands_db
+
+            self.features = AudioFeatures(tuple(levels.tolist()), min(1.0, rms / peak_energy), beat_count, beat_time, read_at)
+            self.blocks += 1
+            now = time.perf_counter()
+            self.analysis_time.record(now - read_at, now)
+            self.analysis_cpu.record(time.thread_time() - cpu_start, now)
+        self.features = SILENCE
+
+    def record_render(self, cpu_seconds: float):
+        """Records the CPU time an audio animation needed for one frame."""
+        self.render_cpu.record(cpu_seconds, time.perf_counter())
+
+    def get_metrics(self, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> dict:
+        """Returns percentiles of the analysis latency and of the CPU time per analyzed block and rendered frame."""
+        start = time.perf_counter() - window_seconds
+        return {
+            'running': self._users > 0,
+            'blocks': self.blocks,
+            'block_ms': round(self.block_seconds * 1000, 3) if self.block_seconds else None,
+            'analysis_latency_ms': summarize(self.analysis_time.since(start)),
+            'analysis_cpu_ms': summarize(self.analysis_cpu.since(start)),
+            'render_cpu_ms': summarize(self.render_cpu.since(start)),
+        }
+
+AUDIO = AudioAnalyzer()
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import deque
+
+SAMPLE_COUNT = 6
+
+class SharedClock:
+    """
+    Estimate of the server clock, shared by all controllers connected to the same server.
+
+    The offset is measured NTP-style: the client sends a probe at t0 (local), the server
+    receives it at t1 and answers at t2 (server time), and the answer arrives at t3 (local).
+    Of the recent probes the one with the smallest round trip is trusted, since queueing
+    delays only ever make a probe slower.
+
+    Local times use time.monotonic(), so jumps of the system clock don't disturb running animations.
+    """
+
+    def __init__(self, sample_count: int = SAMPLE_COUNT):
+        self.samples = deque(maxlen=sample_count)  # (round trip time, offset)
+        self.offset = None  # server time - local monotonic time
+        self.round_trip = None
+        self._lock = threading.Lock()
+
+    def add_sample(self, t0: float, t1: float, t2: float, t3: float):
+        """Adds a probe answered by the server. t0 and t3 are local monotonic times, t1 and t2 server times."""
+        round_trip = (t3 - t0) - (t2 - t1)
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        with self._lock:
+            self.samples.append((round_trip, offset))
+            self.round_trip, self.offset = min(self.samples)
+
+    def is_synced(self) -> bool:
+        return self.offset is not None
+
+    def now(self) -> float:
+        """Returns the current time on the shared clock, or the local wall clock before the first sync."""
+        offset = self.offset
+        if offset is None:
+            return time.time()
+        return time.monotonic() + offset
+
+    def to_local(self, shared_time: float) -> float:
+        """Converts a time on the shared clock to local monotonic time."""
+        return shared_time - self.now() + time.monotonic()
+
+    def get_status(self) -> dict:
+        """Returns the offset and its uncertainty (half the best round trip) in milliseconds."""
+        with self._lock:
+            return {
+                'synced': self.offset is not None,
+                'offset_ms': round(self.offset * 1000, 3) if self.offset is not None else None,
+                'uncertainty_ms': round(self.round_trip * 500, 3) if self.round_trip is not None else None,
+                'samples': len(self.samples),
+            }
+
+CLOCK = SharedClock()
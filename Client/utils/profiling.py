@@ -0,0 +1,157 @@
+import importlib.abc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from utils.logger import LOGGER
+
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'startup_profile.json')
+
+# Budget the startup profile is checked against, see "Startup budget" in readme.md
+STARTUP_TARGETS = {
+    'first_frame_s': 1.5,  # Client start until the first frame of the startup animation is shown
+    'steady_state_rss_mb': 30,  # Resident memory once connected and idle
+}
+
+def _rss_mb():
+    """Returns the resident set size of this process in MB, or None where /proc isn't available."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module loader to time executing the module, like `python -X importtime`."""
+
+    def __init__(self, loader, profile):
+        self.loader = loader
+        self.profile = profile
+
+    def __getattr__(self, name):
+        # get_data, is_package, get_resource_reader, ... of the wrapped loader
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profile._enter()
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profile._leave(module.__name__, time.perf_counter() - start)
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Finds modules with the other finders and wraps their loaders."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self.profile)
+                return spec
+        return None
+
+class StartupProfile:
+    """
+    Startup profile of the client, enabled with --profile-startup.
+
+    Records the time every module import takes (self and cumulative, like `python -X importtime`),
+    startup milestones such as the first frame, and a tracemalloc snapshot with the RSS at steady state.
+    When disabled, mark() is the only call on the hot path and returns immediately.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.milestones = {}
+        self.imports = []  # (module, self seconds, cumulative seconds)
+        self._local = threading.local()  # per thread: time spent in nested imports, per level of the import stack
+        self._finder = None
+
+    def enable(self):
+        """Starts recording. Call as early as possible, imports before this call aren't seen."""
+        self.enabled = True
+        tracemalloc.start()
+        self._finder = _TimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        self._stack().append(0.0)
+
+    def _leave(self, name, cumulative):
+        stack = self._stack()
+        nested = stack.pop()
+        if stack:
+            stack[-1] += cumulative
+        self.imports.append((name, cumulative - nested, cumulative))
+
+    def mark(self, milestone: str):
+        """Records the first time a milestone is reached, in seconds since the client started."""
+        if self.enabled and milestone not in self.milestones:
+            self.milestones[milestone] = round(time.perf_counter() - self.start, 3)
+            LOGGER.info(f"Startup milestone {milestone}: {self.milestones[milestone]:.3f} s")
+
+    def report(self, top: int = 20) -> dict:
+        """
+        Builds the report: milestones, slowest imports, RSS and the largest allocation sites.
+        The RSS includes the memory tracemalloc needs for its traces, so it is an upper bound.
+        """
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        allocations = snapshot.statistics('filename')[:top]
+        rss = _rss_mb()
+        first_frame = self.milestones.get('first_frame')
+        return {
+            'milestones': self.milestones,
+            'import_total_s': round(sum(self_time for _, self_time, _ in self.imports), 3),
+            'slowest_imports': [
+                {'module': name, 'self_ms': round(self_time * 1000, 1), 'cumulative_ms': round(cumulative * 1000, 1)}
+                for name, self_time, cumulative in sorted(self.imports, key=lambda entry: entry[2], reverse=True)[:top]
+            ],
+            'rss_mb': rss,
+            'python_heap_mb': round(current / 1024 / 1024, 1),
+            'python_heap_peak_mb': round(peak / 1024 / 1024, 1),
+            'top_allocations': [
+                {'file': str(stat.traceback[0].filename), 'kb': round(stat.size / 1024, 1), 'blocks': stat.count}
+                for stat in allocations
+            ],
+            'targets': STARTUP_TARGETS,
+            'within_targets': {
+                'first_frame_s': first_frame is not None and first_frame <= STARTUP_TARGETS['first_frame_s'],
+                'steady_state_rss_mb': rss is not None and rss <= STARTUP_TARGETS['steady_state_rss_mb'],
+            },
+        }
+
+    def write_report(self, path: str = PROFILE_PATH):
+        report = self.report()
+        tracemalloc.stop()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as profile_file:
+            json.dump(report, profile_file, indent=4)
+        LOGGER.info(f"Startup profile written to {path}: {json.dumps({'milestones': report['milestones'], 'rss_mb': report['rss_mb'], 'within_targets': report['within_targets']})}")
+        return report
+
+PROFILE = StartupProfile()
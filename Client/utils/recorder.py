@@ -0,0 +1,231 @@
+"""
+Recording of the frames pushed to the strip, for finding out what a strip actually showed.
+
+A recording file starts with a fixed header and a JSON header, followed by one zlib stream of records:
+
+    b'LEDREC'           magic
+    version             uint8
+    header length       uint32, little endian
+    header              JSON: pixels, pixel_format, frame_size, started_at, metadata
+    zlib stream         records, each
+                            time        float64, seconds since the recording started
+                            brightness  uint8
+                            delta       frame_size bytes, the frame XOR the previous frame (the first one XOR zeros)
+
+The pixel format is 'rgb' (3 bytes per pixel, network outputs) or 'wrgb' (the 32 bit colors of the ws281x
+library, little endian). Frames are stored before the brightness is applied. Unchanged pixels XOR to zeros,
+so a mostly static frame compresses to a few bytes. The stream is flushed every FLUSH_INTERVAL seconds,
+so a recording that was cut off can be read up to the last flush.
+"""
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from utils.logger import LOGGER
+
+MAGIC = b'LEDREC'
+VERSION = 1
+PREFIX = struct.Struct('<6sBI')
+RECORD = struct.Struct('<dB')
+PIXEL_FORMATS = {'rgb': 3, 'wrgb': 4}  # Bytes per pixel
+FILE_EXTENSION = '.ledrec'
+DEFAULT_DIRECTORY = 'recordings'
+DEFAULT_MAX_SECONDS = 300
+COMPRESSION_LEVEL = 6
+FLUSH_INTERVAL = 1.0
+MAX_PENDING_FRAMES = 600  # Frames waiting for the writer, newer frames are dropped beyond it
+_STOP = None
+
+class FrameRecorder:
+    """
+    Records every frame pushed with show() while a recording is active.
+
+    The render thread only copies the frame into a queue (see capture()); a writer thread computes the
+    deltas, compresses and writes them, so the render loop isn't slowed down by the compression or the disk.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.path = None
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._started = None
+        self._deadline = None
+        self._lock = threading.Lock()
+
+    def start(self, strip, directory: str = DEFAULT_DIRECTORY, max_seconds: float = DEFAULT_MAX_SECONDS, metadata: dict = None) -> dict:
+        """
+        Starts recording the frames of a strip, a running recording is stopped first.
+
+        Args:
+            strip: The strip, with get_frame() and the frame_format class attribute of the outputs.
+            directory (str): Directory the recording is written to, named after the current time.
+            max_seconds (float): The recording stops by itself after this many seconds.
+            metadata (dict): Stored in the header, e.g. the running animation.
+
+        Returns:
+            dict: The status of the recording (see get_status()).
+        """
+        with self._lock:
+            self._stop()
+            os.makedirs(directory, exist_ok=True)
+            name = datetime.now().strftime('%Y%m%d-%H%M%S')
+            self.path = os.path.join(directory, name + FILE_EXTENSION)
+            suffix = 1
+            while os.path.exists(self.path):
+                self.path = os.path.join(directory, f"{name}-{suffix}{FILE_EXTENSION}")
+                suffix += 1
+            header = {
+                'pixels': strip.numPixels(),
+                'pixel_format': strip.frame_format,
+                'frame_size': strip.numPixels() * PIXEL_FORMATS[strip.frame_format],
+                'started_at': time.time(),
+                'metadata': metadata or {},
+            }
+            file = open(self.path, 'wb')
+            encoded = json.dumps(header).encode()
+            file.write(PREFIX.pack(MAGIC, VERSION, len(encoded)) + encoded)
+            self.frames = self.dropped = 0
+            self.bytes_written = file.tell()
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._write, args=(file, self._queue, header['frame_size']), name="frame-recorder", daemon=True)
+            self._writer.start()
+            self._started = time.perf_counter()
+            self._deadline = self._started + max_seconds if max_seconds else None
+            self.active = True
+        LOGGER.info(f"Recording frames to {self.path}")
+        return self.get_status()
+
+    def stop(self) -> dict:
+        """Stops the recording and waits until it is written. Returns its status."""
+        with self._lock:
+            self._stop()
+        return self.get_status()
+
+    def _stop(self):
+        if self._writer is None:
+            return
+        self.active = False
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
+
+    def capture(self, strip, brightness: int, frame: bytes = None):
+        """
+        Queues the frame the strip is about to show, called by the outputs' show() while a recording is active.
+
+        Args:
+            strip: The strip showing the frame.
+            brightness (int): Brightness the frame is shown with, lowered by the power limiter if it is over the budget.
+            frame (bytes): The frame if the output already copied it with get_frame().
+        """
+        now = time.perf_counter()
+        if self._deadline is not None and now >= self._deadline:
+            # Stopped by the render thread without waiting for the writer, stop() joins it later
+            self.active = False
+            self._queue.put(_STOP)
+            return
+        if self._queue.qsize() >= MAX_PENDING_FRAMES:
+            self.dropped += 1
+            return
+        self._queue.put((now - self._started, brightness, frame if frame is not None else strip.get_frame()))
+
+    def _write(self, file, frames, frame_size):
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        previous = 0
+        last_flush = time.perf_counter()
+        try:
+            while True:
+                item = frames.get()
+                if item is _STOP:
+                    break
+                offset, brightness, frame = item
+                if len(frame) != frame_size:
+                    continue
+                current = int.from_bytes(frame, 'little')
+                record = RECORD.pack(offset, brightness) + (current ^ previous).to_bytes(frame_size, 'little')
+                previous = current
+                self.bytes_written += file.write(compressor.compress(record))
+                self.frames += 1
+                now = time.perf_counter()
+                if now - last_flush >= FLUSH_INTERVAL:
+                    self.bytes_written += file.write(compressor.flush(zlib.Z_SYNC_FLUSH))
+                    file.flush()
+                    last_flush = now
+            self.bytes_written += file.write(compressor.flush())
+            LOGGER.info(f"Recorded {self.frames} frames ({self.bytes_written} bytes) to {self.path}")
+        except OSError as e:
+            self.active = False
+            LOGGER.error(f"Could not write the recording {self.path}: {e}")
+        finally:
+            file.close()
+
+    def get_status(self) -> dict:
+        """Returns the path, frames, dropped frames and bytes of the current or last recording."""
+        return {
+            'recording': self.active,
+            'path': self.path,
+            'frames': self.frames,
+            'dropped_frames': self.dropped,
+            'bytes': self.bytes_written,
+        }
+
+RECORDER = FrameRecorder()
+
+class Recording:
+    """
+    Reads a recording file.
+
+    Attributes:
+        header (dict): pixels, pixel_format, frame_size, started_at and metadata.
+        size (int): Size of the file in bytes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path, 'rb') as file:
+            magic, version, header_length = PREFIX.unpack(file.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a frame recording")
+            if version != VERSION:
+                raise ValueError(f"{path} has version {version}, expected {VERSION}")
+            self.header = json.loads(file.read(header_length))
+            self._data_offset = PREFIX.size + header_length
+
+    def __iter__(self):
+        """
+        Yields (time, brightness, frame) of every frame, the frame as bytes in the pixel format of the header.
+        A truncated recording ends at its last complete frame.
+        """
+        frame_size = self.header['frame_size']
+        record_size = RECORD.size + frame_size
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        frame = 0
+        with open(self.path, 'rb') as file:
+            file.seek(self._data_offset)
+            while True:
+                chunk = file.read(65536)
+                if chunk:
+                    try:
+                        buffer += decompressor.decompress(chunk)
+                    except zlib.error:
+                        chunk = b''  # Cut off in the middle of a block, what was decompressed is still read
+                position = 0
+                while len(buffer) - position >= record_size:
+                    offset, brightness = RECORD.unpack_from(buffer, position)
+                    frame ^= int.from_bytes(buffer[position + RECORD.size:position + record_size], 'little')
+                    position += record_size
+                    yield offset, brightness, frame.to_bytes(frame_size, 'little')
+                del buffer[:position]
+                if not chunk:
+                    break
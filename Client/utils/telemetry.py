@@ -0,0 +1,147 @@
+from array import array
+from time import perf_counter
+
+DEFAULT_CAPACITY = 4096
+DEFAULT_WINDOW_SECONDS = 60
+PERCENTILES = (50, 95, 99)
+
+class RingBuffer:
+    """
+    Fixed size buffer of timestamped samples.
+
+    Samples are written into preallocated arrays, so recording one allocates nothing and
+    the oldest samples are overwritten once the buffer is full.
+    """
+    __slots__ = ("capacity", "values", "times", "index", "total")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.values = array('d', bytes(8 * capacity))
+        self.times = array('d', bytes(8 * capacity))
+        self.index = 0
+        self.total = 0
+
+    def record(self, value: float, now: float):
+        i = self.index
+        self.values[i] = value
+        self.times[i] = now
+        self.index = (i + 1) % self.capacity
+        self.total += 1
+
+    def since(self, start: float) -> list:
+        """Returns the samples recorded at or after the given perf_counter timestamp."""
+        count = min(self.total, self.capacity)
+        values, times = self.values, self.times
+        return [values[i] for i in range(count) if times[i] >= start]
+
+def summarize(samples: list, scale: float = 1000.0) -> dict:
+    """
+    Returns count, mean, max and percentiles of the samples, multiplied by scale (seconds to milliseconds).
+    """
+    if not samples:
+        return {'count': 0}
+    samples = sorted(samples)
+    count = len(samples)
+    summary = {
+        'count': count,
+        'mean': round(sum(samples) / count * scale, 3),
+        'max': round(samples[-1] * scale, 3),
+    }
+    for percentile in PERCENTILES:
+        # Nearest-rank percentile
+        rank = max(0, -(-percentile * count // 100) - 1)
+        summary[f'p{percentile}'] = round(samples[rank] * scale, 3)
+    return summary
+
+class FrameBuffer:
+    """
+    Ring buffer of animation frames, with parallel arrays for the timestamp, render time,
+    sleep overshoot and requested sleep of every frame.
+    """
+    __slots__ = ("capacity", "times", "render_times", "overshoots", "intervals", "index", "total", "frame_start")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.render_times = array('d', bytes(8 * capacity))
+        self.overshoots = array('d', bytes(8 * capacity))
+        self.intervals = array('d', bytes(8 * capacity))
+        self.index = 0
+        self.total = 0
+        self.frame_start = None
+
+    def since(self, start: float) -> list:
+        """Returns (render time, overshoot, requested sleep) of the frames recorded at or after start."""
+        count = min(self.total, self.capacity)
+        times = self.times
+        return [(self.render_times[i], self.overshoots[i], self.intervals[i]) for i in range(count) if times[i] >= start]
+
+class RenderTelemetry:
+    """
+    Timings of the render loop and of command handling, kept in ring buffers.
+
+    Animations report a frame whenever they sleep (see Animation.sleep), the strip reports
+    every show() call and the websocket handler reports how long a message took to handle.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.frames = FrameBuffer(capacity)
+        self.show_time = RingBuffer(capacity)
+        self.command_latency = RingBuffer(capacity)
+        self.frame_lateness = RingBuffer(capacity)
+
+    def record_frame(self, requested_sleep: float, sleep_start: float, now: float):
+        """
+        Records a frame that was rendered until sleep_start and then slept until now.
+        This runs once per frame, so it is kept to a handful of array writes.
+        """
+        frames = self.frames
+        frame_start = frames.frame_start
+        frames.frame_start = now
+        if frame_start is None:
+            return
+        i = frames.index
+        frames.times[i] = now
+        frames.render_times[i] = sleep_start - frame_start
+        frames.overshoots[i] = now - sleep_start - requested_sleep
+        frames.intervals[i] = requested_sleep
+        frames.index = (i + 1) % frames.capacity
+        frames.total += 1
+
+    def reset_frame(self):
+        """Forgets the current frame, e.g. when an animation stops, so the pause isn't counted as render time."""
+        self.frames.frame_start = None
+
+    def record_show(self, duration: float):
+        self.show_time.record(duration, perf_counter())
+
+    def record_command(self, duration: float):
+        self.command_latency.record(duration, perf_counter())
+
+    def record_lateness(self, lateness: float):
+        """Records how late a frame of a synchronized animation was presented, relative to the shared clock."""
+        self.frame_lateness.record(lateness, perf_counter())
+
+    def get_lateness(self, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> dict:
+        return summarize(self.frame_lateness.since(perf_counter() - window_seconds))
+
+    def get_metrics(self, window_seconds: float = DEFAULT_WINDOW_SECONDS) -> dict:
+        """
+        Returns percentiles of the timings over the last window_seconds, in milliseconds.
+        A frame counts as dropped when rendering and oversleeping took longer than its requested interval,
+        i.e. it took more than twice as long as the animation intended.
+        """
+        start = perf_counter() - window_seconds
+        frames = self.frames.since(start)
+        return {
+            'window_seconds': window_seconds,
+            'frames': len(frames),
+            'dropped_frames': sum(1 for render_time, overshoot, interval in frames if render_time + overshoot > interval),
+            'frame_time_ms': summarize([frame[0] for frame in frames]),
+            'show_time_ms': summarize(self.show_time.since(start)),
+            'sleep_overshoot_ms': summarize([frame[1] for frame in frames]),
+            'command_latency_ms': summarize(self.command_latency.since(start)),
+            'frame_lateness_ms': summarize(self.frame_lateness.since(start)),
+        }
+
+TELEMETRY = RenderTelemetry()
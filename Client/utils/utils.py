@@ -1,6 +1,11 @@
+import threading
 import time
 
 from utils.logger import LOGGER
+from utils.telemetry import TELEMETRY
+from utils.clock import CLOCK
+
+PARAMS_FRAME_RATE = 60  # Frames per second of a transition of a finished (static) animation, see Animation.update_params()
 
 def validate_rgb_values(red, green, blue):
     try:
@@ -41,6 +46,24 @@ def custom_wheel(pos, colors):
     b = color_start[2] + (color_end[2] - color_start[2]) * remainder // color_segment
     return Color(r, g, b)
 
+def ease_in_out(progress):
+    """Eases a progress between 0 and 1 in and out (smoothstep)."""
+    return progress * progress * (3 - 2 * progress)
+
+def interpolate(start, end, progress):
+    """
+    Interpolates between two parameter values: numbers, and lists of numbers of the same length item by item.
+    The result is rounded if both ends are integers; other values change to the end right away.
+    """
+    if isinstance(start, bool) or isinstance(end, bool):
+        return end
+    if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+        value = start + (end - start) * progress
+        return round(value) if isinstance(start, int) and isinstance(end, int) else value
+    if isinstance(start, (list, tuple)) and isinstance(end, (list, tuple)) and len(start) == len(end):
+        return [interpolate(start_item, end_item, progress) for start_item, end_item in zip(start, end)]
+    return end
+
 def fade_wheel(wheel_value):
     """Apply fading effect to the rainbow color."""
     brightness = 0.8  # Adjust the fade factor as needed
@@ -57,12 +80,92 @@ class Animation():
         self.stopAnimation = True
         self.is_running = False
         self.animationStarted = False
+        self.start_at = None  # Start time on the shared clock, for animations synchronized across controllers
+        self.normalized = False  # Arguments were already validated by the server
+        self._deadline = None
+        self._params_lock = threading.Lock()
+        self._transitions = {}  # Parameter name -> (start value, end value, monotonic start, duration)
 
     def start(self):
         self.stopAnimation = False
         self.is_running = True
+        TELEMETRY.reset_frame()
+        if self.start_at is not None:
+            start = CLOCK.to_local(self.start_at)
+            while not self.stopAnimation and time.monotonic() < start:
+                time.sleep(min(0.05, start - time.monotonic()))
+            self._deadline = self.start_at
+        self.apply_params()  # Changed while the animation was paused
         self._animation_func()
+        TELEMETRY.reset_frame()
         self.is_running = False
+
+    def sleep(self, seconds):
+        """
+        Waits between two frames and records the frame timings.
+
+        Synchronized animations wait until the next frame boundary on the shared clock instead,
+        so all controllers show the same frame at the same time. A late frame is caught up by
+        sleeping less afterwards, which keeps the phase instead of shifting it.
+        Parameters changed with update_params() are applied afterwards, before the next frame is rendered.
+        """
+        sleep_start = time.perf_counter()
+        if self._deadline is None:
+            time.sleep(seconds)
+        else:
+            self._deadline += seconds
+            remaining = CLOCK.to_local(self._deadline) - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            TELEMETRY.record_lateness(CLOCK.now() - self._deadline)
+        TELEMETRY.record_frame(seconds, sleep_start, time.perf_counter())
+        self.apply_params()
+
+    def update_params(self, params: dict, duration: float = 0):
+        """
+        Changes parameters of the animation in place, without restarting it.
+
+        The parameters are the attributes the constructor stored the arguments in. They change at the next
+        frame boundary (the end of sleep()); with a duration, numbers and lists of numbers are eased from their
+        current value to the new one over that many seconds. A finished animation, like the static ones that
+        show a single frame, is rendered again on a thread of its own instead, once per frame of the transition.
+
+        Args:
+            params (dict): Parameter names mapped to their new values.
+            duration (float): Seconds of the transition, 0 to change the values at once.
+        """
+        now = time.monotonic()
+        with self._params_lock:
+            for name, value in params.items():
+                self._transitions[name] = (getattr(self, name), value, now, duration)
+            rerender = not self.is_running and not self.stopAnimation
+            if rerender:
+                self.is_running = True  # stop() waits for the rendering to end
+        if rerender:
+            threading.Thread(target=self._rerender, daemon=True).start()
+
+    def apply_params(self):
+        """Sets the parameters changed by update_params() to their value at this time."""
+        if not self._transitions:
+            return
+        now = time.monotonic()
+        with self._params_lock:
+            for name, (start, end, started, duration) in list(self._transitions.items()):
+                progress = 1.0 if duration <= 0 else min(1.0, (now - started) / duration)
+                setattr(self, name, interpolate(start, end, ease_in_out(progress)))
+                if progress >= 1.0:
+                    del self._transitions[name]
+
+    def _rerender(self):
+        """Renders a finished animation again until its transitions are done."""
+        while True:
+            self.apply_params()
+            self._animation_func()
+            with self._params_lock:
+                if not self._transitions or self.stopAnimation:
+                    self.is_running = False
+                    return
+            time.sleep(1 / PARAMS_FRAME_RATE)
         
     def stop(self):
         self.stopAnimation = True
@@ -72,8 +175,13 @@ class Animation():
             self.strip.setPixelColor(i, 0)
         self.strip.show()
 
+    def valid_rgb(self, red, green, blue):
+        """Validates color arguments, unless the server already did."""
+        return self.normalized or validate_rgb_values(red, green, blue)
+
     def isStarted(self):
-        return self.animationStarted
+        # A scheduled animation is accepted, even though its first frame is still to come
+        return self.animationStarted or self.start_at is not None
 
 """
     Same as in rpi_ws281x.Color and rpi_ws281x.RGBW
@@ -1,13 +1,53 @@
 import asyncio
+import functools
 import json
 import os
+import random
+import time
+import uuid
 import websockets
 from utils.logger import LOGGER
+from utils.telemetry import TELEMETRY
+from utils.clock import CLOCK
+from utils.profiling import PROFILE
 from led.controller import LEDController, OFFLINE_ERROR
+from led.registry import REGISTRY
 
 from websocket.responses import *
 
 SAVE_PATH =  os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'saved_animation.json')
+CLIENT_ID_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'client_id')
+
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30
+CLOCK_SYNC_BURST = 5
+CLOCK_SYNC_BURST_INTERVAL = 0.2
+CLOCK_SYNC_INTERVAL = 10
+# Parameter updates arrive in bursts, e.g. while a color picker moves: the state follows them at most every
+# PARAMS_REPORT_INTERVAL seconds, and the animation is saved once no update arrived for PARAMS_SAVE_DELAY seconds
+PARAMS_REPORT_INTERVAL = 0.25
+PARAMS_SAVE_DELAY = 1.0
+
+def load_client_id():
+    """
+    Returns the persisted identity of this client, creating it on first start.
+    The server derives the controller id from it, so the id survives reconnects.
+    """
+    try:
+        with open(CLIENT_ID_PATH, 'r') as f:
+            client_id = f.read().strip()
+            if client_id:
+                return client_id
+    except FileNotFoundError:
+        pass
+    client_id = str(uuid.uuid4())
+    with open(CLIENT_ID_PATH, 'w') as f:
+        f.write(client_id)
+    return client_id
+
+def reconnect_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so a fleet doesn't reconnect in lockstep after a server restart."""
+    return random.uniform(0, min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** min(attempt, 16)))
 
 class WebSocketHandlerClient:
     """
@@ -29,68 +69,66 @@ class WebSocketHandlerClient:
         self.server_address = server_address
         self.server_port = server_port
         self.led_controller = led_controller
+        self.websocket = None
+        self.loop = None
+        self.heartbeat_timeout = None  # Announced by the server with its heartbeats
+        self.client_id = load_client_id()
+        self.controller_id = None
+        self.last_pushed_state = None
+        self.clock_task = None
+        self.updated_args = None  # Arguments of the running animation changed by updates that aren't reported yet
+        self.last_params_report = 0
+        self.params_report_handle = None
+        self.params_save_handle = None
+        self.led_controller.add_state_listener(self._on_state_change)
         
         # Map command names to handler methods
         self.handlers = {
             'set_online_state': self.led_controller.set_online_state,
             'set_brightness': self.led_controller.set_brightness,
-            'start_static_animation': self.start_static_animation,
-            'start_standard_animation': self.start_standard_animation,
-            'start_custom_animation': self.start_custom_animation,
-            'start_special_animation': self.start_special_animation
-        }
-
-        # Map standard animation names to methods
-        self.static_animations = {
-            'white': self.led_controller.set_white,
-            'custom_color': self.led_controller.fill_color,
-            'custom_fill': self.led_controller.custom_fill,
-        }
-        
-        self.standard_animations = {
-            'rainbow_cycle': self.led_controller.rainbow_cycle,
-            'rainbow_comet': self.led_controller.rainbow_comet,
-            'theater_chase_rainbow': self.led_controller.theater_chase_rainbow,
-            'rainbow_bounce': self.led_controller.rainbow_bounce,
-            'random_bounce': self.led_controller.random_bounce
+            'start_static_animation': functools.partial(self.start_animation, 'static'),
+            'start_standard_animation': functools.partial(self.start_animation, 'standard'),
+            'start_custom_animation': functools.partial(self.start_animation, 'custom'),
+            'start_special_animation': functools.partial(self.start_animation, 'special'),
+            'start_audio_animation': functools.partial(self.start_animation, 'audio'),
+            'update_animation_params': self.update_animation_params,
+            'start_recording': self.led_controller.start_recording,
+            'stop_recording': self.led_controller.stop_recording
         }
+        self.capabilities = None  # Advertised in the handshake, built on the first connect
 
-        # Map custom and special animation names to methods
-        self.custom_animations = {
-            'color_wipe': self.led_controller.color_wipe,
-            'theater_chase': self.led_controller.theater_chase,
-            'strobe': self.led_controller.strobe,
-            'color_chase': self.led_controller.color_chase,
-            'custom_rainbow_cycle': self.led_controller.custom_rainbow_cycle,
-        }
-        
-        self.special_animations = {
-            'blink': self.led_controller.blink,
-            'fade': self.led_controller.fade,
-            'sparkle': self.led_controller.sparkle,
-            'scanner_effect': self.led_controller.scanner_effect,
-            'yoyo_theater': self.led_controller.yoyo_theater,
-            'breathing_effect': self.led_controller.breathing_effect,
-            'color_ripple': self.led_controller.color_ripple,
-        }
-        
         self._load_animation_from_file()
         
     async def connect(self):
         """
-        Establishes a WebSocket connection to the server.
+        Connects to the WebSocket server and reconnects with exponential backoff whenever the connection is lost.
         """
+        attempt = 0
+        uri = f"ws://{self.server_address}:{self.server_port}"
         while True:
             try:
-                uri = f"ws://{self.server_address}:{self.server_port}"
                 async with websockets.connect(uri, ping_interval=None) as websocket:
                     self.websocket = websocket
+                    self.loop = asyncio.get_running_loop()
+                    self.heartbeat_timeout = None
+                    attempt = 0
                     LOGGER.info(f"Connected to WebSocket server at {self.server_address}")
-                    await self.send_message({'name': self.client_name})
+                    if self.capabilities is None:
+                        self.capabilities = self.led_controller.get_capabilities()
+                    await self.send_message({'name': self.client_name, 'client_id': self.client_id, 'capabilities': self.capabilities})
                     await self.handle_messages()
             except Exception as e:
                 LOGGER.error(f"Failed to connect to WebSocket server. Error: {e}")
-                await asyncio.sleep(5) 
+            finally:
+                self.websocket = None
+                if self.clock_task:
+                    self.clock_task.cancel()
+                    self.clock_task = None
+
+            delay = reconnect_delay(attempt)
+            attempt += 1
+            LOGGER.info(f"Reconnecting in {delay:.1f} seconds")
+            await asyncio.sleep(delay)
 
     async def send_message(self, message: dict):
         """
@@ -105,18 +143,113 @@ class WebSocketHandlerClient:
         except Exception as e:
             LOGGER.error(f"Failed to send message to server: {message}. Error: {e}")
 
+    async def send_state(self, state=None):
+        """
+        Pushes the current state of the strip to the server, so it can answer state queries without asking.
+
+        Args:
+            state (dict): The state to push, defaults to the current state of the LED controller.
+        """
+        state = state or self.led_controller.get_state()
+        self.last_pushed_state = state
+        await self.send_message({'event': 'state', 'data': state})
+
+    async def handle_session(self, data):
+        """
+        Handles the session the server opened for this connection.
+        After a resumed session the server still has the state, so it is only pushed if it changed meanwhile.
+        """
+        self.controller_id = data.get('id')
+        PROFILE.mark('connected')
+        if self.clock_task is None:
+            self.clock_task = asyncio.ensure_future(self.sync_clock())
+        if data.get('resumed') and self.led_controller.get_state() == self.last_pushed_state:
+            LOGGER.info(f"Resumed session as controller {self.controller_id}")
+            return
+        await self.send_state()
+
+    async def sync_clock(self):
+        """
+        Probes the server clock, a burst of probes right after connecting, then one every CLOCK_SYNC_INTERVAL
+        seconds to follow the drift between the clocks.
+        """
+        try:
+            for _ in range(CLOCK_SYNC_BURST):
+                await self.websocket.send(json.dumps({'event': 'clock', 't0': time.monotonic()}))
+                await asyncio.sleep(CLOCK_SYNC_BURST_INTERVAL)
+            while True:
+                await asyncio.sleep(CLOCK_SYNC_INTERVAL)
+                await self.websocket.send(json.dumps({'event': 'clock', 't0': time.monotonic()}))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER.error(f"Failed to probe the server clock. Error: {e}")
+
+    def handle_clock(self, data, received_at):
+        """Adds the server's answer to a clock probe to the shared clock estimate."""
+        try:
+            CLOCK.add_sample(float(data['t0']), float(data['t1']), float(data['t2']), received_at)
+        except (KeyError, TypeError, ValueError):
+            LOGGER.error(f"Invalid clock answer from server: {data}")
+
+    def _on_state_change(self, state):
+        """State listener of the LED controller, may be called from any thread."""
+        if self.loop is None or self.websocket is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._push_state_change(), self.loop)
+
+    async def _push_state_change(self):
+        """Pushes the current state, unless it was already sent along with the response to the command that changed it."""
+        state = self.led_controller.get_state()
+        if state != self.last_pushed_state:
+            await self.send_state(state)
+
+    def _add_state(self, response: dict) -> dict:
+        """
+        Adds the current state to a command response if it changed since it was last sent.
+        The server caches it before the response completes the command, so it never answers a query after it from the old state.
+        """
+        state = self.led_controller.get_state()
+        if state != self.last_pushed_state:
+            self.last_pushed_state = state
+            response['state'] = state
+        return response
+
     async def handle_messages(self):
         """
-        Continuously handles incoming messages from the WebSocket server.
+        Handles incoming messages from the WebSocket server until the connection is closed.
         """
         while True:
             try:
-                message = await self.websocket.recv()
-                await self.handle_message(message)
-                await asyncio.sleep(.1)
+                message = await self._receive()
             except websockets.exceptions.ConnectionClosed:
                 LOGGER.warning("WebSocket connection closed unexpectedly. Reconnecting...")
-                await self.connect()
+                return
+            await self.handle_message(message)
+
+    async def _receive(self):
+        """
+        Receives the next message. Once the server sent heartbeats, a silent server is treated
+        as a closed connection after the heartbeat timeout.
+        """
+        if not self.heartbeat_timeout:
+            return await self.websocket.recv()
+        try:
+            return await asyncio.wait_for(self.websocket.recv(), self.heartbeat_timeout)
+        except asyncio.TimeoutError:
+            LOGGER.warning("No heartbeat from the server, closing the connection.")
+            await self.websocket.close()
+            raise websockets.exceptions.ConnectionClosed(None, None)
+
+    async def handle_heartbeat(self, data):
+        """Echoes a heartbeat back to the server, which uses it to measure the round trip time."""
+        timeout = data.get('timeout')
+        if isinstance(timeout, (int, float)) and timeout > 0:
+            self.heartbeat_timeout = timeout
+        try:
+            await self.websocket.send(json.dumps({'event': 'heartbeat', 'sent_at': data.get('sent_at')}))
+        except Exception as e:
+            LOGGER.error(f"Failed to answer heartbeat. Error: {e}")
 
     async def handle_message(self, message):
         """
@@ -125,14 +258,25 @@ class WebSocketHandlerClient:
         Args:
             message (str): The received message.
         """
+        start = time.perf_counter()
+        received_at = time.monotonic()
         try:
             data = json.loads(message)
+            if data.get('event') == 'heartbeat':
+                await self.handle_heartbeat(data)
+                return
+            if data.get('event') == 'clock':
+                self.handle_clock(data, received_at)
+                return
             LOGGER.info(f"Message recieved from server: {data}")
             event = data.get('event')
             if event == 'command':
                 await self.handle_command(data)
             elif event == 'request':
                 await self.handle_request(data)
+            elif event == 'session':
+                await self.handle_session(data)
+            TELEMETRY.record_command(time.perf_counter() - start)
         except json.JSONDecodeError:
             LOGGER.error(f"Failed to decode JSON message: {message}")
 
@@ -168,7 +312,7 @@ class WebSocketHandlerClient:
             # Dispatch the command to the appropriate handler
             response = self.dispatch_command(command_name, args)
 
-        await self.send_message(response)
+        await self.send_message(self._add_state(response))
 
     def dispatch_request(self, request_name):
         """
@@ -182,7 +326,9 @@ class WebSocketHandlerClient:
         """
         handlers = {
             'get_online_state': self.led_controller.get_online_state,
-            'get_brightness': self.led_controller.get_brightness
+            'get_brightness': self.led_controller.get_brightness,
+            'get_metrics': self.led_controller.get_metrics,
+            'get_clock': self.led_controller.get_clock
         }
 
         # Check if the request name is valid
@@ -224,53 +370,105 @@ class WebSocketHandlerClient:
             LOGGER.info('Request completed successfully')
             return CommandResponses.create_success_response(Successes.REQUEST_SUCCESS, strip_response)
     
-    def _check_animation_name(self, name, animations):
+    def _check_animation_name(self, category, name):
         if not name:
             LOGGER.error('No animation name provided')
             return CommandResponses.create_error_response(Errors.MISSING_ARGUMENT, 'animation_name')
         
-        if name not in animations:
+        if REGISTRY.get(category, name) is None:
             LOGGER.error('Unknown animation: %s', name)
             return CommandResponses.create_error_response(Errors.UNKNOWN_ANIMATION)
     
-    def start_static_animation(self, **data):
-        animation_name = data['animation_name']
-        args = data['args']
-        name_check = self._check_animation_name(animation_name, self.static_animations)
-        if name_check:
-            return name_check
-        
-        self._save_animation_to_file(data, 'start')
-        return self.static_animations[animation_name](**args)
-    
-    def start_standard_animation(self, animation_name):
-        name_check = self._check_animation_name(animation_name, self.standard_animations)
-        if name_check:
-            return name_check
-        
-        self._save_animation_to_file({'animation_name': animation_name}, 'standard')
-        return self.standard_animations[animation_name]()
+    def _prepare_start(self, at, normalized=False):
+        """
+        Prepares the start of the next animation: it starts at the given time on the shared clock, if the clock is synced,
+        and skips validating its arguments if the server already normalized them.
+        """
+        self.led_controller.set_args_normalized(normalized)
+        if at is None:
+            return
+        if not CLOCK.is_synced():
+            LOGGER.warning("Clock not synced with the server yet, starting the animation immediately.")
+            return
+        self.led_controller.set_start_time(at)
 
-    def start_custom_animation(self, **data):
-        animation_name = data['animation_name']
-        args = data['args']
-        name_check = self._check_animation_name(animation_name, self.custom_animations)
-        if name_check:
-            return name_check
-        
-        self._save_animation_to_file(data, 'custom')
-        return self.custom_animations[animation_name](**args)
+    def start_animation(self, category, animation_name=None, args=None, at=None, normalized=False):
+        """
+        Starts an animation, as commanded by the server or restored from the saved animation.
 
-    def start_special_animation(self, **data):
-        animation_name = data['animation_name']
-        args = data['args']
-        name_check = self._check_animation_name(animation_name, self.special_animations)
+        Args:
+            category (str): Category of the animation ('static', 'standard', 'custom', 'special' or 'audio').
+            animation_name (str): Name of the animation.
+            args (dict): Arguments of the animation.
+            at (float): Start time on the shared clock, or None to start immediately.
+            normalized (bool): Whether the server already validated the arguments.
+        """
+        name_check = self._check_animation_name(category, animation_name)
         if name_check:
             return name_check
         
-        self._save_animation_to_file(data, 'special')
-        return self.special_animations[animation_name](**args)
-        
+        args = args or {}
+        self._cancel_params_updates()
+        self._save_animation_to_file({'animation_name': animation_name, 'args': args}, category)
+        self._prepare_start(at, normalized)
+        result = self.led_controller.start_animation(category, animation_name, **args)
+        self._report_animation(category, animation_name, args, result)
+        return result
+
+    def update_animation_params(self, params=None, duration=0):
+        """
+        Changes arguments of the running animation without restarting it, as commanded by the server.
+
+        Args:
+            params (dict): Arguments of the animation mapped to their new values.
+            duration (float): Seconds to ease numbers to their new values, 0 to change them at the next frame.
+        """
+        params = params or {}
+        result = self.led_controller.update_animation_params(params, duration)
+        if result is True:
+            # Reported and saved like a started animation with these arguments, coalesced over a burst of updates
+            self.updated_args = {**(self.updated_args or self.led_controller.animation_info['args']), **params}
+            if self.params_report_handle is None:
+                delay = self.last_params_report + PARAMS_REPORT_INTERVAL - time.monotonic()
+                if delay > 0:
+                    self.params_report_handle = self.loop.call_later(delay, self._report_params)
+                else:
+                    self._report_params()
+            if self.params_save_handle is not None:
+                self.params_save_handle.cancel()
+            self.params_save_handle = self.loop.call_later(PARAMS_SAVE_DELAY, self._save_params)
+        return result
+
+    def _report_params(self):
+        """Stores the arguments changed by the updates since the last report in the controller state."""
+        self.params_report_handle = None
+        self.last_params_report = time.monotonic()
+        info = self.led_controller.animation_info
+        self._report_animation(info['type'], info['animation_name'], self.updated_args, True)
+        self.updated_args = None
+
+    def _save_params(self):
+        """Saves the running animation with its updated arguments once the updates settled."""
+        self.params_save_handle = None
+        if self.params_report_handle is not None:
+            self.params_report_handle.cancel()
+            self._report_params()
+        info = self.led_controller.animation_info
+        self._save_animation_to_file({'animation_name': info['animation_name'], 'args': dict(info['args'])}, info['type'])
+
+    def _cancel_params_updates(self):
+        """Drops the pending report and save of parameter updates, the animation they changed is replaced."""
+        for handle in (self.params_report_handle, self.params_save_handle):
+            if handle is not None:
+                handle.cancel()
+        self.params_report_handle = self.params_save_handle = None
+        self.updated_args = None
+
+    def _report_animation(self, animation_type, animation_name, args, result):
+        """Stores the started animation in the controller state, unless the strip is offline."""
+        if result != OFFLINE_ERROR:
+            self.led_controller.set_animation_info(animation_type, animation_name, args)
+
     def _save_animation_to_file(self, animation_data: dict, type: str):
         LOGGER.info("Saving animation to json")
         data = animation_data
@@ -302,11 +500,9 @@ class WebSocketHandlerClient:
         self.led_controller.set_brightness(data['brightness'])
         del data['brightness']
         
+        # Static animations were saved with the type 'start' before
+        if animation_type == 'start':
+            animation_type = 'static'
+
         LOGGER.info('Starting animation: %s', animation_type)
-        if animation_type == 'standard':
-            animation_name = data['animation_name']
-            self.start_standard_animation(animation_name)
-        elif animation_type == 'custom':
-            self.start_custom_animation(**data)
-        elif animation_type == 'special':
-            self.start_special_animation(**data)
\ No newline at end of file
+        self.start_animation(animation_type, data.get('animation_name'), data.get('args'))
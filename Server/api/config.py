@@ -1,21 +1,36 @@
+# Animations served until a controller advertises its own in the handshake (see utils/catalog.py).
+# 'args' lists the argument names for the GUI, 'schema' their types and ranges (see utils/schema.py),
+# which the API checks and normalizes before sending a command.
+# The client owns the schemas (Client/led/registry.py and the animations), this is a copy, see 'Animation arguments' in the README.
+CHANNEL = {'type': 'int', 'min': 0, 'max': 255}
+COLOR = {'type': 'list', 'items': CHANNEL, 'min_length': 3, 'max_length': 3}
+RGB = {'red': CHANNEL, 'green': CHANNEL, 'blue': CHANNEL}
+FROM_RGB = {'from_red': CHANNEL, 'from_green': CHANNEL, 'from_blue': CHANNEL}
+TO_RGB = {'to_red': CHANNEL, 'to_green': CHANNEL, 'to_blue': CHANNEL}
+# Speeds are steps per second, the client waits 1 / speed seconds between steps
+SPEED = {'type': 'int', 'min': 1, 'max': 1000}
+
 static_animations = {
     'white': {
         'name': 'White',
         'animation_name': 'white',
         'description': 'Sets the complete LED-Strip to white',
-        'args': []
+        'args': [],
+        'schema': {},
     },
     'custom_color': {
         'name': 'Custom Color',
         'animation_name': 'custom_color',
         'description': 'Sets the color of the complete LED Strip',
-        'args': ['red', 'green', 'blue']
+        'args': ['red', 'green', 'blue'],
+        'schema': {**RGB},
     },
     'custom_fill': {
         'name': 'Custom Fill',
         'animation_name': 'custom_fill',
         'description': 'Fills a certain amount of the pixels with a given color',
-        'args': ['red', 'green', 'blue', 'percentage']
+        'args': ['red', 'green', 'blue', 'percentage'],
+        'schema': {**RGB, 'percentage': {'type': 'int', 'min': 0, 'max': 100}},
     }
 }
 
@@ -24,25 +39,36 @@ standard_animations = {
         'name': 'Rainbow Cycle',
         'animation_name': 'rainbow_cycle',
         'description': 'Smoothly transitions colors in a cyclical pattern resembling a rainbow.',
-        'args': []
+        'args': [],
+        'schema': {},
     },
     'rainbow_comet': {
         'name': 'Rainbow Comet',
         'animation_name': 'rainbow_comet',
         'description': 'Simulates a comet-like trail of rainbow colors.',
-        'args': []
+        'args': [],
+        'schema': {},
     },
     'theater_chase_rainbow': {
         'name': 'Theater Chase Rainbow',
         'animation_name': 'theater_chase_rainbow',
         'description': 'Produces a theater chase effect with a rainbow of colors.',
-        'args': []
+        'args': [],
+        'schema': {},
     },
     'rainbow_bounce': {
         'name': 'Rainbow Bounce',
         'animation_name': 'rainbow_bounce',
         'description': 'Bounce a rainbow color back and forth across the LED strip.',
         'args': [],
+        'schema': {},
+    },
+    'random_bounce': {
+        'name': 'Random Bounce',
+        'animation_name': 'random_bounce',
+        'description': 'Bounce a random color back and forth across the LED strip.',
+        'args': [],
+        'schema': {},
     },
 }
 
@@ -52,29 +78,35 @@ custom_animations = {
         'animation_name': 'custom_rainbow_cycle',
         'description': 'Draw rainbow that uniformly distributes itself across all pixels.',
         'args': ['colors'],
+        'schema': {'colors': {'type': 'list', 'items': COLOR, 'min_length': 2, 'max_length': 256}},
     },
     'color_wipe': {
         'name': 'Color Wipe',
         'animation_name': 'color_wipe',
         'description': 'Wipes the LED strip with a single color, creating a visually striking effect.',
-        'args': ['red', 'green', 'blue']
+        'args': ['red', 'green', 'blue'],
+        'schema': {**RGB},
     },
     'theater_chase': {
         'name': 'Theater Chase',
         'animation_name': 'theater_chase',
         'description': 'Creates a theater chase effect with custom colors.',
-        'args': ['red', 'green', 'blue']
+        'args': ['red', 'green', 'blue'],
+        'schema': {**RGB},
     },
     'strobe': {
         'name': 'Strobe',
         'animation_name': 'strobe',
         'description': 'Produces a strobe effect using custom colors.',
-        'args': ['red', 'green', 'blue']
+        'args': ['red', 'green', 'blue'],
+        'schema': {**RGB},
     },
     'color_chase': {
         'name': 'Color Chase',
+        'animation_name': 'color_chase',
         'description': 'Generates a chasing effect with custom colors.',
-        'args': ['red', 'green', 'blue']
+        'args': ['red', 'green', 'blue'],
+        'schema': {**RGB},
     },
 }
 
@@ -83,42 +115,73 @@ special_animations = {
         'name': 'Blink',
         'animation_name': 'blink',
         'description': 'Repeatedly blinks the LED strip with a specified color combination.',
-        'args': ['red', 'green', 'blue', 'blinking_speed']
+        'args': ['red', 'green', 'blue', 'blinking_speed'],
+        'schema': {**RGB, 'blinking_speed': SPEED},
     },
     'fade': {
         'name': 'Fade',
         'animation_name': 'fade',
         'description': 'Gradually fades the LED strip from one color to another.',
-        'args': ['from_red', 'from_green', 'from_blue', 'to_red', 'to_green', 'to_blue', 'steps', 'fading_speed']
+        'args': ['from_red', 'from_green', 'from_blue', 'to_red', 'to_green', 'to_blue', 'steps', 'fading_speed'],
+        'schema': {**FROM_RGB, **TO_RGB, 'steps': {'type': 'int', 'min': 1, 'max': 1000}, 'fading_speed': SPEED},
     },
     'sparkle': {
         'name': 'Sparkle',
         'animation_name': 'sparkle',
         'description': 'Adds sparkling effects to the LED strip by randomly illuminating individual LEDs.',
-        'args': ['red', 'green', 'blue', 'sparkle_count']
+        'args': ['red', 'green', 'blue', 'sparkle_count'],
+        'schema': {**RGB, 'sparkle_count': {'type': 'int', 'min': 0, 'max': 10000}},
     },
     'scanner_effect': {
         'name': 'Scanner Effect',
         'animation_name': 'scanner_effect',
         'description': 'Creates a scanning effect by moving a single colored pixel back and forth.',
-        'args': ['red', 'green', 'blue', 'scan_speed', 'tail_length']
+        'args': ['red', 'green', 'blue', 'scan_speed', 'tail_length'],
+        'schema': {**RGB, 'scan_speed': SPEED, 'tail_length': {'type': 'int', 'min': 1, 'max': 1000}},
     },
     'yoyo_theater': {
         'name': 'Yoyo Theater',
         'animation_name': 'yoyo_theater',
         'description': 'Creates a yoyo-like effect and lets the string colors bounce around',
-        'args': ['red', 'green', 'blue', 'yoyo_speed']
+        'args': ['red', 'green', 'blue', 'yoyo_speed'],
+        'schema': {**RGB, 'yoyo_speed': SPEED},
     },
     'breathing_effect': {
         'name': 'Breathing Effect',
         'animation_name': 'breathing_effect',
         'description': 'Create a breathing effect by gradually changing the brightness of the color.',
-        'args': ['red', 'green', 'blue', 'breathing_duration']
+        'args': ['red', 'green', 'blue', 'breathing_duration'],
+        'schema': {**RGB, 'breathing_duration': {'type': 'int', 'min': 1, 'max': 3600}},
     },
     'color_ripple': {
         'name': 'Color Ripple',
         'animation_name': 'color_ripple',
         'description': 'Create a ripple effect with a changing color.',
         'args': ['red', 'green', 'blue', 'ripple_speed'],
+        'schema': {**RGB, 'ripple_speed': SPEED},
+    },
+}
+
+audio_animations = {
+    'spectrum_bars': {
+        'name': 'Spectrum Bars',
+        'animation_name': 'spectrum_bars',
+        'description': 'Splits the LED strip into one bar per frequency band, lit up to the level of the band.',
+        'args': [],
+        'schema': {},
+    },
+    'beat_pulse': {
+        'name': 'Beat Pulse',
+        'animation_name': 'beat_pulse',
+        'description': 'Flashes the LED strip in a color on every beat and lets it fade out until the next one.',
+        'args': ['red', 'green', 'blue', 'decay'],
+        'schema': {**RGB, 'decay': {'type': 'float', 'min': 0.5, 'max': 0.99, 'default': 0.85}},
+    },
+    'energy_rainbow': {
+        'name': 'Energy Rainbow',
+        'animation_name': 'energy_rainbow',
+        'description': 'A rainbow cycling across the LED strip, the louder the music the faster it moves.',
+        'args': ['min_speed', 'max_speed'],
+        'schema': {'min_speed': {**SPEED, 'default': 10}, 'max_speed': {**SPEED, 'default': 200}},
     },
 }
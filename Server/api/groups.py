@@ -0,0 +1,160 @@
+from utils.web import Blueprint, jsonify, get_request_json
+from utils.groups import ControllerGroups
+from api import led
+
+controller_groups = None
+
+def startup():
+    """Load the persisted groups (lifecycle hook, see app.py)."""
+    global controller_groups
+    controller_groups = ControllerGroups()
+
+# Flask Blueprint
+groups_api = Blueprint('groups_api', __name__)
+
+def _load_names(data, key):
+    """Return the list of client names from the request data, or None if it is invalid."""
+    names = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(names, list) or not all(isinstance(name, str) and name for name in names):
+        return None
+    return names
+
+def _describe_group(group):
+    return {
+        'name': group,
+        'members': controller_groups.get_members(group),
+        'connected_ids': controller_groups.resolve(group, led.websocket_server),
+    }
+
+# Group management endpoints
+@groups_api.route('/led/groups', methods=['GET'])
+def get_groups():
+    """
+    Get all controller groups with their members and connected controller IDs.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    groups = [_describe_group(group) for group in controller_groups.to_dict()]
+    return jsonify(message="Groups found", data=groups), 200
+
+@groups_api.route('/led/groups/<string:group>', methods=['GET'])
+def get_group(group):
+    """
+    Get a single controller group.
+
+    Args:
+        group (str): Name of the group.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    if not controller_groups.exists(group):
+        return jsonify(message=f'Group {group} does not exist.'), 404
+    return jsonify(message="Group found", data=_describe_group(group)), 200
+
+@groups_api.route('/led/groups/<string:group>', methods=['PUT'])
+async def set_group(group):
+    """
+    Create a group or replace its members.
+    Expects a JSON body like {"members": ["upstairs-hall", "bedroom"]} with the client names.
+
+    Args:
+        group (str): Name of the group.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    names = _load_names(await get_request_json(), 'members')
+    if names is None:
+        return jsonify(message='Members must be a list of client names.'), 400
+    controller_groups.set_members(group, names)
+    return jsonify(message="Group saved", data=_describe_group(group)), 200
+
+@groups_api.route('/led/groups/<string:group>', methods=['DELETE'])
+def delete_group(group):
+    """
+    Delete a group.
+
+    Args:
+        group (str): Name of the group.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    if not controller_groups.delete(group):
+        return jsonify(message=f'Group {group} does not exist.'), 404
+    return jsonify(message="Group deleted"), 200
+
+@groups_api.route('/led/groups/<string:group>/members', methods=['GET'])
+def get_group_members(group):
+    """
+    Get the members of a group with their connected controller IDs.
+    Defined for GET as well, so the request isn't taken for an animation called 'members' by the route below.
+
+    Args:
+        group (str): Name of the group.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    if not controller_groups.exists(group):
+        return jsonify(message=f'Group {group} does not exist.'), 404
+    return jsonify(message="Members found", data=_describe_group(group)), 200
+
+@groups_api.route('/led/groups/<string:group>/members', methods=['POST'])
+async def add_group_members(group):
+    """
+    Add members to a group, creating it if needed.
+    Expects a JSON body like {"members": ["garden-left", "garden-right"]}.
+
+    Args:
+        group (str): Name of the group.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    names = _load_names(await get_request_json(), 'members')
+    if names is None:
+        return jsonify(message='Members must be a list of client names.'), 400
+    controller_groups.add_members(group, names)
+    return jsonify(message="Members added", data=_describe_group(group)), 200
+
+@groups_api.route('/led/groups/<string:group>/members/<string:name>', methods=['DELETE'])
+def remove_group_member(group, name):
+    """
+    Remove a member from a group.
+
+    Args:
+        group (str): Name of the group.
+        name (str): Client name of the member.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    if not controller_groups.remove_member(group, name):
+        return jsonify(message=f'{name} is not a member of group {group}.'), 404
+    return jsonify(message="Member removed", data=_describe_group(group)), 200
+
+# Group control endpoints
+@groups_api.route('/led/groups/<string:group>/<string:animation_name>', methods=['POST', 'GET'])
+async def start_animation_for_group(group, animation_name):
+    """
+    Start an animation, set an option or query a value for all connected members of a group.
+    Accepts the same names and arguments as /led/all/<animation_name>.
+
+    Args:
+        group (str): Name of the group.
+        animation_name (str): Name of the animation, option or request.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    if not controller_groups.exists(group):
+        return jsonify(message=f'Group {group} does not exist.'), 404
+
+    controller_ids = controller_groups.resolve(group, led.websocket_server)
+    if not controller_ids:
+        return jsonify(message="No group members connected."), 200
+
+    return await led.fan_out(animation_name, controller_ids)
@@ -1,17 +1,42 @@
 import asyncio
-import threading
+import os
 import time
+from collections import Counter
 from utils.logger import LOGGER
-from flask import Blueprint, jsonify, request, make_response, Response, abort
-from api.config import static_animations, standard_animations, custom_animations, special_animations
-from websocket.websocket_server import WebSocketServer
+from utils.web import Blueprint, jsonify, abort, request, get_request_json, SERVER_MODE, SERVER_MODE_FLASK
+from api.config import static_animations, standard_animations, custom_animations, special_animations, audio_animations
+from websocket.cluster import ClusterClient
+from websocket.websocket_server import WebSocketServer, RESPONSE_TIMEOUT, FANOUT_CONCURRENCY, HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT, SESSION_TTL
 from utils.utils import load_config
+from utils.catalog import AnimationCatalog
+from utils.schema import compile_schema
 
 _led_config = None
 websocket_server = None
 websocket_handler = None
-
-EXPECTED_WEBSOCKET_RESPONSES = {}
+fanout_handler = None
+catalog = None
+
+# Animations started on several controllers at once are scheduled this many seconds ahead,
+# so every controller receives the command before the common start time
+SYNC_START_DELAY = 0.5
+sync_start_delay = SYNC_START_DELAY
+
+# Error the client reports for brightness requests while the strip is turned off
+OFFLINE_ERROR = "The LED-Strip is turned OFF!"
+
+# Catalog of the animations until a controller advertises its own
+ANIMATION_TYPES = {
+    'static': static_animations,
+    'standard': standard_animations,
+    'custom': custom_animations,
+    'special': special_animations,
+    'audio': audio_animations
+}
+
+# Arguments of the options, the controllers accept a bool and a brightness between 0 and 255
+_validate_online_args = compile_schema({'online': {'type': 'bool'}})
+_validate_brightness_args = compile_schema({'brightness': {'type': 'int', 'min': 0, 'max': 255}})
 
 def load_led_config():
     """Load LED-specific configuration from config.json"""
@@ -39,96 +64,161 @@ def allow_duplicate_client_names():
         load_led_config()
     return _led_config.get("allow_duplicate_names", False)
 
-def websocket_server_callback(sid, response_data):
-    """
-    Callback function for WebSocket server.
-    """
-    # Check if sid is in the expected responses dictionary
-    if sid in EXPECTED_WEBSOCKET_RESPONSES:
-        EXPECTED_WEBSOCKET_RESPONSES[sid]['response_data'] = response_data
-        
+def _load_positive_number(key, default):
+    """Return a positive number from the LED configuration, falling back to the default."""
+    global _led_config
+    if not _led_config:
+        load_led_config()
+    value = _led_config.get(key, default)
+    try:
+        value = type(default)(value)
+        if value > 0:
+            return value
+    except (TypeError, ValueError):
+        pass
+    LOGGER.warning(f"Invalid {key} in config.json, defaulting to {default}.")
+    return default
+
 def initialize_websocket_handler():
     """Initialize the WebSocket server and handler."""
-    global websocket_server, websocket_handler
+    global websocket_server, websocket_handler, fanout_handler, catalog, sync_start_delay
 
     port = load_led_port()
-    websocket_server = WebSocketServer(port, websocket_server_callback)
-    websocket_thread = threading.Thread(target=lambda: asyncio.run(websocket_server.init_server()))
-    websocket_thread.start()
+    # Set by workers.py when the server runs as one of several worker processes
+    cluster_socket = os.environ.get("LED_CLUSTER_SOCKET")
+    websocket_server = WebSocketServer(
+        port,
+        allow_duplicate_client_names=allow_duplicate_client_names(),
+        response_timeout=_load_positive_number("response_timeout", RESPONSE_TIMEOUT),
+        fanout_concurrency=_load_positive_number("fanout_concurrency", FANOUT_CONCURRENCY),
+        heartbeat_interval=_load_positive_number("heartbeat_interval", HEARTBEAT_INTERVAL),
+        heartbeat_timeout=_load_positive_number("heartbeat_timeout", HEARTBEAT_TIMEOUT),
+        session_ttl=_load_positive_number("session_ttl", SESSION_TTL),
+        reuse_port=bool(cluster_socket),
+    )
+    if cluster_socket:
+        websocket_server.cluster = ClusterClient(cluster_socket, int(os.environ.get("LED_WORKER_ID", 0)), websocket_server)
+    catalog = websocket_server.catalog = AnimationCatalog(ANIMATION_TYPES)
     websocket_handler = websocket_server.get_websocket_handler()
+    fanout_handler = websocket_server.get_fanout_handler()
+    sync_start_delay = _load_positive_number("sync_start_delay", SYNC_START_DELAY)
     LOGGER.info(f"WebSocket server initialized on port {port}.")
 
-initialize_websocket_handler()
+async def startup():
+    """Create the WebSocket server and start serving the controllers (lifecycle hook, see app.py)."""
+    initialize_websocket_handler()
+    if SERVER_MODE == SERVER_MODE_FLASK:
+        # Flask runs every async view on its own event loop, so the server gets a dedicated loop in a background thread
+        websocket_server.start_in_background()
+    else:
+        # In ASGI mode the server shares the event loop that serves the API
+        await websocket_server.start()
+
+async def shutdown():
+    """Stop the WebSocket server on its event loop (lifecycle hook)."""
+    if websocket_server is not None:
+        await websocket_server.call(websocket_server.stop())
 
 # Flask Blueprint
 led_api = Blueprint('led_api', __name__)
 
 # Utility Functions
-def _add_expected_websocket_response(sid):
-    EXPECTED_WEBSOCKET_RESPONSES[sid] = {'response_data': None}
-    return EXPECTED_WEBSOCKET_RESPONSES[sid]
-
 def _check_controller_id_exists(controller_id):
     if controller_id is None:
         abort(400, description='Controller ID is required.')
 
-    connected_clients = websocket_server.get_connected_clients()
-
-    # Extract the list of client IDs
-    connected_client_ids = [client.get("id") for client in connected_clients]
-
-    if controller_id not in connected_client_ids:
+    if not websocket_server.has_client(controller_id):
         abort(404, description=f'Controller ID {controller_id} does not exist.')
 
-def _manipulate_response(flask_response: Response, response_data):
-    flask_response.data = jsonify(message=response_data).get_data()
-    flask_response.status_code = 200 if response_data.get('status') == 'success' else 500
+def _pop_start_time(data):
+    """
+    Remove the optional start time 'at' (epoch seconds on the server clock) from the request data.
 
-async def _await_response_with_timeout(controller_id, timeout=15, check_interval=1, on_timeout_callback=None):
-    awaited_response = _add_expected_websocket_response(controller_id)
+    Returns:
+        tuple: (error message, None) if it is invalid, (None, start time or None) otherwise.
+    """
+    at = data.pop('at', None) if isinstance(data, dict) else None
+    if at is not None and (not isinstance(at, (int, float)) or isinstance(at, bool)):
+        return 'Start time must be a number of seconds since the epoch.', None
+    return None, at
 
-    start_time = time.time()
+def _synchronized_start_time():
+    """Return a common start time for animations started on several controllers."""
+    return time.time() + sync_start_delay
 
-    while not awaited_response['response_data']:
-        if time.time() - start_time > timeout:
-            if on_timeout_callback:
-                on_timeout_callback(controller_id)
-            return False
+def _wants_fresh_state():
+    """Return True if the request asks for a live query instead of the cached state (?fresh=1)."""
+    return request.args.get('fresh', '').lower() in ('1', 'true', 'yes')
 
-        await asyncio.sleep(check_interval)
+def _build_cached_response(state, key):
+    """
+    Build the response of a get_* request from the cached state, in the same format the client answers with.
+    Returns None if the cache can't answer it.
+    """
+    if state is None or state.online is None or getattr(state, key) is None:
+        return None
+    if key == 'brightness' and not state.online:
+        response_data = {'status': 'error', 'message': 'Something went wrong', 'data': OFFLINE_ERROR}
+    else:
+        response_data = {'status': 'success', 'message': 'request completed', 'data': getattr(state, key)}
+    response_data.update(cached=True, updated_at=state.updated_at)
+    return response_data
 
-    return True
+def _build_response(response_data):
+    status_code = 200 if response_data.get('status') == 'success' else 500
+    return jsonify(message=response_data), status_code
 
-async def _process_response(controller_id, flask_response):
-    has_responded = await _await_response_with_timeout(controller_id)
+async def _process_response(controller_id, command):
+    """
+    Run a websocket command on the server loop and turn the client's answer into a response.
 
-    if has_responded:
-        response_data = EXPECTED_WEBSOCKET_RESPONSES.get(controller_id)['response_data']
-        _manipulate_response(flask_response, response_data)
-    else:
+    Args:
+        controller_id (int): Controller ID.
+        command (coroutine): Command of the websocket handler for that controller.
+    """
+    try:
+        response_data = await websocket_server.call(command)
+    except asyncio.TimeoutError:
         abort(400, description=f'Response timeout for Controller ID: {controller_id}. No response received.')
+    except ConnectionError:
+        abort(404, description=f'Controller ID {controller_id} disconnected before responding.')
+    return _build_response(response_data)
 
 # General LED information endpoints
 @led_api.route("/led/connected_controller", methods=['GET'])
 def get_connected_controller():
     """
-    Get the list of connected controllers.
+    Get the list of connected controllers with their heartbeat round trip times and strip sizes.
 
     Returns:
         tuple: Tuple containing JSON response and HTTP status code.
     """
-    response = websocket_server.get_connected_clients()
+    response = [
+        {**client, 'rtt': websocket_server.get_rtt(client['id']), 'strip': (websocket_server.get_capabilities(client['id']) or {}).get('strip')}
+        for client in websocket_server.get_connected_clients()
+    ]
     amount_of_clients = len(response)
     return (jsonify(message="Connected clients found", data=response), 200) if amount_of_clients > 0 else (jsonify(message="No connected clients"), 204)
 
 # LED strip control endpoints
 @led_api.route('/led/get_online_state/<int:controller_id>', methods=['GET'])
 async def get_online_state(controller_id):
+    """
+    Get the online state of the LED strip.
+    Answered from the state the client pushed, unless it is unknown or ?fresh=1 is given.
+
+    Args:
+        controller_id (int): Controller ID.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
     _check_controller_id_exists(controller_id)
-    await websocket_handler.get_online_state(controller_id)
-    flask_response = make_response(jsonify(message="Request sent"), 200)
-    await _process_response(controller_id, flask_response)
-    return flask_response
+    if not _wants_fresh_state():
+        cached_response = _build_cached_response(websocket_server.get_cached_state(controller_id), 'online')
+        if cached_response:
+            return _build_response(cached_response)
+    return await _process_response(controller_id, websocket_handler.get_online_state(controller_id))
 
 @led_api.route('/led/set_online_state/<int:controller_id>', methods=['POST'])
 async def set_online_state(controller_id):
@@ -142,17 +232,16 @@ async def set_online_state(controller_id):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    data = request.get_json()
-    online = data.get('online')
-    await websocket_handler.set_online_state(controller_id, online)
-    flask_response = make_response(jsonify(message="Command sent"), 200)
-    await _process_response(controller_id, flask_response)
-    return flask_response
+    error, data = _validate_online_args(await get_request_json())
+    if error:
+        return jsonify(message=error), 400
+    return await _process_response(controller_id, websocket_handler.set_online_state(controller_id, data['online']))
 
 @led_api.route('/led/get_brightness/<int:controller_id>', methods=['GET'])
 async def get_brightness(controller_id):
     """
     Get the brightness of the LED strip.
+    Answered from the state the client pushed, unless it is unknown or ?fresh=1 is given.
 
     Args:
         controller_id (int): Controller ID.
@@ -161,10 +250,11 @@ async def get_brightness(controller_id):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    await websocket_handler.get_brightness(controller_id)
-    flask_response = make_response(jsonify(message="Request sent"), 200)
-    await _process_response(controller_id, flask_response)
-    return flask_response
+    if not _wants_fresh_state():
+        cached_response = _build_cached_response(websocket_server.get_cached_state(controller_id), 'brightness')
+        if cached_response:
+            return _build_response(cached_response)
+    return await _process_response(controller_id, websocket_handler.get_brightness(controller_id))
 
 @led_api.route('/led/set_brightness/<int:controller_id>', methods=['POST'])
 async def set_brightness(controller_id):
@@ -178,80 +268,330 @@ async def set_brightness(controller_id):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    data = request.get_json()
-    brightness = data.get('brightness')
-    await websocket_handler.set_brightness(controller_id, brightness)
-    flask_response = make_response(jsonify(message="Command sent"), 200)
-    await _process_response(controller_id, flask_response)
-    return flask_response
+    error, data = _validate_brightness_args(await get_request_json())
+    if error:
+        return jsonify(message=error), 400
+    return await _process_response(controller_id, websocket_handler.set_brightness(controller_id, data['brightness']))
+
+@led_api.route('/led/get_metrics/<int:controller_id>', methods=['GET'])
+async def get_metrics(controller_id):
+    """
+    Get the render loop telemetry of the client: frame, show() and command handling
+    timings as percentiles over the last minute, plus the number of dropped frames.
+
+    Args:
+        controller_id (int): Controller ID.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    _check_controller_id_exists(controller_id)
+    return await _process_response(controller_id, websocket_handler.get_metrics(controller_id))
+
+@led_api.route('/led/start_recording/<int:controller_id>', methods=['POST'])
+async def start_recording(controller_id):
+    """
+    Start recording every frame the client pushes to its strip, into a file on the client that
+    can be replayed and analyzed with its replay.py. The recording stops after max_seconds,
+    or the "max_seconds" of the client's recorder config if none is given.
+
+    Args:
+        controller_id (int): Controller ID.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    _check_controller_id_exists(controller_id)
+    data = await get_request_json()
+    max_seconds = data.get('max_seconds')
+    if max_seconds is not None and (isinstance(max_seconds, bool) or not isinstance(max_seconds, (int, float)) or max_seconds <= 0):
+        return jsonify(message='max_seconds must be a positive number.'), 400
+    return await _process_response(controller_id, websocket_handler.start_recording(controller_id, max_seconds))
+
+@led_api.route('/led/stop_recording/<int:controller_id>', methods=['POST'])
+async def stop_recording(controller_id):
+    """
+    Stop the recording of the client's frames.
+
+    Args:
+        controller_id (int): Controller ID.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code, with the path, frames and bytes of the recording.
+    """
+    _check_controller_id_exists(controller_id)
+    return await _process_response(controller_id, websocket_handler.stop_recording(controller_id))
+
+@led_api.route('/led/clock_skew', methods=['GET'])
+async def get_clock_skew():
+    """
+    Get the clock synchronization of all connected controllers and the estimated skew between them.
+
+    Every controller reports its offset to the server clock, the uncertainty of that offset
+    (half the round trip time of its best sync probe) and how late it presents synchronized frames.
+    The skew bound is the spread of the median frame lateness plus the two largest uncertainties.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    controller_ids = websocket_server.get_connected_client_ids()
+    if not controller_ids:
+        return jsonify(message="No clients connected."), 200
+
+    results = await websocket_server.call(fanout_handler.get_clock(controller_ids))
+    clocks = [response['data'] for response in results.values() if response.get('status') == 'success' and isinstance(response.get('data'), dict)]
+    uncertainties = sorted((clock.get('uncertainty_ms') for clock in clocks if clock.get('uncertainty_ms') is not None), reverse=True)
+    latenesses = [clock['frame_lateness_ms']['p50'] for clock in clocks if clock.get('frame_lateness_ms', {}).get('count')]
+
+    skew = {
+        'lateness_spread_ms': round(max(latenesses) - min(latenesses), 3) if latenesses else None,
+        'clock_uncertainty_ms': round(sum(uncertainties[:2]), 3) if uncertainties else None,
+    }
+    skew['bound_ms'] = round((skew['lateness_spread_ms'] or 0) + (skew['clock_uncertainty_ms'] or 0), 3)
+    message, status_code = _consolidate_results(results)
+    return jsonify(message={**message, 'skew': skew}), status_code
 
 @led_api.route('/led/all/<string:animation_name>', methods=['POST', 'GET'])
 async def start_animation_for_all(animation_name):
     """
-    Start a certain animation for all connected clients.
+    Start a certain animation, set an option or query a value for all connected clients.
 
     Args:
-        animation_name (str): Name of the animation.
+        animation_name (str): Name of the animation, option or request.
 
     Returns:
         tuple: Tuple containing JSON response and HTTP status code.
     """
-    option_mapping = {
-        'set_online_state': websocket_handler.set_online_state,
-        'set_brightness': websocket_handler.set_brightness
-    }
+    controller_ids = websocket_server.get_connected_client_ids()
+    if not controller_ids:
+        return jsonify(message="No clients connected."), 200
 
-    animation_mapping = {
-        'static': static_animations,
-        'standard': standard_animations,
-        'custom': custom_animations,
-        'special': special_animations
+    return await fan_out(animation_name, controller_ids)
+
+async def fan_out(name, controller_ids):
+    """
+    Send a request, option or animation to several controllers in one round trip.
+
+    Args:
+        name (str): Name of the request ('get_*'), option ('set_*') or animation.
+        controller_ids (list): Ids of the controllers to address.
+
+    Returns:
+        tuple: Tuple containing the consolidated JSON response and HTTP status code.
+    """
+    request_mapping = {
+        'get_online_state': (fanout_handler.get_online_state, 'online'),
+        'get_brightness': (fanout_handler.get_brightness, 'brightness')
     }
 
-    if animation_name.startswith("get"):
-        return jsonify(message="Getting data from all controller at once, not yet implemented"), 501
+    if name in request_mapping:
+        request_func, state_key = request_mapping[name]
+        if _wants_fresh_state():
+            results = await websocket_server.call(request_func(controller_ids))
+            return _build_fanout_response(results)
+
+        # Only controllers without a cached state are queried live
+        results = {
+            controller_id: _build_cached_response(websocket_server.get_cached_state(controller_id), state_key)
+            for controller_id in controller_ids
+        }
+        uncached_ids = [controller_id for controller_id, response_data in results.items() if response_data is None]
+        if uncached_ids:
+            results.update(await websocket_server.call(request_func(uncached_ids)))
+        return _build_fanout_response(results)
+    else:
+        data = await get_request_json()
+        if not isinstance(data, dict):
+            return jsonify(message='The request body must be an object.'), 400
+        if name == 'set_online_state':
+            error, data = _validate_online_args(data)
+            if error:
+                return jsonify(message=error), 400
+            command = fanout_handler.set_online_state(controller_ids, data['online'])
+        elif name == 'set_brightness':
+            error, data = _validate_brightness_args(data)
+            if error:
+                return jsonify(message=error), 400
+            command = fanout_handler.set_brightness(controller_ids, data['brightness'])
+        else:
+            animation_type = catalog.find_type(name)
+            if not animation_type:
+                return jsonify(message='Invalid animation name.'), 400
+
+            # All controllers start at the same time on the shared clock
+            error, at = _pop_start_time(data)
+            if error:
+                return jsonify(message=error), 400
+            at = at or _synchronized_start_time()
+
+            error, data = catalog.validate(catalog.get(animation_type, name), data)
+            if error:
+                return jsonify(message=error), 400
+
+            start_animation_func = getattr(fanout_handler, f"start_{animation_type}_animation")
+            if animation_type == "standard":
+                command = start_animation_func(controller_ids, name, at=at)
+            else:
+                command = start_animation_func(controller_ids, name, data, at=at)
+
+    results = await websocket_server.call(command)
+    return _build_fanout_response(results)
+
+def _build_fanout_response(results):
+    """
+    Consolidate the responses of several controllers into one response.
+
+    'data' holds the most common value reported by the controllers, 'results' the response of each controller.
+    The status code is 200 if all controllers succeeded, 207 if only some did and 500 if none did.
+    """
+    message, status_code = _consolidate_results(results)
+    return jsonify(message=message), status_code
+
+def _consolidate_results(results):
+    """Return the consolidated message and HTTP status code for the responses of several controllers."""
+    controller_results = []
+    values = []
+    for controller_id, response_data in results.items():
+        if response_data.get('status') == 'success' and 'data' in response_data:
+            values.append(response_data['data'])
+        controller_results.append({'id': controller_id, 'name': websocket_server.get_client_name(controller_id), **response_data})
+
+    status, status_code, succeeded = _summarize_results(controller_results)
+    message = {
+        'status': status,
+        'message': f'{succeeded} of {len(controller_results)} controllers completed successfully',
+        'results': controller_results,
+    }
+    if values:
+        message['data'] = _most_common(values)
+    return message, status_code
+
+def _summarize_results(results):
+    """Return the overall status, HTTP status code and number of successful results."""
+    succeeded = sum(1 for result in results if result.get('status') == 'success')
+    if succeeded == len(results):
+        return 'success', 200, succeeded
+    if succeeded:
+        return 'partial', 207, succeeded
+    return 'error', 500, succeeded
+
+def _most_common(values):
+    try:
+        return Counter(values).most_common(1)[0][0]
+    except TypeError:  # Unhashable values
+        return values[0]
 
-    connected_clients = websocket_server.get_connected_clients()
-    
-    if not connected_clients:
-        return jsonify(message="No clients connected."), 200
-    
-    if animation_name in option_mapping:
-        func = option_mapping[animation_name]
-        return await _start_func_for_all(func=func, clients=connected_clients, request=request)
-
-    animation_type = None
-    for anim_type, anim_set in animation_mapping.items():
-        if animation_name in anim_set:
-            animation_type = anim_type
-            break
-
-    if not animation_type:
-        return jsonify(message='Invalid animation name.'), 400
+@led_api.route('/led/batch', methods=['POST'])
+async def run_batch():
+    """
+    Execute several operations on one or more controllers in a single request.
 
-    start_animation_func = getattr(websocket_handler, f"start_{animation_type}_animation")
-    if animation_type == "standard":
-        return await _start_func_for_all(func=start_animation_func, clients=connected_clients, animation_name=animation_name)
-    return await _start_func_for_all(func=start_animation_func, clients=connected_clients, animation_name=animation_name, request=request)
+    The body holds a list of operations, for example:
+        {"operations": [
+            {"controller_id": 1, "operation": "set_brightness", "args": {"brightness": 120}},
+            {"controller_id": 2, "operation": "start_animation", "animation_name": "blink",
+             "args": {"red": 255, "green": 0, "blue": 0, "blinking_speed": 2}}
+        ], "timeout": 5}
 
-async def _start_func_for_all(func, clients, animation_name=None, request=None):
-    if not clients:
-        return jsonify(message="No clients connected."), 200
+    Supported operations are get_online_state, get_brightness, set_online_state, set_brightness and start_animation.
+    All operations are validated before anything is sent, so an invalid operation rejects the whole batch.
+    Valid batches are sent concurrently and share a single deadline.
 
-    tasks = []
-    for controller_id in clients:
-        if animation_name is not None and request is not None:
-            tasks.append(func(controller_id, animation_name, request.json))
-        elif animation_name is not None and request is None:
-            tasks.append(func(controller_id, animation_name))
-        elif request is not None and animation_name is None:
-            tasks.append(func(controller_id, **request.json)) # Only used for calling option fuctions
+    Returns:
+        tuple: Tuple containing JSON response with the result of every operation and HTTP status code.
+    """
+    data = await get_request_json()
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations:
+        return jsonify(message='A non-empty list of operations is required.'), 400
+
+    timeout = data.get('timeout') if isinstance(data, dict) else None
+    if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0):
+        return jsonify(message='Timeout must be a positive number of seconds.'), 400
+
+    # Animations of one batch start together, unless an operation has its own start time
+    start_time = _synchronized_start_time()
+    requests = []
+    errors = []
+    for index, operation in enumerate(operations):
+        error, batch_request = await _build_batch_request(operation, start_time)
+        if error:
+            errors.append({'index': index, 'message': error})
         else:
-            tasks.append(func(controller_id))
+            requests.append(batch_request)
+
+    if errors:
+        return jsonify(message='Invalid operations, nothing was sent.', errors=errors), 400
+
+    responses = await websocket_server.call(websocket_server.batch_request(requests, timeout))
+    results = [
+        {'index': index, 'controller_id': controller_id, 'operation': operation['operation'], **response_data}
+        for index, ((controller_id, _), operation, response_data) in enumerate(zip(requests, operations, responses))
+    ]
 
-    await asyncio.gather(*tasks)
-    return jsonify(message="Function called for all connected clients"), 200
+    status, status_code, succeeded = _summarize_results(results)
+    return jsonify(message={
+        'status': status,
+        'message': f'{succeeded} of {len(results)} operations completed successfully',
+        'results': results,
+    }), status_code
 
+async def _build_batch_request(operation, start_time):
+    """
+    Validate a single batch operation and build its websocket request.
+    Animations start at the operation's 'at', or at the common start time of the batch.
+
+    Returns:
+        tuple: (error message, None) if the operation is invalid, (None, (controller id, message)) otherwise.
+    """
+    if not isinstance(operation, dict):
+        return 'Operation must be an object.', None
+
+    controller_id = operation.get('controller_id')
+    if not isinstance(controller_id, int) or not websocket_server.has_client(controller_id):
+        return f'Controller ID {controller_id} does not exist.', None
+
+    args = operation.get('args', {})
+    if not isinstance(args, dict):
+        return 'Arguments must be an object.', None
+
+    builder = websocket_server.get_command_builder()
+    name = operation.get('operation')
+    if name == 'get_online_state':
+        return None, await builder.get_online_state(controller_id)
+    if name == 'get_brightness':
+        return None, await builder.get_brightness(controller_id)
+    if name == 'set_online_state':
+        error, args = _validate_online_args(args)
+        if error:
+            return error, None
+        return None, await builder.set_online_state(controller_id, args['online'])
+    if name == 'set_brightness':
+        error, args = _validate_brightness_args(args)
+        if error:
+            return error, None
+        return None, await builder.set_brightness(controller_id, args['brightness'])
+    if name != 'start_animation':
+        return f'Unknown operation: {name}', None
+
+    animation_name = operation.get('animation_name')
+    animation_type = operation.get('type') or catalog.find_type(animation_name)
+    animation = catalog.get(animation_type, animation_name, controller_id)
+    if not animation:
+        return f'Invalid animation name: {animation_name}', None
+
+    error, args = catalog.validate(animation, args)
+    if error:
+        return error, None
+
+    error, at = _pop_start_time({'at': operation.get('at')})
+    if error:
+        return error, None
+
+    start_animation_func = getattr(builder, f"start_{animation_type}_animation")
+    if animation_type == "standard":
+        return None, await start_animation_func(controller_id, animation_name, at=at or start_time)
+    return None, await start_animation_func(controller_id, animation_name, args, at=at or start_time)
 
 # Animation endpoints
 @led_api.route('/led/animations/static/<string:animation_name>/<int:controller_id>', methods=['POST'])
@@ -267,17 +607,17 @@ async def start_static_animation(controller_id, animation_name):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    animation = static_animations.get(animation_name)
+    animation = catalog.get('static', animation_name, controller_id)
     if animation:
-        args = animation['args']
-        missing_args = [arg for arg in args if arg not in request.json]
-        if missing_args:
-            return jsonify(message=f'Missing arguments: {", ".join(missing_args)}'), 400
-
-        await websocket_handler.start_static_animation(controller_id, animation_name, request.json)
-        flask_response = make_response(jsonify(message="Command sent"), 200)
-        await _process_response(controller_id, flask_response)
-        return flask_response
+        data = await get_request_json()
+        error, at = _pop_start_time(data)
+        if error:
+            return jsonify(message=error), 400
+        error, data = catalog.validate(animation, data)
+        if error:
+            return jsonify(message=error), 400
+
+        return await _process_response(controller_id, websocket_handler.start_static_animation(controller_id, animation_name, data, at))
     else:
         return jsonify(message='Invalid animation name.'), 400
 
@@ -294,12 +634,12 @@ async def start_standard_animation(controller_id, animation_name):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    animation = standard_animations.get(animation_name)
+    animation = catalog.get('standard', animation_name, controller_id)
     if animation:
-        await websocket_handler.start_standard_animation(controller_id, animation_name)
-        flask_response = make_response(jsonify(message="Command sent"), 200)
-        await _process_response(controller_id, flask_response)
-        return flask_response
+        error, at = _pop_start_time(await get_request_json())
+        if error:
+            return jsonify(message=error), 400
+        return await _process_response(controller_id, websocket_handler.start_standard_animation(controller_id, animation_name, at))
     else:
         return jsonify(message='Invalid animation name.'), 400
 
@@ -316,17 +656,17 @@ async def start_custom_animation(controller_id, animation_name):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    animation = custom_animations.get(animation_name)
+    animation = catalog.get('custom', animation_name, controller_id)
     if animation:
-        args = animation['args']
-        missing_args = [arg for arg in args if arg not in request.json]
-        if missing_args:
-            return jsonify(message=f'Missing arguments: {", ".join(missing_args)}'), 400
-
-        await websocket_handler.start_custom_animation(controller_id, animation_name, request.json)
-        flask_response = make_response(jsonify(message="Command sent"), 200)
-        await _process_response(controller_id, flask_response)
-        return flask_response
+        data = await get_request_json()
+        error, at = _pop_start_time(data)
+        if error:
+            return jsonify(message=error), 400
+        error, data = catalog.validate(animation, data)
+        if error:
+            return jsonify(message=error), 400
+
+        return await _process_response(controller_id, websocket_handler.start_custom_animation(controller_id, animation_name, data, at))
     else:
         return jsonify(message='Invalid animation name.'), 400
 
@@ -343,20 +683,90 @@ async def start_special_animation(controller_id, animation_name):
         tuple: Tuple containing JSON response and HTTP status code.
     """
     _check_controller_id_exists(controller_id)
-    animation = special_animations.get(animation_name)
+    animation = catalog.get('special', animation_name, controller_id)
     if animation:
-        args = animation['args']
-        missing_args = [arg for arg in args if arg not in request.json]
-        if missing_args:
-            return jsonify(message=f'Missing arguments: {", ".join(missing_args)}'), 400
-
-        await websocket_handler.start_special_animation(controller_id, animation_name, request.json)
-        flask_response = make_response(jsonify(message="Command sent"), 200)
-        await _process_response(controller_id, flask_response)
-        return flask_response
+        data = await get_request_json()
+        error, at = _pop_start_time(data)
+        if error:
+            return jsonify(message=error), 400
+        error, data = catalog.validate(animation, data)
+        if error:
+            return jsonify(message=error), 400
+
+        return await _process_response(controller_id, websocket_handler.start_special_animation(controller_id, animation_name, data, at))
     else:
         return jsonify(message='Invalid animation name.'), 400
 
+@led_api.route('/led/animations/audio/<string:animation_name>/<int:controller_id>', methods=['POST'])
+async def start_audio_animation(controller_id, animation_name):
+    """
+    Start an audio-reactive animation on the LED strip, the controller needs an "audio" section in its config.
+
+    Args:
+        controller_id (int): Controller ID.
+        animation_name (str): Name of the audio animation.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    _check_controller_id_exists(controller_id)
+    animation = catalog.get('audio', animation_name, controller_id)
+    if animation:
+        data = await get_request_json()
+        error, at = _pop_start_time(data)
+        if error:
+            return jsonify(message=error), 400
+        error, data = catalog.validate(animation, data)
+        if error:
+            return jsonify(message=error), 400
+
+        return await _process_response(controller_id, websocket_handler.start_audio_animation(controller_id, animation_name, data, at))
+    else:
+        return jsonify(message='Invalid animation name.'), 400
+
+@led_api.route('/led/update_animation_params/<int:controller_id>', methods=['POST'])
+async def update_animation_params(controller_id):
+    """
+    Change arguments of the animation running on the LED strip without restarting it, e.g. while a color picker moves.
+    The client changes them at its next frame, or eases numbers to the new values over 'duration' seconds (optional).
+    They are checked against the schema of the animation the controller reported in its state.
+
+    The body holds the arguments to change, for example:
+        {"params": {"red": 255, "blinking_speed": 5}, "duration": 0.5}
+
+    Args:
+        controller_id (int): Controller ID.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    _check_controller_id_exists(controller_id)
+    data = await get_request_json()
+    params = data.get('params') if isinstance(data, dict) else None
+    if not isinstance(params, dict) or not params:
+        return jsonify(message='params must be a non-empty object.'), 400
+    duration = data.get('duration', 0)
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)) or duration < 0:
+        return jsonify(message='duration must be a number of seconds of at least 0.'), 400
+
+    state = websocket_server.get_cached_state(controller_id)
+    running = state.animation if state is not None else None
+    if not running:
+        return jsonify(message='No animation is running on the controller.'), 400
+    animation = catalog.get(running.get('type'), running.get('animation_name'), controller_id)
+    if not animation:
+        return jsonify(message='Invalid animation name.'), 400
+    unknown = [name for name in params if name not in animation['schema']]
+    if unknown:
+        return jsonify(message=f'Unknown arguments: {", ".join(unknown)}'), 400
+
+    # The changed arguments are normalized together with the ones the animation runs with
+    error, args = catalog.validate(animation, {**(running.get('args') or {}), **params})
+    if error:
+        return jsonify(message=error), 400
+    params = {name: args[name] for name in params}
+    return await _process_response(controller_id, websocket_handler.update_animation_params(controller_id, params, duration))
+
 # Animation information endpoints
 @led_api.route('/led/animations/static', methods=['GET'])
 def get_static_animations():
@@ -366,7 +776,7 @@ def get_static_animations():
     Returns:
         tuple: Tuple containing JSON response and HTTP status code.
     """
-    return jsonify(static_animations), 200
+    return jsonify(catalog.animations('static')), 200
 
 @led_api.route('/led/animations/standard', methods=['GET'])
 def get_standard_animations():
@@ -376,7 +786,7 @@ def get_standard_animations():
     Returns:
         tuple: Tuple containing JSON response and HTTP status code.
     """
-    return jsonify(standard_animations), 200
+    return jsonify(catalog.animations('standard')), 200
 
 @led_api.route('/led/animations/custom', methods=['GET'])
 def get_custom_animations():
@@ -386,7 +796,7 @@ def get_custom_animations():
     Returns:
         tuple: Tuple containing JSON response and HTTP status code.
     """
-    return jsonify(custom_animations), 200
+    return jsonify(catalog.animations('custom')), 200
 
 @led_api.route('/led/animations/special', methods=['GET'])
 def get_special_animations():
@@ -396,4 +806,14 @@ def get_special_animations():
     Returns:
         tuple: Tuple containing JSON response and HTTP status code.
     """
-    return jsonify(special_animations), 200
+    return jsonify(catalog.animations('special')), 200
+
+@led_api.route('/led/animations/audio', methods=['GET'])
+def get_audio_animations():
+    """
+    Get the list of audio-reactive animations.
+
+    Returns:
+        tuple: Tuple containing JSON response and HTTP status code.
+    """
+    return jsonify(catalog.animations('audio')), 200
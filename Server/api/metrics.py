@@ -0,0 +1,40 @@
+import time
+from utils.web import Blueprint, g, request
+from utils.metrics import REGISTRY, HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Flask Blueprint
+metrics_api = Blueprint('metrics_api', __name__)
+
+def _endpoint_label():
+    # Use the route endpoint rather than the path, so the number of label values stays bounded
+    return request.endpoint or "not_found"
+
+@metrics_api.before_app_request
+def start_request_timer():
+    g.metrics_start = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+
+@metrics_api.after_app_request
+def count_request(response):
+    HTTP_REQUESTS.labels(_endpoint_label(), request.method, str(response.status_code)).inc()
+    return response
+
+@metrics_api.teardown_app_request
+def stop_request_timer(exception=None):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return
+    HTTP_REQUESTS_IN_FLIGHT.dec()
+    HTTP_REQUEST_DURATION.labels(_endpoint_label(), request.method).observe(time.perf_counter() - start)
+
+@metrics_api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Get the server metrics in the Prometheus text format.
+
+    Returns:
+        tuple: Tuple containing the metrics, HTTP status code and headers.
+    """
+    return REGISTRY.render(), 200, {"Content-Type": PROMETHEUS_CONTENT_TYPE}
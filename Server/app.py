@@ -1,9 +1,22 @@
-from flask import Flask, send_file
-from flask_cors import CORS
+import time
+
+STARTED_AT = time.perf_counter()
+
+import asyncio
 import importlib
 import os
 from utils.logger import LOGGER
 from utils.utils import ROOT_DIR, load_config
+from utils.lifecycle import Lifecycle
+from utils.web import App, enable_cors, send_file, resolve, SERVER_MODE, SERVER_MODE_ASGI, SERVER_MODE_FLASK
+
+# API modules registered by create_app(), by blueprint name. A module may define startup() and shutdown()
+# hooks for its background services, they run when the app is served and never on import.
+BLUEPRINTS = {
+    "led_api": "api.led",
+    "groups_api": "api.groups",
+    "metrics_api": "api.metrics",
+}
 
 _api_config = None
 
@@ -26,45 +39,70 @@ def load_port():
         LOGGER.warning("Invalid port in config.json, defaulting to 5000.")
         return 5000
 
-def create_app():
-    app = Flask(__name__)
-    load_api_config()
+async def favicon():
+    """Handle the request for the favicon.ico file."""
+    return await resolve(send_file(
+        os.path.join(ROOT_DIR, "favicon.ico"),
+        mimetype="image/vnd.microsoft.icon",
+    ))
 
-    # Read allowed origins from config.json
-    allowed_origins = load_allowed_origins()
-    CORS(app, origins=allowed_origins)
+def create_app(blueprints: dict = None):
+    """
+    Creates the app and registers the API blueprints, without starting any service or opening a socket.
 
-    # Dynamically import and register API blueprints
-    api_directory = "api"
-    not_allowed_names = ["__init__.py", "config.py"]
+    Args:
+        blueprints (dict): Blueprint names mapped to their modules, defaults to BLUEPRINTS.
 
-    api_path = os.path.join(ROOT_DIR, api_directory)
-    api_files = [
-        file[:-3]
-        for file in os.listdir(api_path)
-        if file.endswith(".py") and file not in not_allowed_names
-    ]
+    Returns:
+        App: The Flask or Quart app, with its Lifecycle as app.lifecycle.
+    """
+    lifecycle = Lifecycle(STARTED_AT)
+    created_at = lifecycle.mark("imports", STARTED_AT)
+    app = App(__name__)
+    load_api_config()
 
-    for api_file in api_files:
-        module = importlib.import_module(f"{api_directory}.{api_file}")
-        blueprint = getattr(module, f"{api_file}_api")
-        app.register_blueprint(blueprint)
+    for blueprint_name, module_name in (BLUEPRINTS if blueprints is None else blueprints).items():
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, blueprint_name))
+        lifecycle.add(module_name, getattr(module, "startup", None), getattr(module, "shutdown", None))
 
-    return app
+    app.add_url_rule("/favicon.ico", view_func=favicon, methods=["GET"])
 
-app = create_app()
+    # In ASGI mode the hooks run on the serving event loop, Flask has no such hooks (see run())
+    if SERVER_MODE == SERVER_MODE_ASGI:
+        app.before_serving(lifecycle.startup)
+        app.after_serving(lifecycle.shutdown)
+    app.lifecycle = lifecycle
+    lifecycle.mark("create_app", created_at)
 
-@app.route("/favicon.ico", methods=["GET"])
-def favicon():
-    """Handle the request for the favicon.ico file."""
-    return send_file(
-        path_or_file=os.path.join(ROOT_DIR, "favicon.ico"),
-        mimetype="image/vnd.microsoft.icon",
-    )
+    # Read allowed origins from config.json
+    allowed_origins = load_allowed_origins()
+    return enable_cors(app, allowed_origins)
+
+def run(app):
+    """Serves the app on the configured port until it is stopped."""
+    port = load_port()
+    LOGGER.info(f"Starting API in '{SERVER_MODE}' mode.")
+    if SERVER_MODE == SERVER_MODE_FLASK:
+        # Flask serves from worker threads, the services start on their own event loop before it
+        asyncio.run(app.lifecycle.startup())
+        try:
+            app.run(host="0.0.0.0", port=port)
+        finally:
+            asyncio.run(app.lifecycle.shutdown())
+    else:
+        app.run(host="0.0.0.0", port=port)
+
+def __getattr__(name):
+    # The app is created on first access (`from app import app`, `hypercorn asgi:app`), so importing
+    # this module for tooling or tests doesn't import the API modules
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     try:
-        port = load_port()
-        app.run(host="0.0.0.0", port=port)
+        run(create_app())
     except Exception as e:
         LOGGER.error(f"An error occurred: {e}")
@@ -0,0 +1,11 @@
+"""
+ASGI entry point, serving the API and the WebSocket server from a single event loop.
+
+Run with an ASGI server, for example:
+    hypercorn asgi:app --bind 0.0.0.0:5000
+"""
+import os
+
+os.environ["LED_SERVER_MODE"] = "asgi"
+
+from app import app
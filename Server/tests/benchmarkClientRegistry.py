@@ -0,0 +1,105 @@
+"""
+Benchmark of the client registry against the previous linear scans.
+
+Simulates a number of connected clients and measures lookups by id and name,
+sends and disconnects, once through ClientRegistry and once through a list of
+dicts scanned the way WebSocketServer used to.
+
+Usage (from the Server directory):
+    python tests/benchmarkClientRegistry.py --clients 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket.client_registry import ClientRegistry
+
+class FakeWebSocket:
+    async def send(self, message):
+        pass
+
+def timed(func, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def timed_async(func, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        await func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def main(args):
+    websockets = [FakeWebSocket() for _ in range(args.clients)]
+    ids = [id(ws) for ws in websockets]
+    names = [f"controller-{i}" for i in range(args.clients)]
+    targets = [random.randrange(args.clients) for _ in range(args.operations)]
+    payload = json.dumps({"event": "request", "request_name": "get_brightness", "data": {}})
+
+    # Previous layout: list of dicts plus the server's websocket set
+    clients_list = [{"id": sid, "name": name} for sid, name in zip(ids, names)]
+    server_websockets = set(websockets)
+
+    registry = ClientRegistry()
+    for sid, ws, name in zip(ids, websockets, names):
+        registry.add(sid, ws, name)
+
+    async def list_send(i):
+        sid = ids[targets[i]]
+        websocket = next((ws for ws in server_websockets if id(ws) == sid), None)
+        await websocket.send(payload)
+
+    async def registry_send(i):
+        await registry.get(ids[targets[i]]).websocket.send(payload)
+
+    results = {
+        "clients": args.clients,
+        "operations": args.operations,
+        "lookup_by_id_us": {
+            "list": timed(lambda i: ids[targets[i]] in [c["id"] for c in clients_list], args.operations),
+            "registry": timed(lambda i: ids[targets[i]] in registry, args.operations),
+        },
+        "lookup_by_name_us": {
+            "list": timed(lambda i: next(c for c in clients_list if c["name"] == names[targets[i]]), args.operations),
+            "registry": timed(lambda i: registry.first_by_name(names[targets[i]]), args.operations),
+        },
+        "send_us": {
+            "list": await timed_async(list_send, args.operations),
+            "registry": await timed_async(registry_send, args.operations),
+        },
+    }
+
+    # Disconnect every client once
+    order = list(range(args.clients))
+    random.shuffle(order)
+    start = time.perf_counter()
+    for index in order:
+        sid = ids[index]
+        client = next((c for c in clients_list if c["id"] == sid), None)
+        clients_list.remove(client)
+        next((ws for ws in server_websockets if id(ws) == sid), None)
+    list_disconnect = (time.perf_counter() - start) / args.clients * 1e6
+
+    start = time.perf_counter()
+    for index in order:
+        registry.remove(ids[index])
+    registry_disconnect = (time.perf_counter() - start) / args.clients * 1e6
+    results["disconnect_us"] = {"list": list_disconnect, "registry": registry_disconnect}
+
+    for key, value in results.items():
+        if isinstance(value, dict):
+            results[key] = {name: round(us, 3) for name, us in value.items()}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the client registry")
+    parser.add_argument("--clients", type=int, default=10000, help="Number of simulated connections")
+    parser.add_argument("--operations", type=int, default=2000, help="Lookups and sends per measurement")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,131 @@
+"""
+Benchmark of the server's cold start, in both server modes.
+
+For every run it measures, each in a fresh interpreter:
+  * importing app.py and creating the app (`from app import app`), and checks that neither
+    opened a socket: importing the app for tooling or tests must not bind any port,
+  * starting app.py until the API and the websocket port accept connections, and the
+    startup phases the server reports in the led_server_startup_seconds metric.
+Medians of the runs are printed as JSON.
+
+Usage (from the Server directory):
+    python tests/benchmarkColdStart.py --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fleetHarness import SERVER_DIR, free_port, http_request
+
+# Run in a fresh interpreter: times the import and the app creation and lists the sockets the process owns
+IMPORT_PROBE = """
+import json, os, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app
+created = time.perf_counter()
+sockets = 0
+for fd in os.listdir('/proc/self/fd'):
+    try:
+        sockets += os.readlink(f'/proc/self/fd/{fd}').startswith('socket:')
+    except OSError:  # the directory listing's own descriptor
+        pass
+print(json.dumps({'import_s': imported - start, 'create_app_s': created - imported, 'sockets': sockets}))
+"""
+
+def write_config(mode, api_port, ws_port):
+    config = {
+        "api": {"allowed_origins": [], "port": api_port, "server_mode": mode},
+        "websocket": {"port": ws_port},
+    }
+    config_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    with config_file:
+        json.dump(config, config_file)
+    return config_file.name
+
+def measure_import(mode, config_path):
+    env = dict(os.environ, LED_SERVER_MODE=mode, LED_CONFIG_PATH=config_path)
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=SERVER_DIR, env=env, stdin=subprocess.DEVNULL,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+async def wait_until_open(port, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return time.perf_counter()
+        except OSError:
+            await asyncio.sleep(0.005)
+    raise RuntimeError(f"Port {port} did not open in time")
+
+def parse_startup_metrics(text):
+    phases = {}
+    for line in text.splitlines():
+        if line.startswith("led_server_startup_seconds{"):
+            labels, _, value = line.rpartition(" ")
+            phases[labels.split('"')[1]] = float(value)
+    return phases
+
+async def measure_start(mode, config_path, api_port, ws_port, timeout):
+    env = dict(os.environ, LED_SERVER_MODE=mode, LED_CONFIG_PATH=config_path)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        api_open, ws_open = await asyncio.gather(wait_until_open(api_port, deadline), wait_until_open(ws_port, deadline))
+        _, body = await http_request(api_port, "GET", "/metrics")
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        "api_ready_s": api_open - start,
+        "websocket_ready_s": ws_open - start,
+        "phases": parse_startup_metrics(body.decode()),
+    }
+
+def median(values):
+    return round(statistics.median(values), 4)
+
+async def benchmark_mode(mode, args):
+    imports, starts = [], []
+    for _ in range(args.runs):
+        api_port, ws_port = free_port(), free_port()
+        config_path = write_config(mode, api_port, ws_port)
+        try:
+            imports.append(measure_import(mode, config_path))
+            starts.append(await measure_start(mode, config_path, api_port, ws_port, args.timeout))
+        finally:
+            os.unlink(config_path)
+    phases = sorted({phase for start in starts for phase in start["phases"]})
+    return {
+        "mode": mode,
+        "runs": args.runs,
+        "import_s": median([result["import_s"] for result in imports]),
+        "create_app_s": median([result["create_app_s"] for result in imports]),
+        "sockets_opened_on_import": max(result["sockets"] for result in imports),
+        "api_ready_s": median([start["api_ready_s"] for start in starts]),
+        "websocket_ready_s": median([start["websocket_ready_s"] for start in starts]),
+        "reported_phases_s": {phase: median([start["phases"].get(phase, 0) for start in starts]) for phase in phases},
+    }
+
+async def main(args):
+    results = [await benchmark_mode(mode, args) for mode in args.modes]
+    print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold start of the server")
+    parser.add_argument("--modes", nargs="+", default=["flask", "asgi"], choices=["flask", "asgi"], help="Server modes to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per mode")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for the ports to open")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Benchmark of the multi-process server (workers.py) with an increasing number of workers.
+
+For every worker count the server is started with a fleet of fake controllers, then several
+load generator processes fire REST requests for a fixed duration. By default half of the
+requests are answered from the state cache and half are live queries, which are routed to
+the worker holding the controller's connection. Requests/s, latency percentiles and the
+speedup over a single worker are printed as JSON.
+
+The load generators need CPU time as well, so run it on a host with more cores than workers.
+
+Usage (from the Server directory):
+    python tests/benchmarkWorkers.py --workers 1 2 4 --clients 200 --duration 10 --generators 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fleetHarness import WORKLOADS, ServerProcess, FakeController, http_request, parse_workload, summarize_latencies
+
+def generate_load(api_port, controller_ids, workload, duration, concurrency):
+    """Runs in a generator process: fires requests for duration seconds, returns (errors, latencies)."""
+    names, weights = parse_workload(workload)
+
+    async def generate():
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def loop():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                method, path, body = WORKLOADS[random.choices(names, weights)[0]]
+                start = time.perf_counter()
+                try:
+                    status, _ = await http_request(api_port, method, path.format(id=random.choice(controller_ids)), body() if body else None)
+                    if status != 200:
+                        errors += 1
+                except OSError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+        return errors, latencies
+
+    return asyncio.run(generate())
+
+async def run_workers(worker_count, pool, args):
+    async with ServerProcess("asgi", {"response_timeout": 5}, workers=worker_count) as server:
+        stop_event = asyncio.Event()
+        controllers = [FakeController(f"bench-{i}", server.ws_port, 0, 0, 0, 0) for i in range(args.clients)]
+        tasks = [asyncio.create_task(controller.run(stop_event)) for controller in controllers]
+        await asyncio.wait_for(asyncio.gather(*(controller.connected.wait() for controller in controllers)), timeout=60)
+        # Give the broker time to replicate every registration to all workers
+        await asyncio.sleep(1)
+        controller_ids = [controller.controller_id for controller in controllers]
+
+        loop = asyncio.get_running_loop()
+        jobs = [
+            pool.apply_async(generate_load, (server.api_port, controller_ids, args.workload, args.duration, args.concurrency))
+            for _ in range(args.generators)
+        ]
+        results = await asyncio.gather(*(loop.run_in_executor(None, job.get) for job in jobs))
+
+        stop_event.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [latency for _, values in results for latency in values]
+    return {
+        "workers": worker_count,
+        "requests": len(latencies),
+        "errors": sum(errors for errors, _ in results),
+        "requests_per_second": round(len(latencies) / args.duration, 1),
+        "latency": summarize_latencies(latencies),
+    }
+
+async def main(args, pool):
+    results = []
+    for worker_count in args.workers:
+        results.append(await run_workers(worker_count, pool, args))
+    baseline = results[0]["requests_per_second"] / results[0]["workers"]
+    for result in results:
+        result["speedup"] = round(result["requests_per_second"] / baseline, 2) if baseline else None
+        result["efficiency"] = round(result["speedup"] / result["workers"], 2) if baseline else None
+    print(json.dumps({"cpus": os.cpu_count(), "clients": args.clients, "workload": args.workload, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the server with several worker processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--clients", type=int, default=200, help="Number of fake controllers")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per worker count")
+    parser.add_argument("--generators", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per generator")
+    parser.add_argument("--workload", default="get_brightness=1,get_brightness_fresh=1", help="Weighted REST workload")
+    args = parser.parse_args()
+    # Fork the generators before any event loop exists
+    with multiprocessing.Pool(args.generators) as pool:
+        asyncio.run(main(args, pool))
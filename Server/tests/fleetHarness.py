@@ -0,0 +1,358 @@
+"""
+Load test harness simulating a fleet of controllers on localhost.
+
+Starts the server with a temporary config, connects N fake controllers that speak the real
+client protocol (handshake, session, state pushes, heartbeats, requests and commands) and
+drives a weighted REST workload against the API. Throughput, latency percentiles, timeouts
+and the memory growth of the server process are printed as JSON.
+
+The fake controllers answer after a configurable delay, fail a share of the messages with an
+error response and can drop a share of them entirely, which the server sees as timeouts.
+
+Usage (from the Server directory):
+    python tests/fleetHarness.py --clients 200 --requests 5000 --concurrency 50 --delay-ms 5 --failure-rate 0.01 --drop-rate 0.001
+    python tests/fleetHarness.py --mode asgi --workload get_brightness=1,all_get_brightness=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import websockets
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (method, path, body), with {id} replaced by a random connected controller id
+WORKLOADS = {
+    "get_brightness": ("GET", "/led/get_brightness/{id}", None),
+    "get_brightness_fresh": ("GET", "/led/get_brightness/{id}?fresh=1", None),
+    "get_online_state": ("GET", "/led/get_online_state/{id}", None),
+    "set_brightness": ("POST", "/led/set_brightness/{id}", lambda: {"brightness": random.randint(1, 255)}),
+    "all_get_brightness": ("GET", "/led/all/get_brightness?fresh=1", None),
+    "connected": ("GET", "/led/connected_controller", None),
+    "metrics": ("GET", "/metrics", None),
+}
+DEFAULT_WORKLOAD = "get_brightness=4,get_brightness_fresh=4,set_brightness=2,connected=1"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize_latencies(latencies):
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+def read_rss_kb(pid):
+    """Returns the resident memory of a process and its children in kB (Linux only), or None."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as status_file:
+            rss = next(int(line.split()[1]) for line in status_file if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as children_file:
+            children = children_file.read().split()
+    except OSError:
+        children = []
+    return rss + sum(read_rss_kb(int(child)) or 0 for child in children)
+
+def parse_workload(spec):
+    """Parses 'name=weight,...' into a list of names and a list of weights."""
+    names, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS:
+            raise SystemExit(f"Unknown workload '{name}', choose from {', '.join(WORKLOADS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+class FakeController:
+    """
+    Connects like the real client and answers requests and commands in order, after a delay.
+    """
+
+    def __init__(self, name, ws_port, delay, jitter, failure_rate, drop_rate):
+        self.name = name
+        self.ws_port = ws_port
+        self.delay = delay
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.client_id = str(uuid.uuid4())
+        self.state = {"online": True, "brightness": 255, "animation": None}
+        self.controller_id = None
+        self.connected = asyncio.Event()
+        self.messages = asyncio.Queue()
+        self.answered = 0
+        self.failed = 0
+        self.dropped = 0
+
+    async def run(self, stop_event):
+        async with websockets.connect(f"ws://127.0.0.1:{self.ws_port}", ping_interval=None, max_queue=None) as websocket:
+            await websocket.send(json.dumps({"name": self.name, "client_id": self.client_id}))
+            worker = asyncio.create_task(self.answer(websocket))
+            try:
+                while not stop_event.is_set():
+                    try:
+                        message = await asyncio.wait_for(websocket.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    data = json.loads(message)
+                    event = data.get("event")
+                    if event == "heartbeat":
+                        await websocket.send(json.dumps({"event": "heartbeat", "sent_at": data.get("sent_at")}))
+                    elif event == "session":
+                        self.controller_id = data.get("id")
+                        await websocket.send(json.dumps({"event": "state", "data": self.state}))
+                        self.connected.set()
+                    else:
+                        self.messages.put_nowait(data)
+            finally:
+                worker.cancel()
+
+    async def answer(self, websocket):
+        """Answers requests and commands one after another, like the real client."""
+        while True:
+            data = await self.messages.get()
+            delay = max(0.0, random.gauss(self.delay, self.jitter)) if self.jitter else self.delay
+            if delay:
+                await asyncio.sleep(delay)
+            roll = random.random()
+            if roll < self.drop_rate:
+                self.dropped += 1
+                continue
+            if roll < self.drop_rate + self.failure_rate:
+                self.failed += 1
+                await websocket.send(json.dumps({"status": "error", "message": "Something went wrong"}))
+                continue
+
+            self.answered += 1
+            name = data.get("request_name") or data.get("command_name")
+            if name == "get_brightness":
+                response = {"status": "success", "message": "request completed", "data": self.state["brightness"]}
+            elif name == "get_online_state":
+                response = {"status": "success", "message": "request completed", "data": self.state["online"]}
+            else:
+                response = {"status": "success", "message": "command completed", "data": True}
+            if name == "set_brightness":
+                # The changed state is sent along with the answer, like the client does
+                self.state["brightness"] = (data.get("data") or {}).get("brightness", self.state["brightness"])
+                response["state"] = self.state
+            await websocket.send(json.dumps(response))
+
+async def http_request(port, method, path, body=None):
+    """Minimal HTTP/1.1 client, returns (status_code, body)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\nContent-Length: {len(payload)}\r\n"
+    if body is not None:
+        headers += "Content-Type: application/json\r\n"
+    writer.write(headers.encode() + b"\r\n" + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    return int(status_line.split()[1]), rest.partition(b"\r\n\r\n")[2]
+
+async def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Port {port} did not open within {timeout}s")
+
+class ServerProcess:
+    """
+    Runs app.py, or workers.py if a worker count is given, in a subprocess
+    with a temporary config on free localhost ports.
+    """
+
+    def __init__(self, mode, websocket_config=None, workers=None):
+        self.mode = mode
+        self.workers = workers
+        self.api_port = free_port()
+        self.ws_port = free_port()
+        self.websocket_config = websocket_config or {}
+        self.process = None
+        self.config_path = None
+
+    async def __aenter__(self):
+        config = {
+            "api": {"allowed_origins": [], "port": self.api_port, "server_mode": self.mode},
+            "websocket": {"port": self.ws_port, "allow_duplicate_names": True, **self.websocket_config},
+        }
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        with config_file:
+            json.dump(config, config_file)
+        self.config_path = config_file.name
+        env = dict(os.environ, LED_SERVER_MODE=self.mode, LED_CONFIG_PATH=self.config_path)
+        command = ["workers.py", "--workers", str(self.workers)] if self.workers else ["app.py"]
+        self.process = subprocess.Popen([sys.executable, *command], cwd=SERVER_DIR, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        await wait_for_port(self.api_port)
+        await wait_for_port(self.ws_port)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+        os.unlink(self.config_path)
+
+    def rss_kb(self):
+        return read_rss_kb(self.process.pid)
+
+async def connect_fleet(server, args, stop_event):
+    """Connects the fake controllers in batches and returns them with their tasks."""
+    controllers = [
+        FakeController(f"fleet-{i}", server.ws_port, args.delay_ms / 1000, args.jitter_ms / 1000, args.failure_rate, args.drop_rate)
+        for i in range(args.clients)
+    ]
+    tasks = []
+    for start in range(0, len(controllers), 50):
+        batch = controllers[start:start + 50]
+        tasks.extend(asyncio.create_task(controller.run(stop_event)) for controller in batch)
+        await asyncio.wait_for(asyncio.gather(*(controller.connected.wait() for controller in batch)), timeout=30)
+    return controllers, tasks
+
+async def run_workload(server, controller_ids, args):
+    names, weights = parse_workload(args.workload)
+    choices = random.choices(names, weights, k=args.requests)
+    latencies = {name: [] for name in names}
+    statuses = {}
+    timeouts = 0
+    transport_errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def single(name):
+        nonlocal timeouts, transport_errors
+        method, path, body = WORKLOADS[name]
+        path = path.format(id=random.choice(controller_ids))
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status, _ = await asyncio.wait_for(http_request(server.api_port, method, path, body() if body else None), args.http_timeout)
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 400:
+                    # The API answers 400 when a controller doesn't respond in time
+                    timeouts += 1
+            except asyncio.TimeoutError:
+                timeouts += 1
+            except OSError:
+                transport_errors += 1
+            latencies[name].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(single(name) for name in choices))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "latency": summarize_latencies(all_latencies),
+        "latency_by_workload": {name: summarize_latencies(values) for name, values in latencies.items()},
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "timeouts": timeouts,
+        "transport_errors": transport_errors,
+    }
+
+async def run_fleet(args):
+    websocket_config = {"response_timeout": args.response_timeout}
+    async with ServerProcess(args.mode, websocket_config, args.workers) as server:
+        rss_start = server.rss_kb()
+        stop_event = asyncio.Event()
+        controllers, tasks = await connect_fleet(server, args, stop_event)
+        rss_connected = server.rss_kb()
+
+        controller_ids = [controller.controller_id for controller in controllers]
+        rss_peak = rss_connected or 0
+
+        async def sample_memory():
+            nonlocal rss_peak
+            while True:
+                await asyncio.sleep(0.5)
+                rss_peak = max(rss_peak, server.rss_kb() or 0)
+
+        sampler = asyncio.create_task(sample_memory())
+        result = await run_workload(server, controller_ids, args)
+        sampler.cancel()
+        rss_end = server.rss_kb()
+
+        stop_event.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "mode": args.mode,
+        "workers": args.workers,
+        "clients": args.clients,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "workload": args.workload,
+        "controller_delay_ms": args.delay_ms,
+        "controller_failure_rate": args.failure_rate,
+        "controller_drop_rate": args.drop_rate,
+        **result,
+        "controller_answers": {
+            "answered": sum(controller.answered for controller in controllers),
+            "failed": sum(controller.failed for controller in controllers),
+            "dropped": sum(controller.dropped for controller in controllers),
+        },
+        "memory_kb": {
+            "start": rss_start,
+            "fleet_connected": rss_connected,
+            "end": rss_end,
+            "peak": rss_peak or None,
+            "growth_during_workload": rss_end - rss_connected if rss_end and rss_connected else None,
+        },
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of controllers and load test the server")
+    parser.add_argument("--mode", default="flask", choices=["flask", "asgi"], help="Server mode")
+    parser.add_argument("--workers", type=int, help="Run workers.py with this many worker processes instead of app.py")
+    parser.add_argument("--clients", type=int, default=100, help="Number of fake controllers")
+    parser.add_argument("--requests", type=int, default=5000, help="Total number of REST requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent REST requests")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD, help=f"Weighted REST workload, from: {', '.join(WORKLOADS)}")
+    parser.add_argument("--delay-ms", type=float, default=2, help="Mean response delay of the controllers")
+    parser.add_argument("--jitter-ms", type=float, default=1, help="Standard deviation of the response delay")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of messages answered with an error")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of messages never answered")
+    parser.add_argument("--response-timeout", type=float, default=2, help="Server response timeout in seconds")
+    parser.add_argument("--http-timeout", type=float, default=30, help="Client side timeout of a REST request")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    report = asyncio.run(run_fleet(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
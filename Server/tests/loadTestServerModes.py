@@ -0,0 +1,75 @@
+"""
+Load test comparing the 'flask' and 'asgi' server modes.
+
+Starts the server once per mode, connects a number of fake controllers that answer every
+request immediately and fires concurrent GET /led/get_brightness/<id> requests against it.
+Requests per second and latency percentiles are printed as JSON.
+
+Usage (from the Server directory):
+    python tests/loadTestServerModes.py --clients 20 --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fleetHarness import ServerProcess, FakeController, http_request, percentile
+
+async def run_mode(mode, args):
+    async with ServerProcess(mode) as server:
+        stop_event = asyncio.Event()
+        controllers = [FakeController(f"loadtest-{i}", server.ws_port, 0, 0, 0, 0) for i in range(args.clients)]
+        tasks = [asyncio.create_task(controller.run(stop_event)) for controller in controllers]
+        await asyncio.wait_for(asyncio.gather(*(controller.connected.wait() for controller in controllers)), timeout=30)
+        controller_ids = [controller.controller_id for controller in controllers]
+
+        latencies = []
+        errors = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def single(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    status, _ = await http_request(server.api_port, "GET", f"/led/get_brightness/{controller_ids[i % len(controller_ids)]}")
+                    if status != 200:
+                        errors += 1
+                except OSError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(single(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        stop_event.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": args.requests,
+        "errors": errors,
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+async def main(args):
+    results = []
+    for mode in args.modes:
+        results.append(await run_mode(mode, args))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare server modes under load")
+    parser.add_argument("--clients", type=int, default=20, help="Number of fake controllers")
+    parser.add_argument("--requests", type=int, default=2000, help="Total number of REST requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent REST requests")
+    parser.add_argument("--modes", nargs="+", default=["flask", "asgi"], help="Server modes to compare")
+    asyncio.run(main(parser.parse_args()))
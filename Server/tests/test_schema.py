@@ -0,0 +1,104 @@
+"""
+Tests of the argument schemas compiled by utils/schema.py: coercion of valid values, rejection of invalid ones
+and the messages the API answers invalid arguments with.
+
+Run from the Server directory:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.config import static_animations, standard_animations, custom_animations, special_animations, audio_animations, CHANNEL, COLOR, SPEED
+from utils.schema import compile_field, compile_schema
+
+@pytest.mark.parametrize('value, expected', [(0, 0), (255, 255), (12.0, 12), ('12', 12), (' 7 ', 7)])
+def test_int_coerces(value, expected):
+    assert compile_field(CHANNEL)(value) == expected
+
+@pytest.mark.parametrize('value', [-1, 256, True, False, 12.5, '12.5', 'abc', None, [1]])
+def test_int_rejects(value):
+    with pytest.raises(ValueError, match='must be an integer between 0 and 255'):
+        compile_field(CHANNEL)(value)
+
+def test_int_range_messages():
+    with pytest.raises(ValueError, match='must be an integer of at least 1$'):
+        compile_field({'type': 'int', 'min': 1})(0)
+    with pytest.raises(ValueError, match='must be an integer of at most 9$'):
+        compile_field({'type': 'int', 'max': 9})(10)
+    with pytest.raises(ValueError, match='must be an integer$'):
+        compile_field({'type': 'int'})('x')
+
+@pytest.mark.parametrize('value, expected', [(1, 1.0), (0.5, 0.5), ('0.25', 0.25)])
+def test_float_coerces(value, expected):
+    coerce = compile_field({'type': 'float', 'min': 0, 'max': 1})
+    assert coerce(value) == expected
+    assert isinstance(coerce(value), float)
+
+@pytest.mark.parametrize('value', [True, -0.1, 1.5, 'half', None])
+def test_float_rejects(value):
+    with pytest.raises(ValueError, match='must be a number between 0 and 1'):
+        compile_field({'type': 'float', 'min': 0, 'max': 1})(value)
+
+@pytest.mark.parametrize('value, expected', [(True, True), (False, False), (1, True), (0, False), ('true', True), (' False ', False)])
+def test_bool_coerces(value, expected):
+    assert compile_field({'type': 'bool'})(value) is expected
+
+@pytest.mark.parametrize('value', [2, 'yes', '', None, [True]])
+def test_bool_rejects(value):
+    with pytest.raises(ValueError, match='must be true or false'):
+        compile_field({'type': 'bool'})(value)
+
+def test_list_coerces_items():
+    assert compile_field(COLOR)(['255', 0.0, 7]) == [255, 0, 7]
+    assert compile_field(COLOR)((1, 2, 3)) == [1, 2, 3]
+
+@pytest.mark.parametrize('value', [[1, 2], [1, 2, 3, 4], 'abc', None, {'red': 1}])
+def test_list_rejects_length_and_type(value):
+    with pytest.raises(ValueError, match='must be a list of 3 to 3 items'):
+        compile_field(COLOR)(value)
+
+def test_list_names_invalid_item():
+    with pytest.raises(ValueError, match='item 1 must be an integer between 0 and 255'):
+        compile_field(COLOR)([0, 300, 0])
+
+def test_nested_list_names_invalid_item():
+    colors = compile_field({'type': 'list', 'items': COLOR, 'min_length': 2})
+    with pytest.raises(ValueError, match='item 1 item 2 must be an integer'):
+        colors([[0, 0, 0], [0, 0, 'x']])
+
+def test_schema_normalizes_and_drops_unknown_arguments():
+    validate = compile_schema({'red': CHANNEL, 'speed': SPEED})
+    assert validate({'red': '200', 'speed': 5.0, 'unknown': 1}) == (None, {'red': 200, 'speed': 5})
+
+def test_schema_fills_defaults():
+    validate = compile_schema({'decay': {'type': 'float', 'min': 0.5, 'max': 0.99, 'default': 0.85}})
+    assert validate({}) == (None, {'decay': 0.85})
+    assert validate({'decay': '0.9'}) == (None, {'decay': 0.9})
+
+def test_schema_reports_missing_arguments():
+    validate = compile_schema({'red': CHANNEL, 'green': CHANNEL, 'blue': CHANNEL})
+    assert validate({'green': 0}) == ('Missing arguments: red, blue', None)
+
+def test_schema_reports_every_invalid_argument():
+    validate = compile_schema({'red': CHANNEL, 'green': CHANNEL, 'speed': SPEED})
+    error, normalized = validate({'red': 256, 'green': 'x', 'speed': 0})
+    assert normalized is None
+    assert error == ('Invalid arguments: red must be an integer between 0 and 255; green must be an integer between 0 and 255; '
+                     'speed must be an integer between 1 and 1000')
+
+@pytest.mark.parametrize('args', [None, [], 'red', 1])
+def test_schema_rejects_arguments_that_are_no_object(args):
+    assert compile_schema({})(args) == ('Arguments must be an object.', None)
+
+def test_fallback_catalog_schemas_compile():
+    catalogs = (static_animations, standard_animations, custom_animations, special_animations, audio_animations)
+    for animations in catalogs:
+        for animation_name, entry in animations.items():
+            required = [name for name, spec in entry['schema'].items() if 'default' not in spec]
+            assert set(required) <= set(entry['args']), animation_name
+            error, _ = compile_schema(entry['schema'])({})
+            assert error == (f'Missing arguments: {", ".join(required)}' if required else None), animation_name
@@ -0,0 +1,105 @@
+import json
+from utils.logger import LOGGER
+from utils.schema import compile_schema
+
+ANIMATION_TYPES = ("static", "standard", "custom", "special", "audio")
+
+class AnimationCatalog:
+    """
+    Animations the connected controllers can run, as advertised in their handshake.
+
+    The catalog is the union of the animations of all controllers that advertised theirs, or the
+    fallback (api/config.py) while none did. Requests to a single controller are checked against its
+    own entries, so controllers running different versions can coexist.
+    """
+
+    def __init__(self, fallback: dict):
+        """
+        Initializes an AnimationCatalog.
+
+        Args:
+            fallback (dict): Animations by type and name, used while no controller advertised its animations.
+        """
+        self.fallback = fallback
+        self.advertised = {}  # controller id -> animations by type and name
+        self._merged = fallback
+        self._validators = {}  # schema as JSON -> compiled validator
+
+    def _parse(self, animations) -> dict:
+        """Keeps the entries of an advertised catalog with a valid schema."""
+        if not isinstance(animations, dict):
+            return None
+        parsed = {}
+        for animation_type in ANIMATION_TYPES:
+            entries = animations.get(animation_type)
+            parsed[animation_type] = {}
+            for name, entry in (entries.items() if isinstance(entries, dict) else ()):
+                if not isinstance(entry, dict) or not isinstance(entry.get("schema"), dict):
+                    continue
+                try:
+                    self.validator(entry)
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    LOGGER.warning(f"Ignoring animation {name} with an invalid schema")
+                    continue
+                parsed[animation_type][name] = {**entry, "animation_name": name, "args": list(entry["schema"])}
+        return parsed
+
+    def _merge(self):
+        if not self.advertised:
+            self._merged = self.fallback
+            return
+        merged = {animation_type: {} for animation_type in ANIMATION_TYPES}
+        for animations in self.advertised.values():
+            for animation_type, entries in animations.items():
+                merged[animation_type].update(entries)
+        self._merged = merged
+
+    def add(self, sid: int, animations):
+        """Adds the animations a controller advertised, ignoring controllers that advertised none."""
+        parsed = self._parse(animations)
+        if parsed is None:
+            return
+        self.advertised[sid] = parsed
+        self._merge()
+        LOGGER.info(f"Controller {sid} advertised {sum(len(entries) for entries in parsed.values())} animations")
+
+    def remove(self, sid: int):
+        if self.advertised.pop(sid, None) is not None:
+            self._merge()
+
+    def animations(self, animation_type: str) -> dict:
+        """Returns the animations of a type by name."""
+        return self._merged.get(animation_type, {})
+
+    def find_type(self, animation_name: str) -> str:
+        """Returns the type of an animation, or None if no controller has it."""
+        return next((animation_type for animation_type in ANIMATION_TYPES if animation_name in self.animations(animation_type)), None)
+
+    def get(self, animation_type: str, animation_name: str, sid: int = None) -> dict:
+        """
+        Returns the entry of an animation, or None if it doesn't exist.
+        If sid is given, only the animations of that controller are considered: the ones it advertised,
+        or the fallback for controllers that don't advertise theirs.
+        """
+        if sid is None:
+            animations = self._merged
+        else:
+            animations = self.advertised.get(sid, self.fallback)
+        return animations.get(animation_type, {}).get(animation_name)
+
+    def validator(self, entry: dict):
+        """Returns the compiled validator of an entry's schema, compiling each distinct schema once."""
+        key = json.dumps(entry["schema"], sort_keys=True)
+        validator = self._validators.get(key)
+        if validator is None:
+            validator = self._validators[key] = compile_schema(entry["schema"])
+        return validator
+
+    def validate(self, entry: dict, args):
+        """
+        Checks and normalizes the arguments of an animation.
+
+        Returns:
+            tuple: (error message, None) if they are invalid, (None, normalized arguments) otherwise.
+        """
+        return self.validator(entry)(args)
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+from utils.logger import LOGGER
+from utils.utils import ROOT_DIR
+
+GROUPS_FILE = os.path.join(ROOT_DIR, "groups.json")
+
+class ControllerGroups:
+    """
+    Persistent named groups of controllers.
+
+    Members are stored by client name, because controller ids change when a client without a persisted identity reconnects.
+    """
+
+    def __init__(self, path: str = GROUPS_FILE):
+        self.path = path
+        self._groups = {}  # group name -> {client name: None}, keeps insertion order
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._load()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Reloads the groups if another server process changed the file."""
+        if self._file_mtime() != self._mtime:
+            self._load()
+
+    def _load(self):
+        self._mtime = self._file_mtime()
+        try:
+            with open(self.path, "r") as groups_file:
+                data = json.load(groups_file)
+            self._groups = {group: dict.fromkeys(members) for group, members in data.items()}
+        except FileNotFoundError:
+            self._groups = {}
+        except (json.JSONDecodeError, AttributeError, TypeError) as e:
+            LOGGER.warning(f"Could not load groups.json: {e}")
+            self._groups = {}
+
+    def _save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as groups_file:
+            json.dump({group: list(members) for group, members in self._groups.items()}, groups_file, indent=4)
+        os.replace(temp_path, self.path)
+        self._mtime = self._file_mtime()
+
+    def to_dict(self) -> dict:
+        """Returns all groups with their member names."""
+        self._refresh()
+        return {group: list(members) for group, members in self._groups.items()}
+
+    def exists(self, group: str) -> bool:
+        self._refresh()
+        return group in self._groups
+
+    def get_members(self, group: str) -> list:
+        """Returns the member names of a group, or None if it doesn't exist."""
+        self._refresh()
+        members = self._groups.get(group)
+        return list(members) if members is not None else None
+
+    def set_members(self, group: str, names: list):
+        """Creates a group or replaces its members."""
+        with self._lock:
+            self._refresh()
+            self._groups[group] = dict.fromkeys(names)
+            self._save()
+
+    def add_members(self, group: str, names: list):
+        """Adds members to a group, creating it if needed."""
+        with self._lock:
+            self._refresh()
+            self._groups.setdefault(group, {}).update(dict.fromkeys(names))
+            self._save()
+
+    def remove_member(self, group: str, name: str) -> bool:
+        """Removes a member from a group. Returns False if it wasn't a member."""
+        with self._lock:
+            self._refresh()
+            members = self._groups.get(group)
+            if members is None or name not in members:
+                return False
+            del members[name]
+            self._save()
+            return True
+
+    def delete(self, group: str) -> bool:
+        """Deletes a group. Returns False if it didn't exist."""
+        with self._lock:
+            self._refresh()
+            if self._groups.pop(group, None) is None:
+                return False
+            self._save()
+            return True
+
+    def resolve(self, group: str, server) -> list:
+        """
+        Returns the ids of the connected members of a group.
+        The cost is proportional to the group size, not to the number of connected clients.
+
+        Args:
+            group (str): Name of the group.
+            server (WebSocketServer): Server of the connected clients.
+        """
+        self._refresh()
+        members = self._groups.get(group) or {}
+        return [sid for name in list(members) for sid in server.get_ids_by_name(name)]
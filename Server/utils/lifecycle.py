@@ -0,0 +1,67 @@
+import time
+from utils.logger import LOGGER
+from utils.metrics import SERVER_STARTUP
+from utils.web import resolve
+
+class Lifecycle:
+    """
+    Startup and shutdown hooks of the server.
+
+    Importing the app or creating it doesn't start anything: the API modules register their background
+    services (the websocket server, the controller groups) as hooks, which only run when the app is served.
+    In 'asgi' mode they run on the serving event loop (before_serving / after_serving), in 'flask' mode
+    app.py runs them around app.run().
+    """
+
+    def __init__(self, started_at: float = None):
+        """
+        Initializes a Lifecycle.
+
+        Args:
+            started_at (float): time.perf_counter() when the server started, the cold start is measured from it.
+        """
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.startup_hooks = []  # (name, hook)
+        self.shutdown_hooks = []
+        self.timings = {}  # startup phase -> seconds
+        self.running = False
+
+    def mark(self, phase: str, since: float) -> float:
+        """Records how long a startup phase took and returns the current time."""
+        now = time.perf_counter()
+        self.timings[phase] = round(now - since, 4)
+        SERVER_STARTUP.labels(phase).set(self.timings[phase])
+        return now
+
+    def add(self, name: str, startup=None, shutdown=None):
+        """
+        Registers the hooks of a service. Hooks may be plain functions or coroutine functions.
+        Shutdown hooks run in the reverse order of registration.
+        """
+        if startup is not None:
+            self.startup_hooks.append((name, startup))
+        if shutdown is not None:
+            self.shutdown_hooks.insert(0, (name, shutdown))
+
+    async def startup(self):
+        """Runs the startup hooks once and logs the cold start time."""
+        if self.running:
+            return
+        self.running = True
+        for name, hook in self.startup_hooks:
+            hook_started = time.perf_counter()
+            await resolve(hook())
+            self.mark(f"startup_{name}", hook_started)
+        self.mark("total", self.started_at)
+        LOGGER.info(f"Server ready in {self.timings['total']:.3f} s ({', '.join(f'{phase} {seconds:.3f} s' for phase, seconds in self.timings.items() if phase != 'total')}).")
+
+    async def shutdown(self):
+        """Runs the shutdown hooks, continuing with the others if one of them fails."""
+        if not self.running:
+            return
+        self.running = False
+        for name, hook in self.shutdown_hooks:
+            try:
+                await resolve(hook())
+            except Exception as e:
+                LOGGER.error(f"Error while shutting down {name}: {e}")
@@ -0,0 +1,229 @@
+import math
+import threading
+from bisect import bisect_left
+
+# Every child metric has its own lock: increments are read-modify-writes, and in flask mode the HTTP metrics
+# are updated by concurrent request threads. An uncontended lock costs well under a microsecond, so the
+# instrumentation stays cheap enough to be enabled in production.
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        """
+        Initializes a metric.
+
+        Args:
+            name (str): Name of the metric.
+            documentation (str): Help text of the metric.
+            labelnames (tuple): Names of the labels, values are passed to labels() in the same order.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._create_child()
+
+    def labels(self, *labelvalues):
+        """Returns the child metric for the given label values, creating it on first use."""
+        child = self._children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(labelvalues, self._create_child())
+        return child
+
+    def remove(self, *labelvalues):
+        """Drops the child metric of the given label values."""
+        self._children.pop(labelvalues, None)
+
+    def _create_child(self):
+        raise NotImplementedError
+
+    def _render_child(self, labelvalues, child):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for labelvalues, child in list(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+class _CounterChild:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. the number of timeouts."""
+    type_name = "counter"
+
+    def _create_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    def _render_child(self, labelvalues, child):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}"]
+
+class _GaugeChild:
+    __slots__ = ("value", "function", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Reads the value from the function whenever the metric is rendered."""
+        self.function = function
+
+    def get(self):
+        return self.function() if self.function else self.value
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. the number of requests in flight."""
+    type_name = "gauge"
+
+    def _create_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    def dec(self, amount=1):
+        self._children[()].dec(amount)
+
+    def set(self, value):
+        self._children[()].set(value)
+
+    def set_function(self, function):
+        self._children[()].set_function(function)
+
+    def _render_child(self, labelvalues, child):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.get())}"]
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "lock")
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.upper_bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        """Returns the bucket counts and the sum, consistent with each other."""
+        with self.lock:
+            return list(self.counts), self.sum
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, e.g. request latencies in seconds."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _create_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def _render_child(self, labelvalues, child):
+        lines = []
+        cumulative = 0
+        counts, total = child.snapshot()
+        for upper_bound, count in zip(self.upper_bounds + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, labelvalues, [("le", _format_value(upper_bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter("led_http_requests_total", "REST requests by endpoint, method and status code.", ("endpoint", "method", "status"))
+HTTP_REQUEST_DURATION = REGISTRY.histogram("led_http_request_duration_seconds", "REST request latency by endpoint.", ("endpoint", "method"))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("led_http_requests_in_flight", "REST requests currently being handled.")
+
+WEBSOCKET_CLIENTS = REGISTRY.gauge("led_websocket_connected_clients", "Connected websocket clients.")
+WEBSOCKET_MESSAGES = REGISTRY.counter("led_websocket_messages_total", "Websocket messages by direction.", ("direction",))
+WEBSOCKET_BYTES = REGISTRY.counter("led_websocket_message_bytes_total", "Websocket message bytes by direction.", ("direction",))
+WEBSOCKET_RTT = REGISTRY.histogram("led_websocket_round_trip_seconds", "Time from sending a request to a controller until its response.", ("controller",))
+WEBSOCKET_REQUESTS_IN_FLIGHT = REGISTRY.gauge("led_websocket_requests_in_flight", "Requests sent to controllers that are waiting for a response.")
+WEBSOCKET_TIMEOUTS = REGISTRY.counter("led_websocket_timeouts_total", "Requests to controllers that were not answered in time.")
+WEBSOCKET_HEARTBEAT_RTT = REGISTRY.histogram("led_websocket_heartbeat_rtt_seconds", "Round trip time of heartbeats by controller.", ("controller",))
+WEBSOCKET_EVICTIONS = REGISTRY.counter("led_websocket_evicted_clients_total", "Clients disconnected because they stopped answering heartbeats.")
+WEBSOCKET_ERRORS = REGISTRY.counter("led_websocket_errors_total", "Requests to controllers that failed, by reason.", ("reason",))
+SERVER_STARTUP = REGISTRY.gauge("led_server_startup_seconds", "Duration of the server's cold start phases, 'total' is the time until serving.", ("phase",))
@@ -0,0 +1,140 @@
+"""
+Typed argument schemas, compiled once into validators that coerce and range-check request arguments.
+
+A schema maps argument names to field specs:
+    {'type': 'int', 'min': 0, 'max': 255}
+    {'type': 'float', 'min': 0.1, 'max': 10}
+    {'type': 'bool'}
+    {'type': 'list', 'items': {...}, 'min_length': 2, 'max_length': 256}
+Fields are required unless the spec has a 'default'.
+"""
+
+def _describe_range(spec):
+    low, high = spec.get('min'), spec.get('max')
+    if low is not None and high is not None:
+        return f' between {low} and {high}'
+    if low is not None:
+        return f' of at least {low}'
+    if high is not None:
+        return f' of at most {high}'
+    return ''
+
+def _range_checker(spec, kind):
+    low, high = spec.get('min'), spec.get('max')
+    message = f'must be {kind}{_describe_range(spec)}'
+
+    def check(value):
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(message)
+        return value
+    return check, message
+
+def _compile_int(spec):
+    check, message = _range_checker(spec, 'an integer')
+
+    def coerce(value):
+        if isinstance(value, bool):
+            raise ValueError(message)
+        if isinstance(value, int):
+            return check(value)
+        if isinstance(value, float) and value.is_integer():
+            return check(int(value))
+        if isinstance(value, str):
+            try:
+                return check(int(value.strip()))
+            except ValueError:
+                pass
+        raise ValueError(message)
+    return coerce
+
+def _compile_float(spec):
+    check, message = _range_checker(spec, 'a number')
+
+    def coerce(value):
+        if isinstance(value, bool):
+            raise ValueError(message)
+        if isinstance(value, (int, float)):
+            return check(float(value))
+        if isinstance(value, str):
+            try:
+                return check(float(value.strip()))
+            except ValueError:
+                pass
+        raise ValueError(message)
+    return coerce
+
+def _compile_bool(spec):
+    def coerce(value):
+        if isinstance(value, bool):
+            return value
+        if value in (0, 1):
+            return bool(value)
+        if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+            return value.strip().lower() == 'true'
+        raise ValueError('must be true or false')
+    return coerce
+
+def _compile_list(spec):
+    coerce_item = compile_field(spec['items'])
+    min_length, max_length = spec.get('min_length', 0), spec.get('max_length')
+    length = f'{min_length} to {max_length}' if max_length is not None else f'at least {min_length}'
+    message = f'must be a list of {length} items'
+
+    def coerce(value):
+        if not isinstance(value, (list, tuple)) or len(value) < min_length or (max_length is not None and len(value) > max_length):
+            raise ValueError(message)
+        items = []
+        for index, item in enumerate(value):
+            try:
+                items.append(coerce_item(item))
+            except ValueError as e:
+                raise ValueError(f'item {index} {e}')
+        return items
+    return coerce
+
+_COMPILERS = {
+    'int': _compile_int,
+    'float': _compile_float,
+    'bool': _compile_bool,
+    'list': _compile_list,
+}
+
+def compile_field(spec):
+    """Returns a function that coerces a value to the field spec or raises ValueError with the reason."""
+    return _COMPILERS[spec['type']](spec)
+
+def compile_schema(schema):
+    """
+    Compiles a schema into a validator.
+
+    Args:
+        schema (dict): Argument names mapped to field specs.
+
+    Returns:
+        function: validate(args) -> (error message, None) for invalid arguments, (None, normalized arguments) otherwise.
+                  The normalized arguments contain exactly the fields of the schema.
+    """
+    fields = tuple((name, compile_field(spec), spec.get('default')) for name, spec in schema.items())
+    required = tuple(name for name, spec in schema.items() if 'default' not in spec)
+
+    def validate(args):
+        if not isinstance(args, dict):
+            return 'Arguments must be an object.', None
+        missing = [name for name in required if name not in args]
+        if missing:
+            return f'Missing arguments: {", ".join(missing)}', None
+
+        normalized = {}
+        errors = []
+        for name, coerce, default in fields:
+            if name not in args:
+                normalized[name] = default
+                continue
+            try:
+                normalized[name] = coerce(args[name])
+            except ValueError as e:
+                errors.append(f'{name} {e}')
+        if errors:
+            return f'Invalid arguments: {"; ".join(errors)}', None
+        return None, normalized
+    return validate
@@ -8,13 +8,14 @@ _config = None  # internal cache
 def load_config():
     """
     Loads and caches the configuration from config.json.
+    The LED_CONFIG_PATH environment variable can point to another config file, e.g. for load tests.
     Returns an empty dict if not found or invalid.
     """
     global _config
     if _config is not None:
         return _config
 
-    config_path = os.path.join(ROOT_DIR, "config.json")
+    config_path = os.environ.get("LED_CONFIG_PATH") or os.path.join(ROOT_DIR, "config.json")
 
     try:
         with open(config_path, "r") as config_file:
@@ -0,0 +1,49 @@
+import inspect
+import os
+from utils.logger import LOGGER
+from utils.utils import load_config
+
+SERVER_MODE_FLASK = "flask"
+SERVER_MODE_ASGI = "asgi"
+SERVER_MODES = (SERVER_MODE_FLASK, SERVER_MODE_ASGI)
+
+def load_server_mode():
+    """
+    Returns the configured server mode.
+    The LED_SERVER_MODE environment variable takes precedence over 'api.server_mode' in config.json.
+    """
+    mode = os.environ.get("LED_SERVER_MODE") or load_config().get("api", {}).get("server_mode", SERVER_MODE_FLASK)
+    if mode not in SERVER_MODES:
+        LOGGER.warning(f"Invalid server mode '{mode}' in config.json, defaulting to '{SERVER_MODE_FLASK}'.")
+        return SERVER_MODE_FLASK
+    return mode
+
+SERVER_MODE = load_server_mode()
+
+# In 'flask' mode the API is served by Flask and the websocket server runs on its own event loop in a background thread.
+# In 'asgi' mode the API is served by Quart, so the HTTP API and the websocket server share a single event loop.
+# Both expose the same Blueprint / request / jsonify surface, so the API modules import them from here.
+if SERVER_MODE == SERVER_MODE_ASGI:
+    from quart import Quart as App, Blueprint, abort, g, jsonify, request, send_file
+    from quart_cors import cors as _cors
+else:
+    from flask import Flask as App, Blueprint, abort, g, jsonify, request, send_file
+    from flask_cors import CORS as _cors
+
+def enable_cors(app, allowed_origins):
+    """Enables CORS for the given origins and returns the (possibly wrapped) app."""
+    if SERVER_MODE == SERVER_MODE_ASGI:
+        return _cors(app, allow_origin=allowed_origins)
+    _cors(app, origins=allowed_origins)
+    return app
+
+async def resolve(value):
+    """Awaits the value if the framework returned an awaitable (Quart) and returns it as is otherwise (Flask)."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+async def get_request_json():
+    """Returns the JSON body of the current request, or an empty dict if there is none."""
+    data = await resolve(request.get_json(silent=True))
+    return data if isinstance(data, (dict, list)) else {}
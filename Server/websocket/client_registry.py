@@ -0,0 +1,149 @@
+import time
+from collections import deque
+
+RTT_WINDOW_SIZE = 60
+
+class RttWindow:
+    """
+    Rolling window of the most recent heartbeat round trip times of a client.
+    """
+    __slots__ = ("samples",)
+
+    def __init__(self, size: int = RTT_WINDOW_SIZE):
+        self.samples = deque(maxlen=size)
+
+    def add(self, rtt: float):
+        self.samples.append(rtt)
+
+    def summary(self) -> dict:
+        """
+        Returns the last, median, 95th percentile and maximum round trip time in milliseconds,
+        or None if no heartbeat was answered yet.
+        """
+        if not self.samples:
+            return None
+        last = self.samples[-1]
+        samples = sorted(self.samples)
+        count = len(samples)
+        return {
+            "last_ms": round(last * 1000, 2),
+            "p50_ms": round(samples[(count - 1) // 2] * 1000, 2),
+            "p95_ms": round(samples[-(-95 * count // 100) - 1] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+            "samples": count,
+        }
+
+class ClientRecord:
+    """
+    Metadata of a single connected client.
+    """
+    __slots__ = ("id", "name", "websocket", "connected_at", "last_seen", "rtt", "capabilities")
+
+    def __init__(self, sid: int, websocket, name: str = None):
+        """
+        Initializes a ClientRecord.
+
+        Args:
+            sid (int): Id of the client.
+            websocket: The websocket connection of the client.
+            name (str): Name the client connected with.
+        """
+        self.id = sid
+        self.name = name
+        self.websocket = websocket
+        self.connected_at = time.time()
+        self.last_seen = time.monotonic()  # Updated on every message received from the client
+        self.rtt = RttWindow()
+        self.capabilities = None  # Animations and strip size advertised in the handshake
+
+    def to_dict(self):
+        """
+        Converts the record to the dictionary format returned by the API.
+
+        Returns:
+            dict: Dictionary representation of the client.
+        """
+        return {"id": self.id, "name": self.name}
+
+class ClientRegistry:
+    """
+    Index of the connected clients by id and by name.
+    Every lookup, insertion and removal is O(1).
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_name = {}  # name -> {id: record}, in connection order
+        self._snapshot = None
+
+    def add(self, sid: int, websocket, name: str = None) -> ClientRecord:
+        """Registers a connection and returns its record."""
+        record = ClientRecord(sid, websocket)
+        self._by_id[sid] = record
+        if name:
+            self.set_name(record, name)
+        self._snapshot = None
+        return record
+
+    def set_name(self, record: ClientRecord, name: str):
+        """Sets or changes the name of a registered client."""
+        if record.name:
+            self._unindex_name(record)
+        record.name = name
+        if name:
+            self._by_name.setdefault(name, {})[record.id] = record
+        self._snapshot = None
+
+    def remove(self, sid: int) -> ClientRecord:
+        """Removes a client and returns its record, or None if it wasn't registered."""
+        record = self._by_id.pop(sid, None)
+        if record:
+            if record.name:
+                self._unindex_name(record)
+            self._snapshot = None
+        return record
+
+    def _unindex_name(self, record: ClientRecord):
+        named = self._by_name.get(record.name)
+        if named:
+            named.pop(record.id, None)
+            if not named:
+                del self._by_name[record.name]
+
+    def get(self, sid: int) -> ClientRecord:
+        """Returns the record of a client id, or None."""
+        return self._by_id.get(sid)
+
+    def get_by_name(self, name: str) -> list:
+        """Returns the records of all clients connected with the given name, oldest first."""
+        named = self._by_name.get(name)
+        return list(named.values()) if named else []
+
+    def first_by_name(self, name: str) -> ClientRecord:
+        """Returns the oldest client connected with the given name, or None."""
+        named = self._by_name.get(name)
+        return next(iter(named.values())) if named else None
+
+    def ids(self) -> list:
+        """Returns the ids of all connected clients."""
+        return list(self._by_id)
+
+    def to_list(self) -> list:
+        """
+        Returns the connected clients in the API format.
+        The list is cached until the registry changes.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = [record.to_dict() for record in list(self._by_id.values())]
+            self._snapshot = snapshot
+        return snapshot
+
+    def __contains__(self, sid):
+        return sid in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
@@ -0,0 +1,258 @@
+import asyncio
+import itertools
+import json
+from utils.logger import LOGGER
+
+# Several worker processes share the websocket and API ports (SO_REUSEPORT), so a controller is
+# connected to exactly one of them while REST requests land on any. A broker process, reached
+# over a unix socket, replicates which worker owns which controller (and the pushed state) to
+# every worker and routes requests for a remote controller to its owner.
+#
+# Messages are JSON lines with an "op" key:
+#   worker -> broker: hello, register, unregister, state, request, response
+#   broker -> worker: snapshot, register, unregister, state, request, response
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+class ClusterBroker:
+    """
+    Registry of the controllers of all workers, routing requests between them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.server = None
+        self.workers = {}  # worker id -> stream writer
+        self.owners = {}  # controller id -> (worker id, client name)
+        self.states = {}  # controller id -> last pushed state
+        self.capabilities = {}  # controller id -> capabilities advertised in the handshake
+
+    async def start(self):
+        self.server = await asyncio.start_unix_server(self.__handle_worker, path=self.path)
+        LOGGER.info(f"Cluster broker listening on {self.path}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def __broadcast(self, message: dict, sender):
+        data = _encode(message)
+        for worker, writer in list(self.workers.items()):
+            if worker != sender:
+                writer.write(data)
+
+    def __send(self, worker, message: dict):
+        writer = self.workers.get(worker)
+        if writer:
+            writer.write(_encode(message))
+
+    async def __handle_worker(self, reader, writer):
+        worker = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "hello":
+                    worker = message["worker"]
+                    self.workers[worker] = writer
+                    writer.write(_encode({
+                        "op": "snapshot",
+                        "controllers": [
+                            {"id": sid, "worker": owner, "name": name, "state": self.states.get(sid), "capabilities": self.capabilities.get(sid)}
+                            for sid, (owner, name) in self.owners.items()
+                        ],
+                    }))
+                    LOGGER.info(f"Worker {worker} joined the cluster")
+                elif op == "register":
+                    self.owners[message["id"]] = (worker, message.get("name"))
+                    self.capabilities[message["id"]] = message.get("capabilities")
+                    self.__broadcast({**message, "worker": worker}, worker)
+                elif op == "unregister":
+                    sid = message["id"]
+                    # A controller that reconnected to another worker is owned by that one now
+                    if self.owners.get(sid, (None,))[0] == worker:
+                        del self.owners[sid]
+                        self.states.pop(sid, None)
+                        self.capabilities.pop(sid, None)
+                        self.__broadcast(message, worker)
+                elif op == "state":
+                    self.states[message["id"]] = message.get("data")
+                    self.__broadcast(message, worker)
+                elif op == "request":
+                    owner = self.owners.get(message["id"], (None,))[0]
+                    if owner is None or owner not in self.workers:
+                        self.__send(worker, {"op": "response", "req": message["req"], "error": "disconnected"})
+                    else:
+                        self.__send(owner, {**message, "origin": worker})
+                elif op == "response":
+                    self.__send(message.pop("origin"), message)
+        except (ConnectionError, ValueError, KeyError) as e:
+            LOGGER.error(f"Cluster worker {worker} failed: {e}")
+        finally:
+            if worker is not None and self.workers.get(worker) is writer:
+                del self.workers[worker]
+                for sid in [sid for sid, (owner, _) in self.owners.items() if owner == worker]:
+                    del self.owners[sid]
+                    self.states.pop(sid, None)
+                    self.capabilities.pop(sid, None)
+                    self.__broadcast({"op": "unregister", "id": sid}, worker)
+                LOGGER.warning(f"Worker {worker} left the cluster")
+            writer.close()
+
+class ClusterClient:
+    """
+    Connection of a worker to the cluster broker.
+    Keeps a replica of the controllers connected to other workers and forwards requests to them.
+    """
+
+    def __init__(self, path: str, worker: int, server):
+        """
+        Initializes a ClusterClient.
+
+        Args:
+            path (str): Path of the broker's unix socket.
+            worker (int): Id of this worker.
+            server (WebSocketServer): Server of this worker, answers requests forwarded to it.
+        """
+        self.path = path
+        self.worker = worker
+        self.server = server
+        self.remote = {}  # controller id -> (worker id, client name)
+        self.remote_capabilities = {}  # controller id -> capabilities advertised in the handshake
+        self.pending = {}  # request number -> future
+        self.request_numbers = itertools.count()
+        self.writer = None
+        self.reader_task = None
+
+    async def connect(self):
+        reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self.__send({"op": "hello", "worker": self.worker})
+        # Controllers that connected before this worker joined
+        for client in self.server.clients:
+            self.register(client.id, client.name, client.capabilities)
+        self.reader_task = asyncio.ensure_future(self.__read(reader))
+
+    async def close(self):
+        if self.reader_task:
+            self.reader_task.cancel()
+            self.reader_task = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    def __send(self, message: dict):
+        if self.writer:
+            self.writer.write(_encode(message))
+
+    def register(self, sid: int, name: str, capabilities: dict = None):
+        self.__send({"op": "register", "id": sid, "name": name, "capabilities": capabilities})
+
+    def unregister(self, sid: int):
+        self.__send({"op": "unregister", "id": sid})
+
+    def publish_state(self, sid: int, data):
+        self.__send({"op": "state", "id": sid, "data": data})
+
+    def has(self, sid: int) -> bool:
+        return sid in self.remote
+
+    def ids(self) -> list:
+        return list(self.remote)
+
+    def get_name(self, sid: int) -> str:
+        owner = self.remote.get(sid)
+        return owner[1] if owner else None
+
+    def get_capabilities(self, sid: int) -> dict:
+        return self.remote_capabilities.get(sid)
+
+    def get_ids_by_name(self, name: str) -> list:
+        return [sid for sid, (_, client_name) in list(self.remote.items()) if client_name == name]
+
+    def to_list(self) -> list:
+        """Returns the controllers of other workers in the API format."""
+        return [{"id": sid, "name": name} for sid, (_, name) in list(self.remote.items())]
+
+    async def forward(self, sid: int, message: str):
+        """
+        Sends an encoded message to a controller of another worker and waits for its response.
+
+        Raises:
+            ConnectionError: If the controller is not connected to any worker.
+            asyncio.TimeoutError: If the owning worker got no response in time.
+        """
+        number = next(self.request_numbers)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[number] = future
+        try:
+            self.__send({"op": "request", "req": number, "id": sid, "message": message})
+            return await future
+        finally:
+            self.pending.pop(number, None)
+
+    async def __answer(self, request: dict):
+        """Answers a request another worker forwarded for one of our controllers"""
+        response = {"op": "response", "req": request["req"], "origin": request["origin"]}
+        try:
+            response["result"] = await self.server.send_encoded_request(request["id"], request["message"])
+        except asyncio.TimeoutError:
+            response["error"] = "timeout"
+        except ConnectionError:
+            response["error"] = "disconnected"
+        self.__send(response)
+
+    def __resolve(self, response: dict):
+        future = self.pending.get(response["req"])
+        if future is None or future.done():
+            return
+        error = response.get("error")
+        if error == "timeout":
+            future.set_exception(asyncio.TimeoutError())
+        elif error:
+            future.set_exception(ConnectionError(f"Controller {error}"))
+        else:
+            future.set_result(response.get("result"))
+
+    def __add_remote(self, sid, worker, name, state=None, capabilities=None):
+        self.remote[sid] = (worker, name)
+        self.remote_capabilities[sid] = capabilities
+        if state:
+            self.server.state_cache.update(sid, state)
+        if capabilities and self.server.catalog:
+            self.server.catalog.add(sid, capabilities.get("animations"))
+
+    def __remove_remote(self, sid):
+        self.remote_capabilities.pop(sid, None)
+        if self.remote.pop(sid, None) is not None and sid not in self.server.clients:
+            self.server.state_cache.remove(sid)
+            if self.server.catalog:
+                self.server.catalog.remove(sid)
+
+    async def __read(self, reader):
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "request":
+                    asyncio.ensure_future(self.__answer(message))
+                elif op == "response":
+                    self.__resolve(message)
+                elif op == "register":
+                    self.__add_remote(message["id"], message["worker"], message.get("name"), capabilities=message.get("capabilities"))
+                elif op == "unregister":
+                    self.__remove_remote(message["id"])
+                elif op == "state":
+                    if message["id"] in self.remote:
+                        self.server.state_cache.update(message["id"], message.get("data"))
+                elif op == "snapshot":
+                    for controller in message["controllers"]:
+                        self.__add_remote(controller["id"], controller["worker"], controller.get("name"), controller.get("state"), controller.get("capabilities"))
+        except (ConnectionError, ValueError) as e:
+            LOGGER.error(f"Lost connection to the cluster broker: {e}")
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Cluster broker disconnected"))
@@ -49,6 +49,11 @@ class CommandType(Enum):
     START_STANDARD_ANIMATION = 'start_standard_animation'
     START_CUSTOM_ANIMATION = 'start_custom_animation'
     START_SPECIAL_ANIMATION = 'start_special_animation'
+    START_AUDIO_ANIMATION = 'start_audio_animation'
+    UPDATE_ANIMATION_PARAMS = 'update_animation_params'
+
+    START_RECORDING = 'start_recording'
+    STOP_RECORDING = 'stop_recording'
 
 class RequestType(Enum):
     """
@@ -56,6 +61,8 @@ class RequestType(Enum):
     """
     GET_ONLINE_STATE = 'get_online_state'
     GET_BRIGHTNESS = 'get_brightness'
+    GET_METRICS = 'get_metrics'
+    GET_CLOCK = 'get_clock'
 
 
 class Command:
@@ -0,0 +1,64 @@
+import time
+
+class ControllerState:
+    """
+    Last known state of a controller, as pushed by the client.
+    """
+    __slots__ = ("online", "brightness", "animation", "realtime", "updated_at")
+
+    def __init__(self):
+        self.online = None
+        self.brightness = None
+        self.animation = None
+        self.realtime = None  # Protocol of the realtime frames the controller shows instead of its animation
+        self.updated_at = None
+
+    def update(self, data: dict):
+        """
+        Merges a pushed state into the record.
+
+        Args:
+            data (dict): State pushed by the client, any of 'online', 'brightness', 'animation' and 'realtime'.
+        """
+        if 'online' in data:
+            self.online = data['online']
+        if 'brightness' in data:
+            self.brightness = data['brightness']
+        if 'animation' in data:
+            self.animation = data['animation']
+        if 'realtime' in data:
+            self.realtime = data['realtime']
+        self.updated_at = time.time()
+
+    def to_dict(self):
+        return {
+            'online': self.online,
+            'brightness': self.brightness,
+            'animation': self.animation,
+            'realtime': self.realtime,
+            'updated_at': self.updated_at,
+        }
+
+class ControllerStateCache:
+    """
+    In-memory cache of the state of every connected controller, fed by client push events.
+    """
+
+    def __init__(self):
+        self._states = {}
+
+    def update(self, sid: int, data: dict):
+        """Merges a pushed state into the cached state of a controller."""
+        if not isinstance(data, dict):
+            return
+        state = self._states.get(sid)
+        if state is None:
+            state = self._states[sid] = ControllerState()
+        state.update(data)
+
+    def get(self, sid: int) -> ControllerState:
+        """Returns the cached state of a controller, or None if it never pushed one."""
+        return self._states.get(sid)
+
+    def remove(self, sid: int):
+        self._states.pop(sid, None)
@@ -6,28 +6,60 @@ class WebSocketCommandHandler:
         
     async def _send_command(self, sid, command_type, rgb_data=None, animation_data=None):
         command = Command(command_type, rgb_data, animation_data)
-        await self.send_message(sid, command.to_dict())
+        return await self.send_message(sid, command.to_dict())
 
     async def get_online_state(self, sid):
-        await self._send_command(sid, RequestType.GET_ONLINE_STATE)
+        return await self._send_command(sid, RequestType.GET_ONLINE_STATE)
 
     async def get_brightness(self, sid):
-        await self._send_command(sid, RequestType.GET_BRIGHTNESS)
+        return await self._send_command(sid, RequestType.GET_BRIGHTNESS)
+
+    async def get_metrics(self, sid):
+        return await self._send_command(sid, RequestType.GET_METRICS)
+
+    async def get_clock(self, sid):
+        return await self._send_command(sid, RequestType.GET_CLOCK)
 
     async def set_online_state(self, sid, online):
-        await self._send_command(sid, CommandType.SET_ONLINE_STATE, animation_data={'value': online})
+        return await self._send_command(sid, CommandType.SET_ONLINE_STATE, animation_data={'value': online})
 
     async def set_brightness(self, sid, brightness):
-        await self._send_command(sid, CommandType.SET_BRIGHTNESS, animation_data={'brightness': brightness})
+        return await self._send_command(sid, CommandType.SET_BRIGHTNESS, animation_data={'brightness': brightness})
+
+    async def start_recording(self, sid, max_seconds=None):
+        return await self._send_command(sid, CommandType.START_RECORDING, animation_data={'max_seconds': max_seconds})
+
+    async def stop_recording(self, sid):
+        return await self._send_command(sid, CommandType.STOP_RECORDING, animation_data={})
 
-    async def start_static_animation(self, sid, animation_name, request_data):
-        await self._send_command(sid, CommandType.START_STATIC_ANIMATION, animation_data={'animation_name': animation_name, 'args': request_data})
+    @staticmethod
+    def _animation_data(animation_name, request_data=None, at=None):
+        """
+        Builds the data of an animation command, 'at' is the start time on the server clock (epoch seconds).
+        The arguments were checked against the animation's schema by the API, so the client can skip validating them.
+        """
+        animation_data = {'animation_name': animation_name}
+        if request_data is not None:
+            animation_data['args'] = request_data
+            animation_data['normalized'] = True
+        if at is not None:
+            animation_data['at'] = at
+        return animation_data
+
+    async def start_static_animation(self, sid, animation_name, request_data, at=None):
+        return await self._send_command(sid, CommandType.START_STATIC_ANIMATION, animation_data=self._animation_data(animation_name, request_data, at))
     
-    async def start_standard_animation(self, sid, animation_name):
-        await self._send_command(sid, CommandType.START_STANDARD_ANIMATION, animation_data={'animation_name': animation_name})
+    async def start_standard_animation(self, sid, animation_name, at=None):
+        return await self._send_command(sid, CommandType.START_STANDARD_ANIMATION, animation_data=self._animation_data(animation_name, at=at))
+
+    async def start_custom_animation(self, sid, animation_name, request_data, at=None):
+        return await self._send_command(sid, CommandType.START_CUSTOM_ANIMATION, animation_data=self._animation_data(animation_name, request_data, at))
+
+    async def start_special_animation(self, sid, animation_name, request_data, at=None):
+        return await self._send_command(sid, CommandType.START_SPECIAL_ANIMATION, animation_data=self._animation_data(animation_name, request_data, at))
 
-    async def start_custom_animation(self, sid, animation_name, request_data):
-        await self._send_command(sid, CommandType.START_CUSTOM_ANIMATION, animation_data={'animation_name': animation_name, 'args': request_data})
+    async def start_audio_animation(self, sid, animation_name, request_data, at=None):
+        return await self._send_command(sid, CommandType.START_AUDIO_ANIMATION, animation_data=self._animation_data(animation_name, request_data, at))
 
-    async def start_special_animation(self, sid, animation_name, request_data):
-        await self._send_command(sid, CommandType.START_SPECIAL_ANIMATION, animation_data={'animation_name': animation_name, 'args': request_data})
+    async def update_animation_params(self, sid, params, duration=0):
+        return await self._send_command(sid, CommandType.UPDATE_ANIMATION_PARAMS, animation_data={'params': params, 'duration': duration})
@@ -1,100 +1,546 @@
+import hashlib
 import json
+import threading
+import time
+from collections import deque
 import websockets
 from websockets.server import serve
 import asyncio
 from utils.logger import LOGGER
 from websocket.websocket_command_handler import WebSocketCommandHandler
+from websocket.client_registry import ClientRegistry
+from websocket.state_cache import ControllerStateCache
+from utils.metrics import (
+    WEBSOCKET_CLIENTS, WEBSOCKET_MESSAGES, WEBSOCKET_BYTES, WEBSOCKET_RTT,
+    WEBSOCKET_REQUESTS_IN_FLIGHT, WEBSOCKET_TIMEOUTS, WEBSOCKET_ERRORS,
+    WEBSOCKET_HEARTBEAT_RTT, WEBSOCKET_EVICTIONS,
+)
+
+RESPONSE_TIMEOUT = 15
+FANOUT_CONCURRENCY = 64
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 3.0
+SESSION_TTL = 300
+
+_MESSAGES_SENT = WEBSOCKET_MESSAGES.labels("sent")
+_MESSAGES_RECEIVED = WEBSOCKET_MESSAGES.labels("received")
+_BYTES_SENT = WEBSOCKET_BYTES.labels("sent")
+_BYTES_RECEIVED = WEBSOCKET_BYTES.labels("received")
+_DISCONNECT_ERRORS = WEBSOCKET_ERRORS.labels("disconnected")
 
 class WebSocketServer:
-    def __init__(self, port: int, callback, allow_duplicate_client_names=False):
-        self.connected_clients = []  # now a list of objects
+    def __init__(self, port: int, callback=None, allow_duplicate_client_names=False, response_timeout=RESPONSE_TIMEOUT, fanout_concurrency=FANOUT_CONCURRENCY,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, heartbeat_timeout=HEARTBEAT_TIMEOUT, session_ttl=SESSION_TTL, reuse_port=False):
+        self.clients = ClientRegistry()
+        self.state_cache = ControllerStateCache()
         self.server = None
-        self.handler = WebSocketCommandHandler(self.send_message)
+        self.loop = None
+        self.handler = WebSocketCommandHandler(self.send_request)
+        self.fanout_handler = WebSocketCommandHandler(self.broadcast_request)
+        self.command_builder = WebSocketCommandHandler(self._build_request)
+        self.fanout_concurrency = fanout_concurrency
         self.port = port
         self.callback = callback
         self.allow_duplicate_client_names = allow_duplicate_client_names
+        self.response_timeout = response_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.heartbeat_task = None
+        self.session_ttl = session_ttl
+        self.sessions = {}  # stable id -> client_id of clients with a persisted identity
+        self.session_expiry = {}  # stable id -> timer dropping the session of a disconnected client
+        self.pending_responses = {}  # sid -> deque of futures, answered in order
+        self.reuse_port = reuse_port  # Lets several worker processes share the port
+        self.cluster = None  # ClusterClient when running as one of several workers
+        self.catalog = None  # AnimationCatalog, built from the capabilities clients advertise
+        WEBSOCKET_CLIENTS.set_function(lambda: len(self.clients))
 
-    async def init_server(self):
+    async def start(self):
+        """Start serving on the running event loop."""
         host = "0.0.0.0"
+        self.loop = asyncio.get_running_loop()
+        self.server = await serve(
+            self.__handle_connection, host, self.port, ping_interval=None, reuse_port=self.reuse_port or None
+        )
+        self.heartbeat_task = asyncio.ensure_future(self.__heartbeat())
+        if self.cluster:
+            await self.cluster.connect()
+        LOGGER.info(
+            f"WebSocket server started at {f'all possible interfaces and port {self.port}' if host == '0.0.0.0' else f'ws://{host}:{self.port}'}"
+        )
+
+    async def stop(self):
+        """Close the server and all client connections."""
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+        if self.cluster:
+            await self.cluster.close()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def init_server(self, started: threading.Event = None):
         try:
-            async with serve(
-                self.__handle_connection, host, self.port, ping_interval=None
-            ) as server:
-                self.server = server
-                LOGGER.info(
-                    f"WebSocket server started at {f'all possible interfaces and port {self.port}' if host == '0.0.0.0' else f'ws://{host}:{self.port}'}"
-                )
-                await asyncio.Future()
+            await self.start()
         except Exception as e:
             LOGGER.error(f"WebSocket server initialization error: {e}")
+            return
+        finally:
+            # Set once start() assigned the loop and serves, or failed, so the caller never waits forever
+            if started is not None:
+                started.set()
+        await asyncio.Future()
 
-    async def __handle_connection(self, websocket, path):
-        sid = id(websocket)
-        client = {"id": sid, "name": None}
-        self.connected_clients.append(client)
+    def start_in_background(self):
+        """
+        Run the server on its own event loop in a daemon thread.
+        Coroutines from other loops must be handed over through call().
+        """
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.init_server(started))
+
+        websocket_thread = threading.Thread(target=run, name="websocket-server", daemon=True)
+        websocket_thread.start()
+        started.wait()
+
+    async def call(self, coro):
+        """
+        Await a coroutine on the server's event loop.
 
-        LOGGER.info(f"Client {sid} connected")
+        When the caller already runs on that loop (ASGI mode) the coroutine is awaited directly,
+        otherwise it is scheduled thread-safely on the server loop and its result is awaited.
+        """
+        if self.loop is None or asyncio.get_running_loop() is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
 
+    async def __handle_connection(self, websocket, path):
         try:
-            # Receive the initial message for setting the name
-            initial_message = await websocket.recv()
-            name_data = json.loads(initial_message)
-            client_name = name_data.get("name")
+            # The first message is the handshake with the name and the persisted identity of the client
+            handshake = json.loads(await websocket.recv())
+        except (websockets.exceptions.ConnectionClosed, ValueError):
+            await websocket.close()
+            return
+        if not isinstance(handshake, dict):
+            handshake = {}
+
+        client_name = handshake.get("name")
+        sid, resumed = await self.__open_session(handshake.get("client_id"), websocket)
+        if client_name and not self.allow_duplicate_client_names:
+            await self.__disconnect_duplicate_client(client_name)
+        client = self.clients.add(sid, websocket, client_name)
+        capabilities = handshake.get("capabilities")
+        if isinstance(capabilities, dict):
+            client.capabilities = capabilities
+            if self.catalog:
+                self.catalog.add(sid, capabilities.get("animations"))
+        if self.cluster:
+            self.cluster.register(sid, client_name, client.capabilities)
 
-            if client_name:
-                if not self.allow_duplicate_client_names:
-                    await self.__disconnect_duplicate_client(client_name)
+        LOGGER.info(f"Client {client_name or 'Unnamed'} ({sid}) {'resumed its session' if resumed else 'connected'}")
 
-                client["name"] = client_name
+        try:
+            await self._send_message_to_client(sid, {"event": "session", "id": sid, "resumed": resumed})
 
             async for message in websocket:
+                received_at = time.time()
+                _MESSAGES_RECEIVED.inc()
+                _BYTES_RECEIVED.inc(len(message))
+                client.last_seen = time.monotonic()
                 data = json.loads(message)
+                event = data.get("event")
+                if event == "heartbeat":
+                    self.__handle_heartbeat(client, data)
+                    continue
+                if event == "clock":
+                    await self.__answer_clock(sid, data, received_at)
+                    continue
                 LOGGER.info(f"Message from client {sid}: {data}")
                 await self.handle_response(sid, data)
 
-        except websockets.exceptions.ConnectionClosed:
-            await self.__handle_disconnection(sid)
+        except (websockets.exceptions.ConnectionClosed, ConnectionError):
+            pass
         finally:
-            await self.__handle_disconnection(sid)
+            await self.__handle_disconnection(sid, websocket)
+
+    async def __open_session(self, client_id, websocket):
+        """
+        Returns the controller id of a new connection and whether it resumed a previous session.
+
+        Clients that send a persisted client_id keep the same controller id across reconnects,
+        and their cached state survives a disconnect for session_ttl seconds.
+        Clients without one get a new id per connection.
+        """
+        if not isinstance(client_id, str) or not client_id:
+            return id(websocket), False
+
+        sid = self.stable_id(client_id)
+        owner = self.sessions.get(sid)
+        if owner is not None and owner != client_id:
+            LOGGER.warning(f"Controller id {sid} of client {client_id} is already taken, using a temporary id")
+            return id(websocket), False
+        self.sessions[sid] = client_id
+
+        # A reconnect can arrive before the server noticed that the previous connection died
+        previous = self.clients.get(sid)
+        if previous:
+            self.__abort(previous.websocket)
+            await self.__handle_disconnection(sid, previous.websocket)
+
+        expiry = self.session_expiry.pop(sid, None)
+        if expiry:
+            expiry.cancel()
+        return sid, self.state_cache.get(sid) is not None
+
+    @staticmethod
+    def stable_id(client_id: str) -> int:
+        """Derives a controller id from a client_id, small enough to be exact in JavaScript numbers."""
+        return int.from_bytes(hashlib.sha1(client_id.encode()).digest()[:6], "big")
+
+    def __expire_session(self, sid):
+        """Forget the session and cached state of a client that didn't come back in time"""
+        self.session_expiry.pop(sid, None)
+        if sid not in self.clients:
+            self.sessions.pop(sid, None)
+            self.state_cache.remove(sid)
+
+    async def __heartbeat(self):
+        """
+        Send a heartbeat to every client each interval and evict the clients that stayed silent
+        for longer than the heartbeat timeout, failing their pending requests right away.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            message = json.dumps({"event": "heartbeat", "sent_at": now, "timeout": self.heartbeat_timeout})
+            sends = []
+            for client in self.clients:
+                # Clients that never answered a heartbeat don't support it, they are left to TCP
+                if client.rtt.samples and now - client.last_seen > self.heartbeat_timeout:
+                    self.__evict(client)
+                else:
+                    sends.append(self.__send_heartbeat(client, message))
+            if sends:
+                await asyncio.gather(*sends)
+
+    async def __send_heartbeat(self, client, message):
+        try:
+            await asyncio.wait_for(client.websocket.send(message), self.heartbeat_timeout)
+            _MESSAGES_SENT.inc()
+            _BYTES_SENT.inc(len(message))
+        except Exception as e:
+            LOGGER.debug(f"Could not send heartbeat to client {client.id}: {e}")
+
+    def __handle_heartbeat(self, client, data):
+        """Record the round trip time of an answered heartbeat"""
+        sent_at = data.get("sent_at")
+        if not isinstance(sent_at, (int, float)):
+            return
+        rtt = time.monotonic() - sent_at
+        client.rtt.add(rtt)
+        WEBSOCKET_HEARTBEAT_RTT.labels(self.__metric_label(client)).observe(rtt)
+
+    async def __answer_clock(self, sid, data, received_at):
+        """
+        Answer a clock sync probe right away. With the probe's send time t0, the receive time t1,
+        the answer time t2 and its own receive time t3, the client estimates its offset to the server clock
+        as ((t1 - t0) + (t2 - t3)) / 2, like NTP.
+        """
+        try:
+            await self._send_message_to_client(sid, {"event": "clock", "t0": data.get("t0"), "t1": received_at, "t2": time.time()})
+        except ConnectionError:
+            pass
+
+    def __evict(self, client):
+        """Drop a client that stopped answering without waiting for the TCP connection to time out"""
+        LOGGER.warning(f"Client {client.name or 'Unnamed'} ({client.id}) missed its heartbeats, disconnecting")
+        WEBSOCKET_EVICTIONS.inc()
+        self.__abort(client.websocket)
+        asyncio.ensure_future(self.__handle_disconnection(client.id, client.websocket))
+
+    @staticmethod
+    def __abort(websocket):
+        """Drop the TCP connection without a closing handshake, which would wait on a dead peer"""
+        transport = getattr(websocket, "transport", None)
+        if transport:
+            transport.abort()
 
     async def __disconnect_duplicate_client(self, client_name: str):
         """Disconnect existing clients with the same name"""
-        for client in list(self.connected_clients):  # copy to avoid mutation during iteration
-            if client["name"] == client_name:
-                await self.__handle_disconnection(client["id"])
-                break
-
-    async def __handle_disconnection(self, sid):
-        """Remove client from list and close socket"""
-        client = next((c for c in self.connected_clients if c["id"] == sid), None)
+        client = self.clients.first_by_name(client_name)
         if client:
-            self.connected_clients.remove(client)
-            client_name = client["name"]
+            await self.__handle_disconnection(client.id)
+
+    @staticmethod
+    def __metric_label(client):
+        """Label of a controller's metrics: its name, or its id if it has none"""
+        return client.name or str(client.id)
 
-            websocket = next(
-                (ws for ws in self.server.websockets if id(ws) == sid), None
-            )
-            if websocket:
-                await websocket.close()
+    def __remove_metrics(self, client):
+        """
+        Drop the round trip time histograms of a disconnected controller, unless a connected client shares its name,
+        so ids of clients without a persisted identity and old names don't pile up in /metrics
+        """
+        label = self.__metric_label(client)
+        if client.name and self.clients.first_by_name(client.name):
+            return
+        WEBSOCKET_RTT.remove(label)
+        WEBSOCKET_HEARTBEAT_RTT.remove(label)
 
-            LOGGER.info(f"Client {client_name or 'Unnamed'} ({sid}) disconnected")
+    async def __handle_disconnection(self, sid, websocket=None):
+        """
+        Remove client from the registry and close socket.
+        If websocket is given, the client is only removed while it is still connected through that websocket.
+        """
+        client = self.clients.get(sid)
+        if client is None or (websocket is not None and client.websocket is not websocket):
+            return
+        self.clients.remove(sid)
+        self.__remove_metrics(client)
+        if self.catalog:
+            self.catalog.remove(sid)
+        if self.cluster:
+            self.cluster.unregister(sid)
+        if sid in self.sessions:
+            # Keep the cached state for a while, so a reconnecting client can resume its session
+            self.session_expiry[sid] = asyncio.get_running_loop().call_later(self.session_ttl, self.__expire_session, sid)
+        else:
+            self.state_cache.remove(sid)
+        for future in self.pending_responses.pop(sid, ()):
+            if not future.done():
+                future.set_exception(ConnectionError(f"Client {sid} disconnected"))
+
+        await client.websocket.close()
+
+        LOGGER.info(f"Client {client.name or 'Unnamed'} ({sid}) disconnected")
 
     async def handle_response(self, sid, data):
-        """Delegate message to callback"""
-        self.callback(sid, data)
+        """Resolve the oldest pending request of the client and delegate the message to the callback"""
+        if data.get("event") == "state":
+            # State pushed by the client on its own, not an answer to a request
+            self.__cache_state(sid, data.get("data"))
+            return
+        if "state" in data:
+            # State changed by a command, cached before the answer completes the request
+            self.__cache_state(sid, data.pop("state"))
+
+        pending = self.pending_responses.get(sid)
+        if pending:
+            future = pending.popleft()
+            # A late answer to a timed out request is consumed here so it can't resolve the next one
+            if not future.done():
+                future.set_result(data)
+        if self.callback:
+            self.callback(sid, data)
+
+    def __cache_state(self, sid, state):
+        """Merge a state reported by the client into the cache and replicate it to the other workers"""
+        self.state_cache.update(sid, state)
+        if self.cluster:
+            self.cluster.publish_state(sid, state)
 
     async def _send_message_to_client(self, sid, data):
         """Send message to a specific client"""
-        websocket = next((ws for ws in self.server.websockets if id(ws) == sid), None)
-        if websocket:
-            await websocket.send(json.dumps(data))
+        await self._send_encoded_message(sid, json.dumps(data))
+
+    async def _send_encoded_message(self, sid, message: str):
+        """Send an already JSON-encoded message to a specific client"""
+        client = self.clients.get(sid)
+        if client is None:
+            raise ConnectionError(f"Client {sid} is not connected")
+        await client.websocket.send(message)
+        _MESSAGES_SENT.inc()
+        _BYTES_SENT.inc(len(message))
+
+    def _expect_response(self, sid):
+        """Register and return a future for the next response of a client"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending_responses.setdefault(sid, deque()).append(future)
+        return future
+
+    def _discard_response(self, sid, future):
+        """Forget a future whose message was never sent"""
+        pending = self.pending_responses.get(sid)
+        if pending and future in pending:
+            pending.remove(future)
 
     async def send_message(self, sid, data):
         await self._send_message_to_client(sid, data)
 
+    async def send_request(self, sid, data, timeout=None):
+        """
+        Send a message to a client and wait for its response.
+
+        Clients answer messages in the order they receive them, so responses are matched
+        to the oldest pending request of that client.
+
+        Raises:
+            asyncio.TimeoutError: If the client does not respond within the timeout.
+        """
+        return await self.send_encoded_request(sid, json.dumps(data), timeout)
+
+    async def send_encoded_request(self, sid, message: str, timeout=None):
+        """Send an already JSON-encoded message to a client and wait for its response"""
+        try:
+            return await asyncio.wait_for(self._request(sid, message), timeout or self.response_timeout)
+        except asyncio.TimeoutError:
+            WEBSOCKET_TIMEOUTS.inc()
+            raise
+
+    async def _request(self, sid, message: str, semaphore=None):
+        """
+        Send an encoded message to a client and wait for its response, recording the round trip time.
+        If a semaphore is given, it bounds the number of concurrent sends.
+        Requests for controllers connected to another worker are forwarded to that worker.
+        """
+        if sid not in self.clients and self.cluster and self.cluster.has(sid):
+            return await self.cluster.forward(sid, message)
+        future = self._expect_response(sid)
+        WEBSOCKET_REQUESTS_IN_FLIGHT.inc()
+        try:
+            try:
+                if semaphore:
+                    async with semaphore:
+                        await self._send_encoded_message(sid, message)
+                else:
+                    await self._send_encoded_message(sid, message)
+            except BaseException:
+                self._discard_response(sid, future)
+                raise
+            sent_at = time.perf_counter()
+            response = await future
+            client = self.clients.get(sid)
+            if client:
+                WEBSOCKET_RTT.labels(self.__metric_label(client)).observe(time.perf_counter() - sent_at)
+            return response
+        except ConnectionError:
+            _DISCONNECT_ERRORS.inc()
+            raise
+        finally:
+            WEBSOCKET_REQUESTS_IN_FLIGHT.dec()
+
+    async def broadcast_request(self, sids, data, timeout=None):
+        """
+        Send the same message to several clients and collect their responses.
+
+        The message is encoded once, sent with bounded concurrency, and all responses
+        share a single deadline. Clients that don't answer in time are reported as timed out.
+
+        Args:
+            sids (iterable): Ids of the clients to send the message to.
+            data (dict): The message.
+            timeout (float): Overall deadline in seconds, defaults to the response timeout.
+
+        Returns:
+            dict: Response (or error response) per client id.
+        """
+        message = json.dumps(data)
+        sids = list(dict.fromkeys(sids))
+        responses = await self._gather_requests([(sid, message) for sid in sids], timeout)
+        return dict(zip(sids, responses))
+
+    async def batch_request(self, requests, timeout=None):
+        """
+        Send different messages to clients and collect their responses under a single deadline.
+
+        Messages to the same client are sent in the given order.
+
+        Args:
+            requests (list): (client id, message) pairs.
+            timeout (float): Overall deadline in seconds, defaults to the response timeout.
+
+        Returns:
+            list: Response (or error response) per request, in the given order.
+        """
+        return await self._gather_requests([(sid, json.dumps(data)) for sid, data in requests], timeout)
+
+    async def _gather_requests(self, requests, timeout=None):
+        """Send encoded messages with bounded concurrency and wait for all responses until one deadline"""
+        semaphore = asyncio.Semaphore(self.fanout_concurrency)
+        tasks = [asyncio.ensure_future(self._request(sid, message, semaphore)) for sid, message in requests]
+        if not tasks:
+            return []
+
+        _, pending = await asyncio.wait(tasks, timeout=timeout or self.response_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            WEBSOCKET_TIMEOUTS.inc(len(pending))
+
+        results = []
+        for task in tasks:
+            if task in pending:
+                results.append({"status": "error", "message": "Response timeout"})
+            elif task.exception() is not None:
+                results.append({"status": "error", "message": str(task.exception()) or "Request failed"})
+            else:
+                results.append(task.result())
+        return results
+
+    async def _build_request(self, sid, data):
+        return sid, data
+
     def get_websocket_handler(self):
         return self.handler
 
+    def get_command_builder(self):
+        """Return a command handler whose commands return (client id, message) pairs for batch_request instead of sending them"""
+        return self.command_builder
+
+    def get_fanout_handler(self):
+        """Return a command handler whose commands take a list of client ids and return the response per client"""
+        return self.fanout_handler
+
     def get_connected_clients(self):
-        """Return list of connected clients"""
-        return self.connected_clients
+        """Return list of connected clients, including those of other workers"""
+        if self.cluster:
+            return self.clients.to_list() + [client for client in self.cluster.to_list() if client["id"] not in self.clients]
+        return self.clients.to_list()
+
+    def get_connected_client_ids(self):
+        """Return the ids of all connected clients, including those of other workers"""
+        if self.cluster:
+            return self.clients.ids() + [sid for sid in self.cluster.ids() if sid not in self.clients]
+        return self.clients.ids()
+
+    def get_client_name(self, sid):
+        """Return the name of a connected client, or None"""
+        client = self.clients.get(sid)
+        if client is None and self.cluster:
+            return self.cluster.get_name(sid)
+        return client.name if client else None
+
+    def get_ids_by_name(self, name):
+        """Return the ids of all clients connected with the given name, including those of other workers"""
+        ids = [client.id for client in self.clients.get_by_name(name)]
+        if self.cluster:
+            ids += [sid for sid in self.cluster.get_ids_by_name(name) if sid not in self.clients]
+        return ids
+
+    def get_capabilities(self, sid):
+        """Returns the capabilities a client advertised in its handshake, or None."""
+        client = self.clients.get(sid)
+        if client:
+            return client.capabilities
+        if self.cluster:
+            return self.cluster.get_capabilities(sid)
+        return None
+
+    def get_rtt(self, sid):
+        """Returns the heartbeat round trip time summary of a client, or None."""
+        client = self.clients.get(sid)
+        return client.rtt.summary() if client else None
+
+    def get_cached_state(self, sid):
+        """Return the last state pushed by a client, or None"""
+        return self.state_cache.get(sid)
+
+    def has_client(self, sid):
+        """Return True if a client with the given id is connected"""
+        return sid in self.clients or (self.cluster is not None and self.cluster.has(sid))
@@ -0,0 +1,98 @@
+"""
+Runs the server as several worker processes sharing the API and websocket ports.
+
+Every worker is a complete ASGI server (Quart + hypercorn) that binds both ports with
+SO_REUSEPORT, so the kernel spreads HTTP and websocket connections across the workers.
+A broker in this process keeps the controller registry of all workers in sync and routes
+REST requests for a controller to the worker holding its connection (see websocket/cluster.py).
+
+Usage:
+    python workers.py --workers 4
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+from utils.logger import LOGGER
+from utils.utils import load_config
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+RESTART_DELAY = 1
+
+def load_worker_count():
+    """Returns 'api.workers' from config.json, defaulting to the number of CPUs."""
+    workers = load_config().get("api", {}).get("workers") or os.cpu_count() or 1
+    try:
+        return max(1, int(workers))
+    except (TypeError, ValueError):
+        LOGGER.warning("Invalid worker count in config.json, defaulting to 1.")
+        return 1
+
+def run_worker():
+    """Serves the app in this process on a SO_REUSEPORT socket, shared with the other workers."""
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from app import app, load_port
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", load_port()))
+    sock.listen(1024)
+
+    config = Config()
+    config.bind = [f"fd://{sock.fileno()}"]
+    asyncio.run(serve(app, config))
+
+def start_worker(worker_id, broker_path):
+    env = dict(os.environ, LED_SERVER_MODE="asgi", LED_CLUSTER_SOCKET=broker_path, LED_WORKER_ID=str(worker_id))
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve-worker"], cwd=SERVER_DIR, env=env)
+
+async def supervise(worker_count):
+    """Runs the broker and the workers, restarting workers that exit, until SIGINT or SIGTERM."""
+    from websocket.cluster import ClusterBroker
+
+    broker_path = os.path.join(tempfile.mkdtemp(prefix="led-server-"), "broker.sock")
+    broker = ClusterBroker(broker_path)
+    await broker.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop_event.set)
+
+    workers = {worker_id: start_worker(worker_id, broker_path) for worker_id in range(worker_count)}
+    LOGGER.info(f"Started {worker_count} server workers.")
+    try:
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), RESTART_DELAY)
+            except asyncio.TimeoutError:
+                pass
+            for worker_id, process in workers.items():
+                if process.poll() is not None and not stop_event.is_set():
+                    LOGGER.error(f"Worker {worker_id} exited with code {process.returncode}, restarting it.")
+                    workers[worker_id] = start_worker(worker_id, broker_path)
+    finally:
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.wait()
+        await broker.stop()
+        os.unlink(broker_path)
+        os.rmdir(os.path.dirname(broker_path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the server as several worker processes")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: api.workers or the number of CPUs)")
+    parser.add_argument("--serve-worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_worker:
+        run_worker()
+    else:
+        asyncio.run(supervise(args.workers or load_worker_count()))